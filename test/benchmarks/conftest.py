@@ -0,0 +1,91 @@
+"""
+Fixtures of the benchmark suite of the HADS scoring pipeline.
+
+Run from the repository root as:
+
+    pytest test/benchmarks --benchmark-autosave
+
+and compare the timings, peak memory and throughput with those of earlier
+commits with:
+
+    pytest test/benchmarks --benchmark-compare --benchmark-group-by=func,param
+
+The 10 million row benchmarks are skipped unless the 'HADS_BENCHMARK_LARGE'
+environment variable is set. Make sure to run the suite in an environment
+where the algorithm's requirements and `pytest-benchmark` are installed.
+"""
+import os
+import tracemalloc
+
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+from synthetic_data import generate_hads_responses, generate_organisations
+
+pytest.importorskip("pytest_benchmark")
+
+NUMBER_OF_ORGANISATIONS = 3
+ROW_COUNTS = [1_000, 100_000,
+              pytest.param(10_000_000, marks=pytest.mark.skipif(not os.environ.get("HADS_BENCHMARK_LARGE"),
+                                                                reason="Set HADS_BENCHMARK_LARGE to benchmark "
+                                                                       "10 million rows."))]
+
+
+@pytest.fixture
+def measure(benchmark: Any) -> Callable[..., Any]:
+    """
+    Benchmark a pipeline stage and record its peak memory usage and throughput.
+
+    The DataFrame arguments are copied before every round, outside of the timing,
+    so that stages that alter their input do not affect subsequent rounds.
+    """
+    def measure_stage(function: Callable, *args: Any, number_of_rows: int, **kwargs: Any) -> Any:
+        def setup():
+            return tuple(argument.copy() if hasattr(argument, "copy") else argument for argument in args), kwargs
+
+        # Measure the peak memory usage in a separate call, as tracing slows down the stage
+        tracemalloc.start()
+        function(*setup()[0], **kwargs)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        output = benchmark.pedantic(function, setup=setup, rounds=5 if number_of_rows <= 100_000 else 1,
+                                    iterations=1)
+
+        benchmark.extra_info["rows"] = number_of_rows
+        benchmark.extra_info["peak_memory_bytes"] = peak_memory
+        benchmark.extra_info["rows_per_second"] = number_of_rows / benchmark.stats.stats.mean
+        return output
+
+    return measure_stage
+
+
+@pytest.fixture(scope="session")
+def client() -> Any:
+    """The mock client that is passed to the stages that require one."""
+    from vantage6.algorithm.tools.mock_client import MockAlgorithmClient
+
+    return MockAlgorithmClient(
+        datasets=[[{"database": Path(__file__).parent.parent / "test_data.csv", "db_type": "csv"}]],
+        module="v6-hads-scoring"
+    )
+
+
+@pytest.fixture(scope="module", params=ROW_COUNTS, ids=lambda number_of_rows: f"{number_of_rows}_rows")
+def number_of_rows(request: Any) -> int:
+    """The number of rows of the synthetic data."""
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def responses(number_of_rows: int) -> Any:
+    """The synthetic responses of a single organisation."""
+    return generate_hads_responses(number_of_rows)
+
+
+@pytest.fixture(scope="module")
+def organisations(number_of_rows: int) -> Any:
+    """The synthetic responses of several organisations, together holding the number of rows."""
+    return generate_organisations(number_of_rows, NUMBER_OF_ORGANISATIONS)
@@ -0,0 +1,51 @@
+"""
+Benchmarks of the aggregation of the partial results of several
+organisations by the central function.
+"""
+from importlib import import_module
+from typing import Any, Dict, List
+
+import pytest
+
+from vantage6_strongaya_general.general_statistics import compute_aggregate_adjusted_deviation, \
+    compute_aggregate_general_statistics, compute_local_adjusted_deviation, compute_local_general_statistics
+
+from synthetic_data import ITEMS_TO_SCORE, VARIABLES_TO_STRATIFY
+
+partial = import_module("v6-hads-scoring.partial")
+scoring = import_module("v6-hads-scoring.scoring")
+sufficient_statistics = import_module("v6-hads-scoring.sufficient_statistics")
+
+
+@pytest.fixture(scope="module")
+def prepared_organisations(client: Any, organisations: List[Any]) -> List[Any]:
+    """The prepared, scored data and stratum memberships of each organisation."""
+    return [partial._prepare_scored_data(client, df, ITEMS_TO_SCORE, VARIABLES_TO_STRATIFY, scoring_backend="numpy")
+            for df in organisations]
+
+
+@pytest.fixture(scope="module")
+def general_statistics(prepared_organisations: List[Any]) -> List[Dict[str, Any]]:
+    """The local general statistics of each organisation."""
+    return [compute_local_general_statistics(df, variable_details) for df, variable_details, _ in
+            prepared_organisations]
+
+
+def test_compute_aggregate_general_statistics(measure, general_statistics, number_of_rows):
+    measure(compute_aggregate_general_statistics, general_statistics, number_of_rows=number_of_rows)
+
+
+def test_compute_aggregate_adjusted_deviation(measure, prepared_organisations, general_statistics, number_of_rows):
+    aggregated_statistics = compute_aggregate_general_statistics(general_statistics)
+    deviations = [compute_local_adjusted_deviation(df, aggregated_statistics["numerical_general_statistics"])
+                  for df, _, _ in prepared_organisations]
+
+    measure(compute_aggregate_adjusted_deviation, deviations, aggregated_statistics, number_of_rows=number_of_rows)
+
+
+def test_compute_aggregate_sufficient_statistics(measure, prepared_organisations, number_of_rows):
+    results = [{"sufficient_statistics": sufficient_statistics.compute_stratified_sufficient_statistics(
+        df, variable_details, memberships, scoring.MAXIMUM_SCALE_SCORE)}
+        for df, variable_details, memberships in prepared_organisations]
+
+    measure(sufficient_statistics.compute_aggregate_sufficient_statistics, results, number_of_rows=number_of_rows)
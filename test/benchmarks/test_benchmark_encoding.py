@@ -0,0 +1,53 @@
+"""
+Benchmarks of the encoding of the sufficient statistics that the nodes return,
+from the partial function's result up to its decoding by the central, per
+encoding and number of strata. The size of the serialised payload is recorded
+alongside the timings.
+"""
+import json
+
+from importlib import import_module
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vantage6_strongaya_instruments_licenced.proms.hads_scoring import compose_variable_details
+
+from synthetic_data import generate_hads_responses, ITEMS_TO_SCORE
+
+encoding = import_module("v6-hads-scoring.encoding")
+scoring = import_module("v6-hads-scoring.scoring")
+sufficient_statistics = import_module("v6-hads-scoring.sufficient_statistics")
+
+NUMBER_OF_ROWS = 10_000
+NUMBERS_OF_STRATA = [1, 10, 100, 1000]
+
+
+@pytest.fixture(scope="module")
+def scores() -> pd.DataFrame:
+    """The scores of the synthetic responses."""
+    return scoring.score_hads_vectorised(generate_hads_responses(NUMBER_OF_ROWS), ITEMS_TO_SCORE)
+
+
+@pytest.fixture(scope="module", params=NUMBERS_OF_STRATA, ids=lambda number_of_strata: f"{number_of_strata}_strata")
+def result(request: Any, scores: pd.DataFrame) -> Dict[str, Any]:
+    """A partial result with the sufficient statistics of randomly drawn, overlapping strata."""
+    memberships = pd.DataFrame(np.random.default_rng(0).random((NUMBER_OF_ROWS, request.param)) < 0.5,
+                               columns=[f"stratum_{stratum}" for stratum in range(request.param)])
+    return {"sufficient_statistics": sufficient_statistics.compute_stratified_sufficient_statistics(
+        scores, compose_variable_details(ITEMS_TO_SCORE, True), memberships, scoring.MAXIMUM_SCALE_SCORE)}
+
+
+def transfer(result: Dict[str, Any], result_encoding: str) -> Any:
+    """Encode and serialise the result as the node does, and deserialise and decode it as the central does."""
+    return encoding.decode_result(json.loads(json.dumps(encoding.encode_result(result, result_encoding))))
+
+
+@pytest.mark.parametrize("result_encoding", encoding.RESULT_ENCODINGS)
+def test_transfer_result(benchmark, result, result_encoding):
+    decoded = benchmark(transfer, result, result_encoding)
+
+    assert decoded == json.loads(json.dumps(result))
+    benchmark.extra_info["payload_bytes"] = len(json.dumps(encoding.encode_result(result, result_encoding)))
@@ -0,0 +1,57 @@
+"""
+Benchmarks of refreshing the sufficient statistics of a csv database to which
+rows were appended, by scoring all of its rows anew and by an incremental
+analysis that only scores the appended rows, per number of rows of the
+database.
+"""
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import pandas as pd
+import pytest
+
+from synthetic_data import generate_hads_responses, ITEMS_TO_SCORE, VARIABLES_TO_STRATIFY
+
+partial = import_module("v6-hads-scoring.partial")
+
+# The fraction of the rows of the database that is appended before each refresh
+APPENDED_FRACTION = 0.01
+
+
+@pytest.fixture
+def database(tmp_path: Path, monkeypatch: Any, responses: pd.DataFrame) -> Path:
+    """A csv database of the synthetic responses, configured as the node would, with a persistent store."""
+    path = tmp_path / "responses.csv"
+    responses.to_csv(path, index=False)
+
+    monkeypatch.setenv("USER_REQUESTED_DATABASE_LABELS", "default")
+    monkeypatch.setenv("DEFAULT_DATABASE_URI", str(path))
+    monkeypatch.setenv("DEFAULT_DATABASE_TYPE", "csv")
+    monkeypatch.setenv("HADS_INCREMENTAL_STORE", str(tmp_path / "incremental"))
+    monkeypatch.setenv("HADS_PRIVACY_LEDGER", str(tmp_path / "ledger.json"))
+    return path
+
+
+def refresh(client: Any, incremental: bool) -> Dict[str, Any]:
+    """Compute the sufficient statistics of the database, as the node does for the central."""
+    return partial.partial_hads_chunked_sufficient_statistics(ITEMS_TO_SCORE, VARIABLES_TO_STRATIFY,
+                                                              scoring_backend="numpy", incremental=incremental,
+                                                              mock_client=client)
+
+
+@pytest.mark.parametrize("incremental", [False, True], ids=["full", "incremental"])
+def test_refresh(benchmark, client, database, number_of_rows, incremental):
+    # Analyse the database once, so that an incremental analysis has a stored state to continue from
+    refresh(client, incremental)
+    appended = generate_hads_responses(max(int(number_of_rows * APPENDED_FRACTION), 1), seed=1)
+
+    # Append the rows before every round, outside of the timing
+    def append() -> Tuple[Tuple[Any, bool], Dict[str, Any]]:
+        appended.to_csv(database, mode="a", header=False, index=False)
+        return (client, incremental), {}
+
+    benchmark.pedantic(refresh, setup=append, rounds=5 if number_of_rows <= 100_000 else 1, iterations=1)
+
+    benchmark.extra_info["rows"] = number_of_rows
+    benchmark.extra_info["appended_rows_per_round"] = len(appended)
@@ -0,0 +1,124 @@
+"""
+Benchmarks of the stages of `partial_hads_general_statistics` and
+`partial_hads_aggregate_adjusted_deviation`, in the order in which the
+partial functions execute them.
+"""
+from importlib import import_module
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from vantage6_strongaya_general.general_statistics import compute_aggregate_general_statistics, \
+    compute_local_adjusted_deviation, compute_local_general_statistics
+from vantage6_strongaya_general.miscellaneous import set_datatypes
+from vantage6_strongaya_general.privacy_measures import apply_sample_size_threshold, mask_unnecessary_variables
+from vantage6_strongaya_instruments_licenced.proms.hads_scoring import collect_variable_info, \
+    compose_variable_details, orchestrate_scoring
+
+from synthetic_data import ITEMS_TO_SCORE, VARIABLES_TO_STRATIFY
+
+datatypes = import_module("v6-hads-scoring.datatypes")
+differential_privacy = import_module("v6-hads-scoring.differential_privacy")
+parallel = import_module("v6-hads-scoring.parallel")
+partial = import_module("v6-hads-scoring.partial")
+scoring = import_module("v6-hads-scoring.scoring")
+stratification = import_module("v6-hads-scoring.stratification")
+sufficient_statistics = import_module("v6-hads-scoring.sufficient_statistics")
+
+SCORING_ENGINES = {"default": orchestrate_scoring, "numpy": scoring.score_hads_vectorised}
+
+
+@pytest.fixture(scope="module")
+def stages(client: Any, responses: Any) -> SimpleNamespace:
+    """The input of each stage, as produced by the preceding stages."""
+    variables_to_analyse = collect_variable_info(ITEMS_TO_SCORE) + \
+        stratification.collect_stratification_variables(VARIABLES_TO_STRATIFY)
+    variable_details = compose_variable_details(ITEMS_TO_SCORE, False) | \
+        stratification.compose_stratification_details(VARIABLES_TO_STRATIFY)
+    score_details = compose_variable_details(ITEMS_TO_SCORE, True)
+    bounds = scoring.compile_scoring_plan(ITEMS_TO_SCORE).item_bounds | \
+        stratification.compose_stratification_bounds(VARIABLES_TO_STRATIFY)
+
+    masked = mask_unnecessary_variables(responses.copy(), variables_to_analyse)
+    typed = set_datatypes(masked.copy(), variable_details)
+    memberships = stratification.compose_stratum_memberships(typed, VARIABLES_TO_STRATIFY)
+    thresholded = apply_sample_size_threshold(client, typed.copy(), variables_to_analyse)
+    privatised = differential_privacy.apply_vectorised_differential_privacy(thresholded.copy(), bounds, 1.0, 0)
+    scored = orchestrate_scoring(privatised.copy(), ITEMS_TO_SCORE)
+    typed_scores = set_datatypes(scored.copy(), score_details)
+    local_statistics = compute_local_general_statistics(typed_scores, score_details)
+
+    return SimpleNamespace(variables_to_analyse=variables_to_analyse, variable_details=variable_details,
+                           score_details=score_details, bounds=bounds, masked=masked, typed=typed, memberships=memberships,
+                           thresholded=thresholded, privatised=privatised, typed_scores=typed_scores,
+                           numerical_aggregated_results=compute_aggregate_general_statistics(
+                               [local_statistics])["numerical_general_statistics"])
+
+
+def test_mask_unnecessary_variables(measure, responses, stages, number_of_rows):
+    measure(mask_unnecessary_variables, responses, stages.variables_to_analyse, number_of_rows=number_of_rows)
+
+
+def test_set_datatypes(measure, stages, number_of_rows):
+    measure(set_datatypes, stages.masked, stages.variable_details, number_of_rows=number_of_rows)
+
+
+def test_compact_datatypes(measure, stages, number_of_rows):
+    measure(datatypes.compact_datatypes, stages.typed, collect_variable_info(ITEMS_TO_SCORE),
+            stratification_variables=stratification.collect_stratification_variables(VARIABLES_TO_STRATIFY),
+            number_of_rows=number_of_rows)
+
+
+def test_compose_stratum_memberships(measure, stages, number_of_rows):
+    measure(stratification.compose_stratum_memberships, stages.typed, VARIABLES_TO_STRATIFY,
+            number_of_rows=number_of_rows)
+
+
+def test_apply_sample_size_threshold(measure, client, stages, number_of_rows):
+    measure(apply_sample_size_threshold, client, stages.typed, stages.variables_to_analyse,
+            number_of_rows=number_of_rows)
+
+
+def test_apply_vectorised_differential_privacy(measure, stages, number_of_rows):
+    measure(differential_privacy.apply_vectorised_differential_privacy, stages.thresholded, stages.bounds, 1.0, 0,
+            number_of_rows=number_of_rows)
+
+
+@pytest.mark.parametrize("engine", SCORING_ENGINES)
+def test_scoring(measure, stages, number_of_rows, engine):
+    measure(SCORING_ENGINES[engine], stages.privatised, ITEMS_TO_SCORE, number_of_rows=number_of_rows)
+
+
+def test_set_score_datatypes(measure, stages, number_of_rows):
+    measure(set_datatypes, orchestrate_scoring(stages.privatised.copy(), ITEMS_TO_SCORE), stages.score_details,
+            number_of_rows=number_of_rows)
+
+
+def test_compute_local_general_statistics(measure, stages, number_of_rows):
+    measure(compute_local_general_statistics, stages.typed_scores, stages.score_details,
+            number_of_rows=number_of_rows)
+
+
+def test_compute_local_adjusted_deviation(measure, stages, number_of_rows):
+    measure(compute_local_adjusted_deviation, stages.typed_scores, stages.numerical_aggregated_results,
+            number_of_rows=number_of_rows)
+
+
+def test_compute_stratified_sufficient_statistics(measure, stages, number_of_rows):
+    memberships = stages.memberships[stages.memberships.any(axis=1).to_numpy()]
+    measure(sufficient_statistics.compute_stratified_sufficient_statistics, stages.typed_scores, stages.score_details,
+            memberships, scoring.MAXIMUM_SCALE_SCORE, number_of_rows=number_of_rows)
+
+
+@pytest.mark.parametrize("engine", SCORING_ENGINES)
+def test_prepare_scored_data(measure, client, responses, number_of_rows, engine):
+    measure(partial._prepare_scored_data, client, responses, ITEMS_TO_SCORE, VARIABLES_TO_STRATIFY,
+            scoring_backend=engine, number_of_rows=number_of_rows)
+
+
+@pytest.mark.parametrize("workers", [2, 4])
+def test_compute_sharded_sufficient_statistics(measure, stages, number_of_rows, workers):
+    memberships = stages.memberships[stages.memberships.any(axis=1).to_numpy()]
+    measure(parallel.compute_sharded_sufficient_statistics, stages.privatised, memberships, ITEMS_TO_SCORE, workers,
+            "numpy", number_of_rows=number_of_rows)
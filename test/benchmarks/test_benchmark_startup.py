@@ -0,0 +1,43 @@
+"""
+Benchmarks of the start-up of the algorithm, i.e. of importing the package and
+resolving the dispatched method in a fresh interpreter, as the node's container
+does before executing a task.
+"""
+import json
+import subprocess
+import sys
+
+from importlib import import_module
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+algorithm = import_module("v6-hads-scoring")
+
+REPOSITORY_ROOT = Path(__file__).parent.parent.parent
+
+# The dependencies that only some methods require
+HEAVY_MODULES = ["pyarrow", "SPARQLWrapper", "vantage6_strongaya_rdf", "multiprocessing.shared_memory"]
+
+STARTUP_SCRIPT = """
+import json, sys
+from importlib import import_module
+getattr(import_module("v6-hads-scoring"), sys.argv[1])
+print(json.dumps({"modules": len(sys.modules), "heavy": [name for name in sys.argv[2:] if name in sys.modules]}))
+"""
+
+
+def start_method(method: str) -> Any:
+    """Import the package and resolve the method in a fresh interpreter."""
+    output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, method, *HEAVY_MODULES], cwd=REPOSITORY_ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+@pytest.mark.parametrize("method", algorithm.METHOD_MODULES)
+def test_startup(benchmark, method):
+    imported = benchmark.pedantic(start_method, args=(method,), rounds=5, iterations=1)
+
+    benchmark.extra_info["imported_modules"] = imported["modules"]
+    benchmark.extra_info["imported_heavy_modules"] = imported["heavy"]
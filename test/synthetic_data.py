@@ -0,0 +1,91 @@
+"""
+Generators of synthetic HADS responses for the benchmark suite and unit tests.
+
+Responses are drawn from a latent anxiety and depression severity per
+respondent, so that items of the same subscale correlate as they do in
+practice, and are stored as they would be collected; the reverse-scored
+questions hold the raw response option rather than the item score.
+Missingness is a mix of items that were skipped at random and
+questionnaires that were abandoned part-way through.
+"""
+import numpy as np
+import pandas as pd
+
+from typing import List
+
+ITEMS_TO_SCORE = {"items_to_score": {
+    "scale_to_score": ["anxiety", "depression"],
+    "variable_info": {f"question_{question}": f"Q{question}" for question in range(1, 15)}
+}
+}
+
+VARIABLES_TO_STRATIFY = [{"Age": {"end": 24, "datatype": "int"}},
+                         {"Age": {"start": 25, "datatype": "int"}}]
+
+ANXIETY_QUESTIONS = (1, 3, 5, 7, 9, 11, 13)
+REVERSE_SCORED_QUESTIONS = (1, 3, 5, 6, 8, 10, 11, 13)
+
+
+def generate_hads_responses(number_of_rows: int, seed: int = 0, item_missing_rate: float = 0.02,
+                            abandonment_rate: float = 0.03, severity_shift: float = 0.0) -> pd.DataFrame:
+    """
+    Generate synthetic HADS responses of adolescents and young adults.
+
+    Args:
+        number_of_rows (int): The number of respondents.
+        seed (int, optional): The seed of the random number generator. Defaults to 0.
+        item_missing_rate (float, optional): The probability that a single item is skipped. Defaults to 0.02.
+        abandonment_rate (float, optional): The probability that a respondent abandons the questionnaire
+                                            part-way through. Defaults to 0.03.
+        severity_shift (float, optional): Shift of the mean latent severity, to let organisations differ.
+                                          Defaults to 0.
+
+    Returns:
+        pd.DataFrame: The responses to questions Q1 to Q14 (as floats with missing values) and the respondent's age.
+    """
+    rng = np.random.default_rng(seed)
+
+    # Latent severities per respondent on the scale of a single item score
+    anxiety = rng.normal(1.0 + severity_shift, 0.7, number_of_rows)
+    depression = 0.5 * anxiety + rng.normal(0.4 + severity_shift / 2, 0.6, number_of_rows)
+
+    responses = np.empty((number_of_rows, 14), dtype=np.float64)
+    for question in range(1, 15):
+        severity = anxiety if question in ANXIETY_QUESTIONS else depression
+        scores = np.clip(np.rint(severity + rng.normal(0, 0.6, number_of_rows)), 0, 3)
+        responses[:, question - 1] = 3 - scores if question in REVERSE_SCORED_QUESTIONS else scores
+
+    # Items that were skipped at random
+    responses[rng.random(responses.shape) < item_missing_rate] = np.nan
+
+    # Questionnaires that were abandoned from a random question onwards
+    abandoned = rng.random(number_of_rows) < abandonment_rate
+    first_missing = rng.integers(1, 14, number_of_rows)
+    responses[abandoned[:, None] & (np.arange(14)[None, :] >= first_missing[:, None])] = np.nan
+
+    df = pd.DataFrame(responses, columns=[f"Q{question}" for question in range(1, 15)])
+    df.insert(0, "Age", rng.integers(12, 40, number_of_rows))
+    return df
+
+
+def generate_organisations(number_of_rows: int, number_of_organisations: int, seed: int = 0) -> List[pd.DataFrame]:
+    """
+    Generate the synthetic HADS responses of several organisations that differ in size, severity and missingness.
+
+    Args:
+        number_of_rows (int): The total number of respondents over all organisations.
+        number_of_organisations (int): The number of organisations.
+        seed (int, optional): The seed of the random number generator. Defaults to 0.
+
+    Returns:
+        list: The responses of each organisation.
+    """
+    rng = np.random.default_rng(seed)
+    shares = rng.dirichlet(np.full(number_of_organisations, 5.0))
+    sizes = np.maximum(np.floor(shares * number_of_rows).astype(int), 1)
+
+    return [generate_hads_responses(int(size), seed=seed + organisation + 1,
+                                    item_missing_rate=rng.uniform(0.01, 0.05),
+                                    abandonment_rate=rng.uniform(0.01, 0.06),
+                                    severity_shift=rng.normal(0, 0.2))
+            for organisation, size in enumerate(sizes)]
@@ -77,7 +77,7 @@ print(results)
 # Run the partial method for all organizations
 task = client.task.create(
     input_={
-        "method": "partial",
+        "method": "partial_hads_general_statistics",
         "kwargs": {
             "items_to_score": {"items_to_score": {
                 "scale_to_score": ["anxiety", "depression"],
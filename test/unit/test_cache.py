@@ -0,0 +1,45 @@
+"""
+Tests that the node cache returns the prepared data as it was stored, and that it is keyed on the data itself.
+"""
+from importlib import import_module
+
+import pandas as pd
+import pytest
+
+from synthetic_data import generate_hads_responses, ITEMS_TO_SCORE, VARIABLES_TO_STRATIFY
+
+pytest.importorskip("pyarrow")
+
+cache = import_module("v6-hads-scoring.cache")
+partial = import_module("v6-hads-scoring.partial")
+
+
+@pytest.fixture(autouse=True)
+def temporary_folder(tmp_path, monkeypatch):
+    monkeypatch.setenv("TEMPORARY_FOLDER", str(tmp_path))
+    monkeypatch.setenv("HADS_PRIVACY_LEDGER", str(tmp_path / "ledger.json"))
+
+
+def test_cached_data_round_trip():
+    df, variable_details, memberships = partial._prepare_scored_data(None, generate_hads_responses(300, seed=2),
+                                                                     ITEMS_TO_SCORE, VARIABLES_TO_STRATIFY,
+                                                                     scoring_backend="numpy")
+    key = cache.compose_cache_key(df, ITEMS_TO_SCORE, VARIABLES_TO_STRATIFY)
+    assert cache.load_cached_data(key) is None
+
+    cache.store_cached_data(key, df, variable_details, memberships)
+    cached_df, cached_variable_details, cached_memberships = cache.load_cached_data(key)
+
+    # The compact datatypes and the index of the rows in any stratum are retained
+    pd.testing.assert_frame_equal(cached_df, df)
+    pd.testing.assert_frame_equal(cached_memberships, memberships)
+    assert cached_variable_details == variable_details
+
+
+def test_cache_key_follows_the_data():
+    df = generate_hads_responses(300, seed=2)
+    changed = df.copy()
+    changed.iloc[0, changed.columns.get_loc("Q1")] = 1.0 if df.iloc[0, df.columns.get_loc("Q1")] != 1.0 else 2.0
+
+    assert cache.compose_cache_key(df, ITEMS_TO_SCORE) == cache.compose_cache_key(df.copy(), ITEMS_TO_SCORE)
+    assert cache.compose_cache_key(df, ITEMS_TO_SCORE) != cache.compose_cache_key(changed, ITEMS_TO_SCORE)
@@ -0,0 +1,71 @@
+"""
+Tests that the central excludes organisations that do not report within the node timeout of picking up their run.
+"""
+from importlib import import_module
+from types import SimpleNamespace
+
+import pytest
+
+collection = import_module("v6-hads-scoring.collection")
+
+NODE_TIMEOUT = 10.0
+
+
+class Clock:
+    """A clock of which the time only advances whilst the collection sleeps between polls."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(collection, "time", clock)
+    return clock
+
+
+def compose_client(clock: Clock, schedules: dict) -> SimpleNamespace:
+    """A client of which the run of each organisation passes through the statuses of its schedule, by time."""
+    def status(organisation_id: int) -> str:
+        return [status for moment, status in schedules[organisation_id] if moment <= clock.now][-1]
+
+    return SimpleNamespace(
+        run=SimpleNamespace(from_task=lambda task_id: [{"id": organisation_id, "organization": {"id": organisation_id},
+                                                        "status": status(organisation_id)}
+                                                       for organisation_id in schedules]),
+        result=SimpleNamespace(get=lambda run_id: {"organisation": run_id}))
+
+
+def test_deadline_is_counted_from_picking_up_the_run(clock):
+    client = compose_client(clock, {
+        # Reports at once
+        1: [(0, "completed")],
+        # Picks up its run late, and reports within the timeout of picking it up but after that of the collection
+        2: [(0, "pending"), (6, "active"), (14, "completed")],
+        # Never picks up its run, as if its node were offline
+        3: [(0, "pending")],
+        # Picks up its run, but does not report in time
+        4: [(0, "pending"), (2, "active"), (30, "completed")],
+        # Fails
+        5: [(0, "pending"), (1, "failed")]
+    })
+
+    results, excluded = collection.collect_results(client, 1, node_timeout=NODE_TIMEOUT)
+
+    assert results == [{"organisation": 1}, {"organisation": 2}]
+    assert excluded == [3, 4, 5]
+    assert clock.now < 30
+
+
+def test_quorum_is_enforced(clock):
+    client = compose_client(clock, {1: [(0, "completed")], 2: [(0, "active")]})
+
+    with pytest.raises(collection.AlgorithmError):
+        collection.collect_results(client, 1, node_timeout=NODE_TIMEOUT, quorum=2)
@@ -0,0 +1,157 @@
+"""
+Tests of the differential privacy of the data and sufficient statistics, and of the accounting of its budget.
+"""
+import hashlib
+import json
+import sys
+
+from importlib import import_module
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from synthetic_data import generate_hads_responses, ITEMS_TO_SCORE, VARIABLES_TO_STRATIFY
+
+data_sources = import_module("v6-hads-scoring.data_sources")
+differential_privacy = import_module("v6-hads-scoring.differential_privacy")
+
+ITEM_VARIABLES = [f"Q{question}" for question in range(1, 15)]
+ITEM_BOUNDS = {variable: (0, 3) for variable in ITEM_VARIABLES}
+DATASET_KEYS = ("dataset", "version")
+
+
+@pytest.fixture(autouse=True)
+def ledger(tmp_path, monkeypatch):
+    """A privacy ledger of the node, of which the salt is generated upon the first release."""
+    path = tmp_path / "ledger" / "ledger.json"
+    monkeypatch.setenv("HADS_PRIVACY_LEDGER", str(path))
+    monkeypatch.delenv("HADS_PRIVACY_BUDGET", raising=False)
+    return path
+
+
+@pytest.fixture
+def responses() -> pd.DataFrame:
+    return generate_hads_responses(500, seed=3)
+
+
+def privatise(responses: pd.DataFrame) -> pd.DataFrame:
+    return differential_privacy.privatise_data(responses, ITEM_BOUNDS, 1.0, dataset_keys=DATASET_KEYS)
+
+
+def test_repeated_release_reproduces_noise(responses):
+    first, second = privatise(responses), privatise(responses)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert not first[ITEM_VARIABLES].equals(responses[ITEM_VARIABLES])
+
+
+def test_noise_can_not_be_reproduced_without_salt(ledger, monkeypatch, responses):
+    privatised = privatise(responses)
+
+    # The salt is generated once, stored alongside the ledger and never part of the release
+    salt = (ledger.parent / (ledger.name + differential_privacy.SALT_FILE_SUFFIX)).read_bytes()
+    assert len(salt) == differential_privacy.SALT_BYTES
+    assert differential_privacy.collect_noise_salt() == salt
+
+    # Regenerating the noise from the public components of the release alone does not reproduce it
+    release_key = hashlib.sha256(json.dumps(["input", DATASET_KEYS[1], sorted(ITEM_BOUNDS.items()), 1.0]
+                                            ).encode()).hexdigest()
+    public_seed = int(hashlib.sha256(json.dumps([release_key], sort_keys=True).encode()).hexdigest()[:32], 16)
+    regenerated = differential_privacy.apply_vectorised_differential_privacy(responses, ITEM_BOUNDS, 1.0,
+                                                                             public_seed)
+    assert not np.array_equal(regenerated[ITEM_VARIABLES].to_numpy(dtype=float, na_value=-1),
+                              privatised[ITEM_VARIABLES].to_numpy(dtype=float, na_value=-1))
+
+    # Nor does an identical release with the salt of another node
+    monkeypatch.setenv("HADS_PRIVACY_LEDGER", str(ledger.parent / "other" / "ledger.json"))
+    other = privatise(responses)
+    assert not np.array_equal(other[ITEM_VARIABLES].to_numpy(dtype=float, na_value=-1),
+                              privatised[ITEM_VARIABLES].to_numpy(dtype=float, na_value=-1))
+
+
+def test_noise_follows_public_bounds(ledger):
+    # Identical responses have no observed range, yet are perturbed within the public range of the items
+    responses = pd.DataFrame({variable: [1.0] * 1000 for variable in ITEM_VARIABLES})
+    privatised = privatise(responses)
+
+    values = privatised[ITEM_VARIABLES].to_numpy()
+    assert values.min() >= 0 and values.max() <= 3
+    assert (values != 1.0).mean() > 0.5
+
+    # The budget is divided over the variables, so that the release as a whole spends the requested budget once
+    assert json.loads(ledger.read_text())[DATASET_KEYS[0]]["spent"] == 1.0
+
+
+def test_budget_is_divided_over_variables():
+    # The noise of each variable has the width of its bounds times the number of variables over epsilon as its scale,
+    # which is small enough here for the clipping to the bounds to be negligible
+    responses = pd.DataFrame({"a": np.zeros(200_000), "b": np.zeros(200_000)})
+    bounds = {"a": (-1.0, 1.0), "b": (-1.0, 1.0)}
+    noise = differential_privacy.apply_vectorised_differential_privacy(responses, bounds, 400.0, 7).to_numpy()
+
+    # The mean absolute deviation of Laplace noise equals its scale
+    assert np.abs(noise).mean(axis=0) == pytest.approx([2.0 * 2 / 400.0] * 2, rel=0.02)
+
+
+def test_noise_is_keyed_by_record(responses):
+    # A record receives the same noise regardless of which other records are privatised along with it
+    whole = privatise(responses)
+    subset = privatise(responses.iloc[::3])
+    batches = pd.concat([privatise(responses.iloc[start:start + 64]) for start in range(0, len(responses), 64)])
+
+    pd.testing.assert_frame_equal(subset, whole.iloc[::3])
+    pd.testing.assert_frame_equal(batches, whole)
+
+
+def test_noise_of_distant_records():
+    # Records that lie far apart are drawn by window, rather than drawing the noise of all records in between
+    records = np.array([3, 10 ** 12, 5, 10 ** 12 + 1, 2 ** 40])
+    noise = differential_privacy.draw_record_noise(11, records, 14)
+
+    assert noise.shape == (5, 14)
+    np.testing.assert_array_equal(noise[1], differential_privacy.draw_record_noise(11, records[1:2], 14)[0])
+    np.testing.assert_array_equal(noise[[0, 2]], differential_privacy.draw_record_noise(11, records[[2, 0]], 14)[::-1])
+
+
+def test_parquet_pushdown_keeps_record_positions(tmp_path, responses):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "responses.parquet"
+    responses.to_parquet(path, index=False, row_group_size=100)
+
+    # The rows that the stratification selects keep their position in the database, and thereby their noise
+    variables_to_stratify = {"Age": {"start": 20, "end": 30}}
+    projected = data_sources.read_projected_data(str(path), "parquet", list(responses.columns),
+                                                 variables_to_stratify)
+    expected = responses[responses["Age"].between(20, 30)]
+    pd.testing.assert_frame_equal(projected, expected, check_index_type=False, check_dtype=False)
+
+    chunks = pd.concat(data_sources.iterate_data_chunks(str(path), "parquet", 64, list(responses.columns),
+                                                        variables_to_stratify=variables_to_stratify, start_row=150))
+    pd.testing.assert_frame_equal(chunks, expected.loc[150:], check_index_type=False, check_dtype=False)
+    pd.testing.assert_frame_equal(privatise(chunks), privatise(projected).loc[150:], check_index_type=False)
+
+
+def test_instruments_share_the_budget_of_output_perturbation(ledger, monkeypatch, responses):
+    mock_client = pytest.importorskip("vantage6.algorithm.tools.mock_client")
+    client = mock_client.MockAlgorithmClient(datasets=[[{"database": responses, "db_type": "csv"}]],
+                                             module="v6-hads-scoring")
+    partial = import_module("v6-hads-scoring.partial")
+
+    # Provide the scoring tables of HADS under another name as well, so that two instruments are perturbed
+    instruments = import_module("v6-hads-scoring.instruments")
+    monkeypatch.setitem(sys.modules, instruments.INSTRUMENT_MODULE_TEMPLATE.format(instrument="copy"),
+                        instruments.load_instrument("hads"))
+
+    result = partial.partial_multi_instrument_sufficient_statistics(
+        instruments={"hads": ITEMS_TO_SCORE, "copy": ITEMS_TO_SCORE}, variables_to_stratify=VARIABLES_TO_STRATIFY,
+        epsilon=2.0, privacy_mechanism="output", mock_client=client, mock_data=[responses])
+
+    # The minimum and maximum are withheld, and the instruments together spend the budget once
+    for instrument_result in result["instruments"].values():
+        for variables in instrument_result["sufficient_statistics"].values():
+            for sketch in variables.values():
+                assert sketch["min"] is None and sketch["max"] is None
+    entry, = json.loads(ledger.read_text()).values()
+    assert sorted(entry["releases"].values()) == [1.0, 1.0]
+    assert entry["spent"] == pytest.approx(2.0)
@@ -0,0 +1,119 @@
+"""
+Tests of the compact encoding of the partial results and of its decoding by the central.
+"""
+import json
+import math
+
+from importlib import import_module
+
+import pytest
+
+from vantage6.algorithm.tools.exceptions import UserInputError
+
+from synthetic_data import generate_hads_responses, ITEMS_TO_SCORE, VARIABLES_TO_STRATIFY
+
+pytest.importorskip("pyarrow")
+
+encoding = import_module("v6-hads-scoring.encoding")
+
+STRATUM_LABELS = [json.dumps(stratum, sort_keys=True) for stratum in
+                  [{"Age": {"end": 24, "datatype": "int"}, "Sex": {"datatype": "str", "value": "f"}},
+                   {"Age": {"start": 25, "datatype": "int"}}]]
+
+
+def compose_sketch(count: int, histogram: bool = True) -> dict:
+    sketch = {"count": count, "missing": 3, "mean": 7.25, "m2": 1e-300, "min": 0.0, "max": 21.0}
+    if histogram:
+        sketch["histogram"] = [count, 0, 0] + [0] * 19
+    return sketch
+
+
+@pytest.fixture
+def statistics() -> dict:
+    # Nested strata, missing moments of an empty stratum and a score without a histogram
+    return {STRATUM_LABELS[0]: {"hads_anxiety": compose_sketch(12),
+                                "hads_depression": compose_sketch(12, histogram=False)},
+            STRATUM_LABELS[1]: {"hads_anxiety": compose_sketch(0) | {"mean": math.nan, "m2": math.nan,
+                                                                     "min": math.nan, "max": math.nan}}}
+
+
+def transfer(result: dict, result_encoding: str) -> dict:
+    """Encode and serialise the result as the node does, and deserialise and decode it as the central does."""
+    return encoding.decode_result(json.loads(json.dumps(encoding.encode_result(result, result_encoding))))
+
+
+def assert_statistics_equal(decoded: dict, expected: dict) -> None:
+    assert decoded.keys() == expected.keys()
+    for stratum, variables in expected.items():
+        assert decoded[stratum].keys() == variables.keys()
+        for variable, sketch in variables.items():
+            assert decoded[stratum][variable].keys() == sketch.keys()
+            for column, value in sketch.items():
+                if isinstance(value, float) and math.isnan(value):
+                    assert math.isnan(decoded[stratum][variable][column])
+                else:
+                    assert decoded[stratum][variable][column] == value
+
+
+@pytest.mark.parametrize("result_encoding", encoding.RESULT_ENCODINGS)
+def test_round_trip(statistics, result_encoding):
+    result = {"sufficient_statistics": statistics, "dataset_version": "version"}
+    decoded = transfer(result, result_encoding)
+
+    assert decoded["dataset_version"] == "version"
+    assert_statistics_equal(decoded["sufficient_statistics"], statistics)
+
+
+def test_round_trip_of_instruments(statistics):
+    result = {"instruments": {"hads": {"sufficient_statistics": statistics}, "other": {"sufficient_statistics": {}}},
+              "performance": {"wall_time": 1.0}}
+    encoded = encoding.encode_result(result, "arrow")
+    assert "sufficient_statistics" not in encoded["instruments"]["hads"]
+
+    decoded = transfer(result, "arrow")
+    assert decoded["performance"] == {"wall_time": 1.0}
+    assert_statistics_equal(decoded["instruments"]["hads"]["sufficient_statistics"], statistics)
+    assert decoded["instruments"]["other"]["sufficient_statistics"] == {}
+
+
+def test_plain_results_are_left_as_they_are():
+    assert encoding.decode_result(None) is None
+    assert encoding.decode_result({"strata": {}}) == {"strata": {}}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """A mock client of two organisations, which both keep a privacy ledger."""
+    mock_client = pytest.importorskip("vantage6.algorithm.tools.mock_client")
+    monkeypatch.setenv("HADS_PRIVACY_LEDGER", str(tmp_path / "ledger.json"))
+    return mock_client.MockAlgorithmClient(
+        datasets=[[{"database": generate_hads_responses(400, seed=organisation), "db_type": "csv"}]
+                  for organisation in range(2)],
+        module="v6-hads-scoring"
+    )
+
+
+@pytest.mark.parametrize("method, arguments", [
+    ("central", {"items_to_score": ITEMS_TO_SCORE, "single_round": True}),
+    ("central_multi_instrument", {"instruments": {"hads": ITEMS_TO_SCORE}}),
+], ids=["central", "central_multi_instrument"])
+def test_central_decodes_arrow_results(client, method, arguments):
+    # The central aggregates the same statistics whether the nodes encode them or not
+    organisation_ids = [organisation["id"] for organisation in client.organization.list()]
+    results = {}
+    for result_encoding in encoding.RESULT_ENCODINGS:
+        task = client.task.create({"method": method, "kwargs": arguments | {
+            "variables_to_stratify": VARIABLES_TO_STRATIFY, "result_encoding": result_encoding}},
+            organizations=organisation_ids[:1])
+        results[result_encoding] = client.wait_for_results(task["id"])[0]
+
+    assert results["arrow"] == results["json"]
+    assert "HADS_anxiety" in json.dumps(results["arrow"])
+
+
+def test_arrow_encoding_requires_single_round(client):
+    # Only single_round changes the structure of the results, hence the encoding does not silently imply it
+    with pytest.raises(UserInputError, match="single_round"):
+        client.task.create({"method": "central", "kwargs": {"items_to_score": ITEMS_TO_SCORE,
+                                                            "result_encoding": "arrow"}},
+                           organizations=[organisation["id"] for organisation in client.organization.list()])
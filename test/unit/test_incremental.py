@@ -0,0 +1,113 @@
+"""
+Tests of incremental analyses, which only score the rows that were appended to a database since the previous
+analysis and score it anew in full if it was altered otherwise.
+"""
+from importlib import import_module
+from typing import Any, Callable, Dict
+
+import pandas as pd
+import pytest
+
+from synthetic_data import generate_hads_responses, ITEMS_TO_SCORE, VARIABLES_TO_STRATIFY
+
+partial = import_module("v6-hads-scoring.partial")
+
+CONTINUED = "Continuing the incremental analysis"
+
+
+def write_database(path: Any, df: pd.DataFrame) -> None:
+    """Write the responses as a csv or parquet database, the latter in row groups of 500 rows."""
+    if path.suffix == ".csv":
+        df.to_csv(path, index=False)
+    else:
+        df.to_parquet(path, index=False, row_group_size=500)
+
+
+@pytest.fixture(params=["csv", "parquet"])
+def database(request, tmp_path, monkeypatch):
+    """A database of the synthetic responses, configured as the node would, with a persistent store."""
+    if request.param == "parquet":
+        pytest.importorskip("pyarrow")
+    path = tmp_path / f"responses.{request.param}"
+
+    monkeypatch.setenv("USER_REQUESTED_DATABASE_LABELS", "default")
+    monkeypatch.setenv("DEFAULT_DATABASE_URI", str(path))
+    monkeypatch.setenv("DEFAULT_DATABASE_TYPE", request.param)
+    monkeypatch.setenv("HADS_INCREMENTAL_STORE", str(tmp_path / "incremental"))
+    monkeypatch.setenv("HADS_PRIVACY_LEDGER", str(tmp_path / "ledger" / "ledger.json"))
+    return path
+
+
+@pytest.fixture
+def client():
+    mock_client = pytest.importorskip("vantage6.algorithm.tools.mock_client")
+    return mock_client.MockAlgorithmClient(datasets=[[{"database": generate_hads_responses(10), "db_type": "csv"}]],
+                                           module="v6-hads-scoring")
+
+
+def analyse(client: Any, incremental: bool) -> Dict[str, Any]:
+    # Perturb the statistics rather than the responses, which keep the noise of the version they were scored in
+    return partial.partial_hads_chunked_sufficient_statistics(ITEMS_TO_SCORE, VARIABLES_TO_STRATIFY, chunk_size=700,
+                                                              scoring_backend="numpy", privacy_mechanism="output",
+                                                              incremental=incremental,
+                                                              mock_client=client)["sufficient_statistics"]
+
+
+def assert_statistics_equal(statistics: Dict[str, Any], expected: Dict[str, Any]) -> None:
+    assert statistics.keys() == expected.keys()
+    for stratum, variables in expected.items():
+        for variable, sketch in variables.items():
+            obtained = dict(statistics[stratum][variable])
+            assert obtained.pop("histogram", None) == pytest.approx(sketch.get("histogram"))
+            assert obtained == pytest.approx({key: value for key, value in sketch.items() if key != "histogram"},
+                                             nan_ok=True)
+
+
+def reverse_rows(df: pd.DataFrame) -> pd.DataFrame:
+    return df.iloc[::-1]
+
+
+def edit_last_row(df: pd.DataFrame) -> pd.DataFrame:
+    # Flip a response of the last scored row, which leaves the size of a csv file as it is
+    df = df.copy()
+    df.iloc[-1, df.columns.get_loc("Q2")] = 1.0 if df.iloc[-1, df.columns.get_loc("Q2")] != 1.0 else 2.0
+    df.iloc[-1, df.columns.get_loc("Age")] = 39 if df.iloc[-1, df.columns.get_loc("Age")] != 39 else 12
+    return df
+
+
+def truncate(df: pd.DataFrame) -> pd.DataFrame:
+    return df.iloc[:-500]
+
+
+@pytest.mark.parametrize("alter", [edit_last_row, truncate, reverse_rows],
+                         ids=["in_place_edit", "truncation", "same_size_rewrite"])
+def test_altered_database_is_scored_anew(capsys, client, database, alter: Callable[[pd.DataFrame], pd.DataFrame]):
+    responses = generate_hads_responses(3000, seed=5)
+    write_database(database, responses)
+    analyse(client, incremental=True)
+
+    write_database(database, alter(responses))
+    capsys.readouterr()
+    statistics = analyse(client, incremental=True)
+
+    assert CONTINUED not in capsys.readouterr().out
+    assert_statistics_equal(statistics, analyse(client, incremental=False))
+
+
+def test_appended_rows_are_scored_incrementally(capsys, client, database):
+    responses = generate_hads_responses(3000, seed=5)
+    write_database(database, responses)
+    analyse(client, incremental=True)
+
+    # Append rows twice, so that the second analysis continues from the watermark of the first incremental one
+    for seed in (6, 7):
+        responses = pd.concat([responses, generate_hads_responses(1000, seed=seed)], ignore_index=True)
+        write_database(database, responses)
+        capsys.readouterr()
+        statistics = analyse(client, incremental=True)
+
+        assert CONTINUED in capsys.readouterr().out
+        assert_statistics_equal(statistics, analyse(client, incremental=False))
+
+    # A database that did not change is not read, yet yields the same statistics
+    assert_statistics_equal(analyse(client, incremental=True), statistics)
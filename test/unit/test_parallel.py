@@ -0,0 +1,40 @@
+"""
+Tests that scoring in parallel shards of shared memory yields the sufficient statistics of scoring serially,
+whether the item responses are shared as single-byte codes with a missing-value mask or as floats.
+"""
+from importlib import import_module
+
+import pytest
+
+from synthetic_data import generate_hads_responses, ITEMS_TO_SCORE, VARIABLES_TO_STRATIFY
+
+from vantage6_strongaya_general.miscellaneous import set_datatypes
+
+datatypes = import_module("v6-hads-scoring.datatypes")
+parallel = import_module("v6-hads-scoring.parallel")
+scoring = import_module("v6-hads-scoring.scoring")
+stratification = import_module("v6-hads-scoring.stratification")
+sufficient_statistics = import_module("v6-hads-scoring.sufficient_statistics")
+
+
+@pytest.mark.parametrize("compact", [True, False], ids=["codes", "floats"])
+def test_sharded_statistics_match_serial(compact):
+    plan = scoring.compile_scoring_plan(ITEMS_TO_SCORE)
+    df = generate_hads_responses(5001, seed=11, item_missing_rate=0.1)
+    if compact:
+        df = datatypes.compact_datatypes(df, plan.item_variables)
+        assert all(df[variable].dtype == datatypes.SMALL_INTEGER_DTYPE for variable in plan.item_variables)
+    memberships = stratification.compose_stratum_memberships(df, VARIABLES_TO_STRATIFY)
+
+    sharded = parallel.compute_sharded_sufficient_statistics(df, memberships, plan, 3, scoring_backend="numpy")
+
+    scores = set_datatypes(scoring.score_hads_vectorised(df, plan), plan.score_details)
+    serial = sufficient_statistics.compute_stratified_sufficient_statistics(scores, plan.score_details, memberships,
+                                                                            scoring.MAXIMUM_SCALE_SCORE)
+
+    assert sharded.keys() == serial.keys()
+    for stratum, variables in serial.items():
+        for variable, sketch in variables.items():
+            merged = dict(sharded[stratum][variable])
+            assert merged.pop("histogram") == sketch["histogram"]
+            assert merged == pytest.approx({key: value for key, value in sketch.items() if key != "histogram"})
@@ -0,0 +1,108 @@
+"""
+Tests that the vectorised NumPy scoring engine scores exactly as the scoring tables of the instrument do,
+including the proration of subscales with a missing item and the subscales that are considered missing.
+"""
+from importlib import import_module
+from itertools import combinations
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from synthetic_data import generate_hads_responses, ITEMS_TO_SCORE
+
+scoring = import_module("v6-hads-scoring.scoring")
+hads_scoring = import_module("vantage6_strongaya_instruments_licenced.proms.hads_scoring")
+
+
+def compose_responses(item_scores: List[List[Optional[int]]]) -> pd.DataFrame:
+    """Compose the responses to questions Q1 to Q14 that yield the given item scores, None being a missing item."""
+    responses = np.array(item_scores, dtype=np.float64)
+    reverse_scored = np.array(scoring.REVERSE_SCORED_QUESTIONS) - 1
+    responses[:, reverse_scored] = scoring.MAXIMUM_ITEM_SCORE - responses[:, reverse_scored]
+    return pd.DataFrame(responses, columns=[f"Q{question}" for question in range(1, 15)])
+
+
+def assert_identical_scores(responses: pd.DataFrame) -> None:
+    """Assert that both engines compute identical scores, and mark the same subscales as missing."""
+    expected = hads_scoring.orchestrate_scoring(responses.copy(), ITEMS_TO_SCORE)
+    actual = scoring.score_hads_vectorised(responses, ITEMS_TO_SCORE)
+
+    for variable in hads_scoring.compose_variable_details(ITEMS_TO_SCORE, True):
+        np.testing.assert_array_equal(pd.to_numeric(actual[variable]).to_numpy(dtype=np.float64),
+                                      pd.to_numeric(expected[variable]).to_numpy(dtype=np.float64),
+                                      err_msg=variable)
+
+
+@pytest.mark.parametrize("item_missing_rate, abandonment_rate", [(0.0, 0.0), (0.02, 0.03), (0.2, 0.2)],
+                         ids=["complete", "typical", "sparse"])
+def test_synthetic_responses(item_missing_rate, abandonment_rate):
+    responses = generate_hads_responses(20_000, seed=7, item_missing_rate=item_missing_rate,
+                                        abandonment_rate=abandonment_rate)
+    assert_identical_scores(responses)
+
+
+def test_prorated_sums():
+    # Every sum of the six answered items of a subscale, one item of which is missing at each position,
+    # including the sums of which the prorated score lies halfway between two integers
+    rows = []
+    for scale in scoring.HADS_SCALES.values():
+        for missing_question in scale:
+            for total in range(len(scale[1:]) * scoring.MAXIMUM_ITEM_SCORE + 1):
+                item_scores: List[Optional[int]] = [1] * scoring.NUMBER_OF_QUESTIONS
+                answered = [question for question in scale if question != missing_question]
+                for position, question in enumerate(answered):
+                    item_scores[question - 1] = min(max(total - position * scoring.MAXIMUM_ITEM_SCORE, 0),
+                                                    scoring.MAXIMUM_ITEM_SCORE)
+                item_scores[missing_question - 1] = None
+                rows.append(item_scores)
+    assert_identical_scores(compose_responses(rows))
+
+
+def test_missing_items():
+    # Subscales with two or more missing items, and respondents that answered none or all items
+    rows = []
+    for scale in scoring.HADS_SCALES.values():
+        for missing_questions in combinations(scale, 2):
+            item_scores: List[Optional[int]] = [2] * scoring.NUMBER_OF_QUESTIONS
+            for question in missing_questions:
+                item_scores[question - 1] = None
+            rows.append(item_scores)
+    rows.append([None] * scoring.NUMBER_OF_QUESTIONS)
+    rows.append([0] * scoring.NUMBER_OF_QUESTIONS)
+    rows.append([scoring.MAXIMUM_ITEM_SCORE] * scoring.NUMBER_OF_QUESTIONS)
+
+    responses = compose_responses(rows)
+    assert_identical_scores(responses)
+
+    # The subscales with more than one missing item are missing, and the complete subscales span the full range
+    scores = scoring.score_hads_vectorised(responses, ITEMS_TO_SCORE)
+    plan = scoring.compile_scoring_plan(ITEMS_TO_SCORE)
+    anxiety, depression = (scores[plan.score_columns[scale]] for scale in ("anxiety", "depression"))
+    assert anxiety.iloc[:21].isna().all() and (depression.iloc[:21] == 14).all()
+    assert depression.iloc[21:42].isna().all() and (anxiety.iloc[21:42] == 14).all()
+    assert anxiety.iloc[-3:].tolist()[1:] == [0, scoring.MAXIMUM_SCALE_SCORE] and np.isnan(anxiety.iloc[-3])
+
+
+def test_out_of_range_responses():
+    # Responses are rounded and clipped to the response options, as differentially private input may lie outside
+    responses = compose_responses([[1] * scoring.NUMBER_OF_QUESTIONS] * 4)
+    responses.iloc[:, 0] = [-0.7, 0.4, 2.6, 4.2]
+    assert_identical_scores(responses)
+
+
+def test_recently_used_scoring_plans_are_retained():
+    scoring._compile_scoring_plan.cache_clear()
+    plan = scoring.compile_scoring_plan(ITEMS_TO_SCORE)
+
+    # Fill the memo with other specifications whilst using the plan in between, so that it is never the least
+    # recently used one
+    for index in range(scoring.MAXIMUM_SCORING_PLANS * 2):
+        variable_info = {question: f"{variable}_{index}"
+                         for question, variable in ITEMS_TO_SCORE["items_to_score"]["variable_info"].items()}
+        scoring.compile_scoring_plan({"items_to_score": ITEMS_TO_SCORE["items_to_score"] |
+                                      {"variable_info": variable_info}})
+        assert scoring.compile_scoring_plan(ITEMS_TO_SCORE) is plan
+
+    assert scoring._compile_scoring_plan.cache_info().currsize == scoring.MAXIMUM_SCORING_PLANS
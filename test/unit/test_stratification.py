@@ -0,0 +1,20 @@
+"""
+Tests of the public bounds that the requested strata declare for the variables to stratify.
+"""
+from importlib import import_module
+
+from synthetic_data import VARIABLES_TO_STRATIFY
+
+stratification = import_module("v6-hads-scoring.stratification")
+
+
+def test_open_strata_have_no_bounds():
+    assert stratification.compose_stratification_bounds(VARIABLES_TO_STRATIFY) == {}
+    assert stratification.compose_stratification_bounds(None) == {}
+
+
+def test_bounds_are_union_of_strata():
+    strata = [{"Age": {"start": 12, "end": 17, "datatype": "int"}, "Sex": {"datatype": "str"}},
+              {"Age": {"start": 18, "end": 39, "datatype": "int"}}]
+    assert stratification.compose_stratification_bounds(strata) == {"Age": (12, 39)}
+    assert stratification.compose_stratification_bounds(strata + [{"Sex": {"datatype": "str"}}]) == {}
@@ -0,0 +1,197 @@
+"""
+Tests that the moment sketches of parts of the data, merged pairwise and finalised, describe the data as a pooled
+computation does, that strata below the sample size threshold are withheld, and that the quantiles and severity
+bands derived from the histograms of the scores are exact.
+"""
+from importlib import import_module
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vantage6.algorithm.tools.exceptions import PrivacyThresholdViolation
+
+from synthetic_data import generate_hads_responses, ITEMS_TO_SCORE, VARIABLES_TO_STRATIFY
+
+partial = import_module("v6-hads-scoring.partial")
+scoring = import_module("v6-hads-scoring.scoring")
+stratification = import_module("v6-hads-scoring.stratification")
+sufficient_statistics = import_module("v6-hads-scoring.sufficient_statistics")
+
+SCORE_VARIABLES = {"anxiety": {"datatype": "int"}, "depression": {"datatype": "int"}}
+HISTOGRAM_BOUND = scoring.MAXIMUM_SCALE_SCORE
+
+# Parts of very different sizes, including a single row, as the organisations or batches of a study may be
+PART_BOUNDARIES = [0, 1, 40, 41, 2500, 6000]
+
+
+@pytest.fixture
+def scores() -> pd.DataFrame:
+    rng = np.random.default_rng(13)
+    values = rng.integers(0, HISTOGRAM_BOUND + 1, size=(6000, 2)).astype(float)
+    values[rng.random(values.shape) < 0.05] = np.nan
+    return pd.DataFrame(values, columns=list(SCORE_VARIABLES))
+
+
+@pytest.fixture
+def memberships(scores) -> pd.DataFrame:
+    # A stratum of all rows, one of a minority of rows of which some parts have none, and an empty stratum
+    return pd.DataFrame({"all": np.ones(len(scores), dtype=bool),
+                         "minority": np.arange(len(scores)) % 7 == 3,
+                         "empty": np.zeros(len(scores), dtype=bool)})
+
+
+def compute(scores: pd.DataFrame, memberships: pd.DataFrame) -> dict:
+    return sufficient_statistics.compute_stratified_sufficient_statistics(scores, SCORE_VARIABLES, memberships,
+                                                                          HISTOGRAM_BOUND)
+
+
+def compute_parts(scores: pd.DataFrame, memberships: pd.DataFrame) -> list:
+    return [compute(scores.iloc[start:stop], memberships.iloc[start:stop])
+            for start, stop in zip(PART_BOUNDARIES[:-1], PART_BOUNDARIES[1:])]
+
+
+def test_merged_parts_match_pooled_statistics(scores, memberships):
+    pooled = compute(scores, memberships)
+    merged = sufficient_statistics.merge_pairwise(compute_parts(scores, memberships),
+                                                  sufficient_statistics.merge_stratified_sufficient_statistics, {})
+
+    assert merged.keys() == pooled.keys()
+    for stratum, variables in pooled.items():
+        for variable, sketch in variables.items():
+            for key in ("count", "missing", "min", "max", "histogram"):
+                assert merged[stratum][variable][key] == sketch[key]
+            assert merged[stratum][variable]["mean"] == pytest.approx(sketch["mean"], rel=1e-12)
+            assert merged[stratum][variable]["m2"] == pytest.approx(sketch["m2"], rel=1e-12)
+
+    assert merged["empty"]["anxiety"] == {"count": 0, "missing": 0, "mean": None, "m2": 0.0, "min": None,
+                                          "max": None, "histogram": [0] * (HISTOGRAM_BOUND + 1)}
+
+
+def test_merge_is_independent_of_the_split(scores, memberships):
+    # Merging in another order and grouping yields the same moments, up to rounding
+    parts = compute_parts(scores, memberships)
+    merge = sufficient_statistics.merge_stratified_sufficient_statistics
+    forwards = sufficient_statistics.merge_pairwise(parts, merge, {})
+    sequential = {}
+    for part in reversed(parts):
+        sequential = merge(sequential, part)
+
+    for stratum, variables in forwards.items():
+        for variable, sketch in variables.items():
+            for key, value in sketch.items():
+                assert sequential[stratum][variable][key] == (pytest.approx(value, rel=1e-12)
+                                                              if isinstance(value, float) else value)
+
+
+def test_merge_pairwise_preserves_order():
+    concatenate = "{}{}".format
+    assert sufficient_statistics.merge_pairwise([], concatenate, "") == ""
+    assert sufficient_statistics.merge_pairwise("a", concatenate, "") == "a"
+    assert sufficient_statistics.merge_pairwise("abcde", concatenate, "") == "abcde"
+
+
+def test_finalised_statistics_match_pooled_data(scores, memberships):
+    results = [{"sufficient_statistics": part} for part in compute_parts(scores, memberships)] + [None]
+    finalised = sufficient_statistics.compute_aggregate_sufficient_statistics(results)["numerical_general_statistics"]
+
+    for stratum in memberships.columns:
+        for variable in SCORE_VARIABLES:
+            values = scores.loc[memberships[stratum], variable]
+            present = values.dropna().to_numpy()
+            statistics = finalised[stratum][variable]
+
+            assert statistics["count"] == len(present)
+            assert statistics["missing"] == values.isna().sum()
+            if not len(present):
+                assert statistics["mean"] is None and statistics["std"] is None and statistics["median"] is None
+                continue
+
+            assert statistics["mean"] == pytest.approx(present.mean(), rel=1e-12)
+            assert statistics["std"] == pytest.approx(present.std(ddof=1), rel=1e-12)
+            assert (statistics["min"], statistics["max"]) == (present.min(), present.max())
+            assert statistics["median"] == np.quantile(present, 0.5)
+
+
+def test_strata_below_threshold_are_withheld(scores, memberships, monkeypatch):
+    monkeypatch.setenv("SAMPLE_SIZE_THRESHOLD", "10")
+    parts = compute_parts(scores, memberships)
+
+    # The minority stratum of a small part is withheld, whereas its merged statistics are shared
+    small_part = sufficient_statistics.select_strata_meeting_threshold(parts[1])
+    assert list(small_part) == ["all"]
+    merged = sufficient_statistics.merge_pairwise(parts, sufficient_statistics.merge_stratified_sufficient_statistics,
+                                                  {})
+    assert list(sufficient_statistics.select_strata_meeting_threshold(merged)) == ["all", "minority"]
+
+    with pytest.raises(PrivacyThresholdViolation):
+        sufficient_statistics.select_strata_meeting_threshold(parts[0])
+
+
+def test_general_and_sufficient_statistics_withhold_the_same_strata(monkeypatch):
+    plan = scoring.compile_scoring_plan(ITEMS_TO_SCORE)
+    df = scoring.score_hads_vectorised(generate_hads_responses(60, seed=5), plan)
+    memberships = stratification.compose_stratum_memberships(df, VARIABLES_TO_STRATIFY)
+    statistics = sufficient_statistics.compute_stratified_sufficient_statistics(df, plan.score_details, memberships,
+                                                                               HISTOGRAM_BOUND)
+
+    # A threshold between the sizes of the strata withholds the smaller one from both the general statistics of two
+    # rounds and the sufficient statistics of a single round
+    sizes = memberships.sum()
+    monkeypatch.setenv("SAMPLE_SIZE_THRESHOLD", str(sizes.min() + 1))
+    assert sizes.min() < sizes.max()
+    assert list(partial._split_strata(df, memberships, plan)) == \
+        list(sufficient_statistics.select_strata_meeting_threshold(statistics)) == [sizes.idxmax()]
+
+    monkeypatch.setenv("SAMPLE_SIZE_THRESHOLD", str(sizes.max() + 1))
+    for split in (lambda: partial._split_strata(df, memberships, plan),
+                  lambda: sufficient_statistics.select_strata_meeting_threshold(statistics)):
+        with pytest.raises(PrivacyThresholdViolation):
+            split()
+
+
+@pytest.mark.parametrize("values", [[0], [21, 21], [3, 8], [0, 7, 8, 10, 11, 21], list(range(22)) * 3 + [5]],
+                         ids=["single", "tied", "pair", "band_edges", "uniform"])
+@pytest.mark.parametrize("probability", [0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0])
+def test_histogram_quantile_matches_numpy(values, probability):
+    histogram = np.bincount(values, minlength=HISTOGRAM_BOUND + 1)
+    assert sufficient_statistics.compute_histogram_quantile(histogram, probability) == \
+        pytest.approx(np.quantile(values, probability), abs=1e-12)
+
+
+def test_histogram_quantile_of_random_scores(scores):
+    present = scores["anxiety"].dropna().astype(int).to_numpy()
+    histogram = np.bincount(present, minlength=HISTOGRAM_BOUND + 1)
+    for probability in np.linspace(0, 1, 41):
+        assert sufficient_statistics.compute_histogram_quantile(histogram, probability) == \
+            pytest.approx(np.quantile(present, probability), abs=1e-12)
+
+
+def test_empty_histogram_has_no_quantiles():
+    assert sufficient_statistics.compute_histogram_quantile([0] * (HISTOGRAM_BOUND + 1), 0.5) is None
+    assert sufficient_statistics.compute_histogram_quantile([], 0.5) is None
+
+    summary = sufficient_statistics.summarise_histogram([0] * (HISTOGRAM_BOUND + 1))
+    assert summary["median"] is None and summary["iqr"] is None
+    assert set(summary["bands"].values()) == {0}
+
+
+def test_severity_bands_count_their_edges():
+    # A single score at either edge of a band is counted in that band alone
+    severity_bands = scoring.HADS_SEVERITY_BANDS
+    for band, (lower, upper) in severity_bands.items():
+        for score in (lower, upper):
+            histogram = np.bincount([score], minlength=HISTOGRAM_BOUND + 1)
+            assert sufficient_statistics.summarise_histogram(histogram)["bands"] == \
+                {other: int(other == band) for other in severity_bands}
+
+    # The bands partition the scores, so that every score is counted exactly once
+    histogram = np.arange(1, HISTOGRAM_BOUND + 2)
+    summary = sufficient_statistics.summarise_histogram(histogram)
+    assert summary["bands"] == {"normal": sum(range(1, 9)), "borderline": 9 + 10 + 11,
+                                "abnormal": sum(range(12, HISTOGRAM_BOUND + 2))}
+    assert sum(summary["bands"].values()) == histogram.sum()
+
+    values = np.repeat(np.arange(HISTOGRAM_BOUND + 1), histogram)
+    assert (summary["q1"], summary["median"], summary["q3"]) == tuple(np.quantile(values, [0.25, 0.5, 0.75]))
+    assert summary["iqr"] == summary["q3"] - summary["q1"]
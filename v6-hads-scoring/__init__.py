@@ -1,2 +1,64 @@
-from .central import *
-from .partial import *
+import sys
+
+from importlib import import_module
+from types import ModuleType
+from typing import Any, List
+
+# Module of each method that the node can dispatch; a module, and therewith its dependencies, is only imported once
+# one of its methods is dispatched, so that e.g. the central does not load the data sources and parallel scoring
+METHOD_MODULES = {
+    "central": "central",
+    "central_multi_instrument": "central",
+    "partial_hads_general_statistics": "partial",
+    "partial_hads_aggregate_adjusted_deviation": "partial",
+    "partial_hads_sufficient_statistics": "partial",
+    "partial_hads_chunked_sufficient_statistics": "partial",
+    "partial_multi_instrument_sufficient_statistics": "partial",
+    "partial_hads_dataset_version": "result_store",
+}
+
+__all__ = list(METHOD_MODULES)
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Resolve a method of the algorithm by importing its module on first access.
+
+    Args:
+        name (str): The name of the method.
+
+    Returns:
+        Any: The method.
+
+    Raises:
+        AttributeError: If the algorithm has no method of that name.
+    """
+    if name not in METHOD_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    method = getattr(import_module(f".{METHOD_MODULES[name]}", __name__), name)
+
+    # Cache the method so that subsequent access does not pass through this function
+    globals()[name] = method
+    return method
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(METHOD_MODULES))
+
+
+class _AlgorithmModule(ModuleType):
+    """
+    The package of the algorithm, of which the methods are not shadowed by the submodules that share their name.
+
+    Importing a submodule binds it to the package, which would e.g. make `central` resolve to the central module
+    rather than to the central method once that module is imported.
+    """
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in METHOD_MODULES and isinstance(value, ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _AlgorithmModule
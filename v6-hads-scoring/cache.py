@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from typing import Any, Dict, Optional, Tuple
+
+# General federated algorithm functions
+from vantage6_strongaya_general.miscellaneous import safe_log
+
+# HADS scoring algorithm stratification
+from .stratification import StrataDetails
+
+# HADS scoring algorithm functions
+from vantage6_strongaya_instruments_licenced.proms.hads_scoring import ItemsToScoreInput
+
+CACHE_DIRECTORY_NAME = "v6-hads-scoring-cache"
+CACHE_DATA_FILE = "data.parquet"
+CACHE_MEMBERSHIPS_FILE = "memberships.parquet"
+CACHE_VARIABLE_DETAILS_FILE = "variable_details.json"
+CACHE_TEMPORARY_SUFFIX = ".tmp"
+DEFAULT_CACHE_TTL = 3600
+DEFAULT_CACHE_MAX_ENTRIES = 8
+
+
+def _collect_cache_directory() -> str:
+    """
+    Collect the directory in which prepared data is cached.
+
+    The vantage6 node mounts a temporary folder that is shared by the (sub)tasks of the same job,
+    which makes it available to both rounds of the algorithm; otherwise the system's temporary directory is used.
+
+    Returns:
+        str: The path of the cache directory.
+    """
+    directory = os.path.join(os.environ.get("TEMPORARY_FOLDER", tempfile.gettempdir()), CACHE_DIRECTORY_NAME)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def fingerprint_data(df: pd.DataFrame) -> str:
+    """
+    Compute a content-based fingerprint of a DataFrame.
+
+    Data that refers to an external source, such as the 'endpoint' of RDF data, is to be fingerprinted after it was
+    retrieved, as the reference alone does not change along with the data it refers to.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to fingerprint.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest of the column names and row hashes.
+    """
+    digest = hashlib.sha256(json.dumps([str(column) for column in df.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def compose_cache_key(df: pd.DataFrame, items_to_score: ItemsToScoreInput,
+                      variables_to_stratify: StrataDetails = None, **options: Any) -> str:
+    """
+    Compose the content-addressed cache key of the prepared data.
+
+    Args:
+        df (pd.DataFrame): The DataFrame that is prepared; retrieved from its source if it refers to external data.
+        items_to_score (ItemsToScoreInput): Dictionary of modules to score and their respective domains and information
+                                           specifying where the necessary responses can be found in the data.
+        variables_to_stratify (StratificationDetails|list, optional): Dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
+        **options: Any further options that affect the preparation of the data, such as the scoring backend.
+
+    Returns:
+        str: The cache key.
+    """
+    key = {"fingerprint": fingerprint_data(df),
+           "items_to_score": items_to_score,
+           "variables_to_stratify": variables_to_stratify,
+           "options": options}
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _evict_cache_entries(directory: str) -> None:
+    """
+    Evict expired cache entries, and the least recently used ones if the cache holds too many entries.
+
+    Each entry is a directory of the scored data and stratum memberships in parquet and the variable details in JSON;
+    entries that are still being written are left to their writer.
+
+    The time-to-live (in seconds) and the maximum number of entries can be set through the
+    'HADS_CACHE_TTL' and 'HADS_CACHE_MAX_ENTRIES' environment variables.
+
+    Args:
+        directory (str): The path of the cache directory.
+    """
+    ttl = int(os.environ.get("HADS_CACHE_TTL", DEFAULT_CACHE_TTL))
+    max_entries = int(os.environ.get("HADS_CACHE_MAX_ENTRIES", DEFAULT_CACHE_MAX_ENTRIES))
+    now = time.time()
+
+    entries = []
+    for entry_name in os.listdir(directory):
+        path = os.path.join(directory, entry_name)
+        if entry_name.endswith(CACHE_TEMPORARY_SUFFIX) or not os.path.isdir(path):
+            continue
+
+        status = os.stat(path)
+
+        # The modification time marks when the entry was stored, the access time when it was last used
+        if now - status.st_mtime > ttl:
+            shutil.rmtree(path, ignore_errors=True)
+            continue
+        entries.append((status.st_atime, path))
+
+    for _, path in sorted(entries)[:max(len(entries) - max_entries, 0)]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def load_cached_data(key: str) -> Optional[Tuple[pd.DataFrame, Dict[str, Any], pd.DataFrame]]:
+    """
+    Load the prepared data from the cache.
+
+    Args:
+        key (str): The cache key.
+
+    Returns:
+        tuple|None: The scored DataFrame, the variable details of the scores and the stratum memberships,
+                    or None if not (or no longer) cached.
+    """
+    directory = _collect_cache_directory()
+    _evict_cache_entries(directory)
+
+    path = os.path.join(directory, key)
+    if not os.path.isdir(path):
+        return None
+
+    try:
+        df = pd.read_parquet(os.path.join(path, CACHE_DATA_FILE))
+        memberships = pd.read_parquet(os.path.join(path, CACHE_MEMBERSHIPS_FILE))
+        with open(os.path.join(path, CACHE_VARIABLE_DETAILS_FILE)) as file:
+            variable_details = json.load(file)
+    except Exception:
+        safe_log("warning", "Cached prepared data could not be read; the data will be prepared anew.")
+        return None
+
+    # Mark the entry as recently used without altering its time of storage
+    os.utime(path, (time.time(), os.stat(path).st_mtime))
+
+    safe_log("info", "Prepared data was loaded from the node cache.")
+    return df, variable_details, memberships
+
+
+def store_cached_data(key: str, df: pd.DataFrame, variable_details: Dict[str, Any],
+                      memberships: pd.DataFrame) -> None:
+    """
+    Store the prepared data in the cache.
+
+    Args:
+        key (str): The cache key.
+        df (pd.DataFrame): The scored DataFrame.
+        variable_details (dict): The variable details of the scores.
+        memberships (pd.DataFrame): The stratum memberships of the rows of the scored DataFrame.
+    """
+    directory = _collect_cache_directory()
+    path = os.path.join(directory, key)
+
+    # Write to a temporary directory first so that a concurrent reader never encounters a partial entry
+    temporary_path = f"{path}.{os.getpid()}{CACHE_TEMPORARY_SUFFIX}"
+    os.makedirs(temporary_path, exist_ok=True)
+    try:
+        df.to_parquet(os.path.join(temporary_path, CACHE_DATA_FILE))
+        memberships.to_parquet(os.path.join(temporary_path, CACHE_MEMBERSHIPS_FILE))
+        with open(os.path.join(temporary_path, CACHE_VARIABLE_DETAILS_FILE), "w") as file:
+            json.dump(variable_details, file)
+
+        # An entry of the same key holds the same data, hence one that was stored concurrently is kept
+        os.replace(temporary_path, path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+    finally:
+        shutil.rmtree(temporary_path, ignore_errors=True)
+
+    _evict_cache_entries(directory)
@@ -1,22 +1,39 @@
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Tuple
 
 from vantage6.algorithm.tools.decorators import algorithm_client
 from vantage6.algorithm.tools.exceptions import UserInputError
 from vantage6.algorithm.client import AlgorithmClient
 
 # General federated algorithm functions
-from vantage6_strongaya_general.miscellaneous import collect_organisation_ids, safe_log, StratificationDetails
+from vantage6_strongaya_general.miscellaneous import collect_organisation_ids, safe_log
 from vantage6_strongaya_general.general_statistics import compute_aggregate_general_statistics, \
     compute_aggregate_adjusted_deviation
 
 # HADS scoring algorithm functions
 from vantage6_strongaya_instruments_licenced.proms.hads_scoring import check_input_structure, ItemsToScoreInput
 
+# HADS scoring algorithm result collection, differential privacy, result encoding, instruments, result store,
+# sufficient statistics, scoring backends and stratification
+from .collection import collect_results, summarise_collection
+from .differential_privacy import check_privacy_input, DEFAULT_EPSILON
+from .encoding import check_result_encoding, decode_result
+from .instruments import collect_instruments, InstrumentsInput
+from .result_store import collect_result_store_directory, compose_input_hash, load_stored_result, store_result
+from .sufficient_statistics import finalise_aggregate_sufficient_statistics, merge_partial_results
+from .scoring import compile_scoring_plan, SCORING_BACKENDS
+from .stratification import collect_result_strata, collect_strata, collect_stratum_results, StrataDetails
+
 
 @algorithm_client
 def central(client: AlgorithmClient, items_to_score: ItemsToScoreInput,
-            variables_to_stratify: StratificationDetails = None,
-            organisation_ids: List[int] = None) -> Dict[str, Any]:
+            variables_to_stratify: StrataDetails = None,
+            organisation_ids: List[int] = None, single_round: bool = False,
+            use_node_cache: bool = False, scoring_backend: str = "default",
+            chunk_size: int = None, concurrent_pages: int = None,
+            node_timeout: float = None, quorum: int = None, profile: bool = False,
+            use_result_store: bool = False, epsilon: float = DEFAULT_EPSILON,
+            privacy_mechanism: str = "input", workers: int = None,
+            result_encoding: str = "json", incremental: bool = False) -> Dict[str, Any]:
     """
     Central function to aggregate HADS scoring results from multiple organisations.
 
@@ -46,7 +63,10 @@ def central(client: AlgorithmClient, items_to_score: ItemsToScoreInput,
                                                    }
 
                                 }
-        variables_to_stratify (StratificationDetails, optional): Dictionary of variables to stratify. Defaults to None.
+        variables_to_stratify (StratificationDetails|list, optional): Dictionary of variables to stratify,
+                                                                      or a list thereof to compute the statistics of
+                                                                      several strata in a single run.
+                                                                      Defaults to None.
                                                                 Example:
                                                                     {'Age':
                                                                             {
@@ -56,24 +76,115 @@ def central(client: AlgorithmClient, items_to_score: ItemsToScoreInput,
                                                                     }
         organisation_ids (list[int], optional): List of organisation IDs to include.
                                                 Defaults to None - therewith include all organisations.
+        single_round (bool, optional): Whether to compute the statistics in a single round using mergeable sufficient
+                                       statistics, rather than in two rounds; this is the only option that changes
+                                       the structure of the results. Defaults to False.
+        use_node_cache (bool, optional): Whether the nodes should cache their prepared data in the first round and
+                                         reuse it in the second, rather than preparing it twice. Defaults to False.
+        scoring_backend (str, optional): The scoring engine the nodes should use; 'default' for the scoring tables of
+                                         the instrument or 'numpy' for the vectorised engine. Defaults to 'default'.
+        chunk_size (int, optional): If specified, the nodes read and score their (csv or parquet) data in batches of
+                                    this number of rows, which requires single_round. Nodes with a SPARQL
+                                    database retrieve its query results in pages of this size. Defaults to None.
+        concurrent_pages (int, optional): The number of SPARQL pages the nodes fetch concurrently in chunked execution.
+                                          Defaults to None - therewith using the default of the nodes.
+        node_timeout (float, optional): The number of seconds each organisation is given to report the result of a
+                                        subtask, counted from when its node picked up its run; organisations that
+                                        do not report in time, or of which the node does not pick up its run within
+                                        as many seconds, are excluded.
+                                        Defaults to None - therewith waiting for all organisations.
+        quorum (int, optional): The minimal number of organisations that should report the result of a subtask.
+                                Defaults to None - therewith waiting for all organisations if no node timeout is set,
+                                and requiring at least one organisation otherwise.
+        profile (bool, optional): Whether the nodes should record the wall time, CPU time and peak memory of each
+                                  stage of their pipeline; these are returned per subtask and organisation
+                                  under 'performance'. Defaults to False.
+        use_result_store (bool, optional): Whether to reuse the stored results of organisations whose dataset did not
+                                           change since an identical earlier analysis, and only compute those of the
+                                           other organisations anew; requires single_round. Defaults to False.
+        epsilon (float, optional): The privacy budget that each node spends on its dataset; repeated rounds of the
+                                   same analysis reproduce the same noise and do not spend it again. Defaults to 1.
+        privacy_mechanism (str, optional): 'input' for the nodes to apply differential privacy to their data, or
+                                           'output' to perturb their sufficient statistics instead, which requires
+                                           single_round. Defaults to 'input'.
+        workers (int, optional): The number of processes with which each node scores its data in parallel;
+                                 requires single_round and is unused if the data is read in batches.
+                                 Defaults to None - therewith using the 'HADS_WORKERS' environment variable of each
+                                 node, or a single process if it is not set.
+        result_encoding (str, optional): 'json' for the nodes to return their sufficient statistics as they are, or
+                                         'arrow' to return them as a compact Arrow IPC stream, which requires
+                                         single_round. Defaults to 'json'.
+        incremental (bool, optional): Whether the nodes should only score the rows that were appended to their
+                                      database since their previous incremental analysis with the same arguments, and
+                                      merge these with their stored sufficient statistics; requires single_round and
+                                      implies reading the data in batches. Nodes without a persistent
+                                      'HADS_INCREMENTAL_STORE' score all of their rows. Defaults to False.
 
     Returns:
         dict|None: A dictionary containing the aggregated HADS scoring results.
+                   In two rounds, these are the general statistics including the aggregate-adjusted deviation;
+                   keyed by stratum label under 'strata' if a list of strata was requested.
+                   In a single round, these are the general statistics keyed by stratum label, or 'overall' if no
+                   strata were requested, under 'numerical_general_statistics'.
+                   If a node timeout or quorum is set, the included and excluded organisations are listed under
+                   'organisations'.
+                   If the result store is used, the reused and recomputed organisations are listed under
+                   'result_store'.
     """
     # Check if the users' input structure is correct
     if not check_input_structure(items_to_score):
         raise UserInputError("Algorithm input is incorrect. Please check the algorithm input.")
 
+    # Check once whether the requested scales resolve against the scoring tables by compiling their scoring plan;
+    # the nodes compile their own plan, so that their scoring tables remain authoritative
+    try:
+        compile_scoring_plan(items_to_score)
+    except KeyError as error:
+        raise UserInputError(f"Algorithm input refers to {error}, which is not in the scoring tables. "
+                             f"Please check the algorithm input.")
+
+    # Check if the stratification definitions are structured correctly
+    collect_strata(variables_to_stratify)
+
+    # Check if the differential privacy settings and result encoding are valid
+    check_privacy_input(epsilon, privacy_mechanism)
+    check_result_encoding(result_encoding)
+
+    if scoring_backend not in SCORING_BACKENDS:
+        raise UserInputError(f"Scoring backend '{scoring_backend}' is not supported, "
+                             f"please use one of {', '.join(SCORING_BACKENDS)}.")
+
     # Collect all organisations that participate in this collaboration unless specified
     organisation_ids = collect_organisation_ids(organisation_ids, client)
 
+    # Only the single round computes mergeable sufficient statistics, on which chunked execution, reuse of stored
+    # results, output perturbation, parallel scoring, compact result encoding and incremental analyses rely;
+    # these are rejected rather than silently changing the structure of the results of two rounds
+    single_round_options = {"chunk_size": chunk_size, "use_result_store": use_result_store,
+                            "privacy_mechanism": privacy_mechanism == "output", "workers": workers,
+                            "result_encoding": result_encoding != "json", "incremental": incremental}
+    requested_options = [option for option, requested in single_round_options.items() if requested]
+    if requested_options and not single_round:
+        raise UserInputError(f"The option(s) {', '.join(requested_options)} require single_round to be set, "
+                             f"as these are only supported when computing the statistics in a single round.")
+
+    # Compute the statistics in one node round-trip if requested
+    if single_round:
+        return _central_single_round(client, items_to_score, variables_to_stratify, organisation_ids, scoring_backend,
+                                     chunk_size, concurrent_pages, node_timeout, quorum, profile, use_result_store,
+                                     epsilon, privacy_mechanism, workers, result_encoding, incremental)
+
     # Create the subtask for general statistics
     safe_log("info", "Creating subtask to calculate HADS scores and their general statistics.")
 
     input_ = {"method": "partial_hads_general_statistics",
               "kwargs": {
                   "items_to_score": items_to_score,
-                  "variables_to_stratify": variables_to_stratify}
+                  "variables_to_stratify": variables_to_stratify,
+                  "use_cache": use_node_cache,
+                  "scoring_backend": scoring_backend,
+                  "profile": profile,
+                  "epsilon": epsilon}
               }
 
     task_general_statistics = client.task.create(input_, organisation_ids,
@@ -81,35 +192,394 @@ def central(client: AlgorithmClient, items_to_score: ItemsToScoreInput,
                                                  "This subtask determines the general statistics of HADS scores.")
 
     # Wait for the node(s) to return the results of the subtask
-    safe_log("info", f"Waiting for results of task {task_general_statistics.get('id')}")
-    results_general_statistics = client.wait_for_results(task_general_statistics.get("id"))
-    safe_log("info", f"Results of task {task_general_statistics.get('id')} obtained")
+    results_general_statistics, excluded_organisation_ids, performance_general_statistics = \
+        _wait_for_subtask(client, task_general_statistics, node_timeout, quorum, profile=profile)
 
-    # Aggregate the general statistics
-    results_general_statistics = compute_aggregate_general_statistics(results_general_statistics)
+    # Aggregate the general statistics; per stratum if several strata were requested
+    if not isinstance(variables_to_stratify, list):
+        results_general_statistics = compute_aggregate_general_statistics(results_general_statistics)
+        numerical_aggregated_results = results_general_statistics["numerical_general_statistics"]
+    else:
+        results_general_statistics = {
+            stratum: compute_aggregate_general_statistics(collect_stratum_results(results_general_statistics, stratum))
+            for stratum in collect_result_strata(results_general_statistics)}
+        numerical_aggregated_results = {stratum: results["numerical_general_statistics"]
+                                        for stratum, results in results_general_statistics.items()}
 
     # Create a subtask to calculate aggregate-adjusted deviation; using the aggregated numerical general statistics
     safe_log("info", "Creating subtask to calculate aggregate-adjusted deviation using general statistics.")
 
     input_ = {"method": "partial_hads_aggregate_adjusted_deviation",
               "kwargs": {
-                  "numerical_aggregated_results": results_general_statistics["numerical_general_statistics"],
+                  "numerical_aggregated_results": numerical_aggregated_results,
                   "items_to_score": items_to_score,
-                  "variables_to_stratify": variables_to_stratify}
+                  "variables_to_stratify": variables_to_stratify,
+                  "use_cache": use_node_cache,
+                  "scoring_backend": scoring_backend,
+                  "profile": profile,
+                  "epsilon": epsilon}
               }
 
-    task_adjusted_deviation = client.task.create(input_, organisation_ids,
+    # Only involve the organisations that contributed to the general statistics
+    task_adjusted_deviation = client.task.create(input_, [organisation_id for organisation_id in organisation_ids
+                                                          if organisation_id not in excluded_organisation_ids],
                                                  "HADS Scoring - Aggregate Adjusted Deviation",
                                                  "This subtask determines the aggregate-adjusted deviation of "
                                                  "HADS scores.")
 
     # Wait for the node(s) to return the results of the subtask
-    safe_log("info", f"Waiting for results of task {task_adjusted_deviation.get('id')}")
-    results_deviation = client.wait_for_results(task_adjusted_deviation.get("id"))
-    safe_log("info", f"Results of task {task_adjusted_deviation.get('id')} obtained")
+    results_deviation, excluded_deviation, performance_deviation = _wait_for_subtask(client, task_adjusted_deviation,
+                                                                                     node_timeout, quorum,
+                                                                                     profile=profile)
+    excluded_organisation_ids = excluded_organisation_ids + excluded_deviation
 
     # Compute the aggregate of the aggregate-adjusted deviation and include it in the general statistics
-    results = compute_aggregate_adjusted_deviation(results_deviation, results_general_statistics)
+    if not isinstance(variables_to_stratify, list):
+        results = compute_aggregate_adjusted_deviation(results_deviation, results_general_statistics)
+    else:
+        results = {"strata": {
+            stratum: compute_aggregate_adjusted_deviation(collect_stratum_results(results_deviation, stratum),
+                                                          results_general_statistics[stratum])
+            for stratum in results_general_statistics}}
+
+    # Report which organisations contributed if organisations could be excluded
+    if node_timeout or quorum:
+        results["organisations"] = summarise_collection(organisation_ids, excluded_organisation_ids)
+
+    # Report the performance of each organisation if requested
+    if profile:
+        results["performance"] = {"general_statistics": performance_general_statistics,
+                                  "adjusted_deviation": performance_deviation}
+
+    # Return the final results of the algorithm
+    return results
+
+
+@algorithm_client
+def central_multi_instrument(client: AlgorithmClient, instruments: InstrumentsInput,
+                             variables_to_stratify: StrataDetails = None,
+                             organisation_ids: List[int] = None, scoring_backend: str = "default",
+                             node_timeout: float = None, quorum: int = None, profile: bool = False,
+                             epsilon: float = DEFAULT_EPSILON, privacy_mechanism: str = "input",
+                             result_encoding: str = "json") -> Dict[str, Any]:
+    """
+    Central function to aggregate the scoring results of several instruments, such as HADS alongside other PROMs,
+    from multiple organisations in a single node pass.
+
+    The nodes load and privatise the union of the variables of all instruments once, and score each instrument from
+    the shared data; the statistics are computed in a single round using mergeable sufficient statistics.
+
+    Args:
+        client (AlgorithmClient): The client to communicate with the vantage6 server.
+        instruments (InstrumentsInput): The specification of each instrument to score, by instrument name;
+                                        each in the structure of its own 'items_to_score'.
+                                        Example:
+                                            {'hads': {"items_to_score": {"scale_to_score": ["anxiety"],
+                                                                         "variable_info": {...}}},
+                                             'eortc_qlq_c30': {"items_to_score": {...}}}
+        variables_to_stratify (StratificationDetails|list, optional): Dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
+        organisation_ids (list[int], optional): List of organisation IDs to include.
+                                                Defaults to None - therewith include all organisations.
+        scoring_backend (str, optional): The scoring engine the nodes should use for HADS. Defaults to 'default'.
+        node_timeout (float, optional): The number of seconds each organisation is given to report, counted from when
+                                        its node picked up its run. Defaults to None.
+        quorum (int, optional): The minimal number of organisations that should report. Defaults to None.
+        profile (bool, optional): Whether the nodes should profile their pipeline. Defaults to False.
+        epsilon (float, optional): The privacy budget that each node spends on its dataset. Defaults to 1.
+        privacy_mechanism (str, optional): 'input' for the nodes to apply differential privacy to their data, or
+                                           'output' to perturb the sufficient statistics of each instrument instead,
+                                           dividing the budget evenly over the instruments. Defaults to 'input'.
+        result_encoding (str, optional): 'json' or 'arrow' encoding of the nodes' sufficient statistics.
+                                         Defaults to 'json'.
+
+    Returns:
+        dict: A dictionary containing the aggregated scoring results per instrument under 'instruments'.
+    """
+    # Check if the users' input structure is correct for each instrument
+    collect_instruments(instruments)
+
+    # Check if the stratification definitions are structured correctly
+    collect_strata(variables_to_stratify)
+
+    # Check if the differential privacy settings and result encoding are valid
+    check_privacy_input(epsilon, privacy_mechanism)
+    check_result_encoding(result_encoding)
+
+    if scoring_backend not in SCORING_BACKENDS:
+        raise UserInputError(f"Scoring backend '{scoring_backend}' is not supported, "
+                             f"please use one of {', '.join(SCORING_BACKENDS)}.")
+
+    # Collect all organisations that participate in this collaboration unless specified
+    organisation_ids = collect_organisation_ids(organisation_ids, client)
+
+    # Create the subtask for the sufficient statistics of all instruments
+    safe_log("info", "Creating subtask to calculate the scores of several instruments and their sufficient statistics.")
+
+    input_ = {"method": "partial_multi_instrument_sufficient_statistics",
+              "kwargs": {
+                  "instruments": instruments,
+                  "variables_to_stratify": variables_to_stratify,
+                  "scoring_backend": scoring_backend,
+                  "profile": profile,
+                  "epsilon": epsilon,
+                  "privacy_mechanism": privacy_mechanism}
+              }
+
+    # Let the nodes encode their sufficient statistics compactly if requested; the central decodes them transparently
+    if result_encoding != "json":
+        input_["kwargs"]["result_encoding"] = result_encoding
+
+    task_sufficient_statistics = client.task.create(input_, organisation_ids,
+                                                    "Instrument Scoring - Sufficient Statistics",
+                                                    "This subtask determines the sufficient statistics of the scores "
+                                                    "of several instruments.")
+
+    # Collect the sufficient statistics of each instrument per organisation, to be merged once all have reported
+    instrument_results = {}
+
+    def collect_result(organisation_id: int, result: Dict[str, Any]) -> None:
+        for instrument, instrument_result in (result or {}).get("instruments", {}).items():
+            instrument_results.setdefault(instrument, []).append(instrument_result)
+
+    _, excluded_organisation_ids, performance = _wait_for_subtask(client, task_sufficient_statistics, node_timeout,
+                                                                  quorum, collect_result, profile)
+
+    # Merge the sufficient statistics of each instrument and derive the general statistics thereof
+    results = {"instruments": {instrument: finalise_aggregate_sufficient_statistics(merge_partial_results(
+        instrument_result)) for instrument, instrument_result in instrument_results.items()}}
+
+    # Report which organisations contributed if organisations could be excluded
+    if node_timeout or quorum:
+        results["organisations"] = summarise_collection(organisation_ids, excluded_organisation_ids)
+
+    # Report the performance of each organisation if requested
+    if profile:
+        results["performance"] = {"sufficient_statistics": performance}
 
     # Return the final results of the algorithm
     return results
+
+
+def _wait_for_subtask(client: AlgorithmClient, task: Dict[str, Any], node_timeout: float = None, quorum: int = None,
+                      on_result: Callable[[int, Any], None] = None,
+                      profile: bool = False, attribute: bool = False) -> Tuple[List[Any], List[int], Dict[int, Any]]:
+    """
+    Wait for the node(s) to return the results of a subtask.
+
+    If a node timeout or quorum is set, if the nodes profile their pipeline, or if the results are to be attributed
+    to their organisations, the results are collected as the
+    organisations report them, and organisations that fail or do not report in time are excluded;
+    otherwise all organisations are waited for.
+
+    Args:
+        client (AlgorithmClient): The client to communicate with the vantage6 server.
+        task (dict): The subtask as returned upon its creation.
+        node_timeout (float, optional): The number of seconds each organisation is given to report, counted from when
+                                        its node picked up its run. Defaults to None.
+        quorum (int, optional): The minimal number of organisations that should report. Defaults to None.
+        on_result (callable, optional): Function that is called with the organisation ID (if known) and the result
+                                        of each organisation. Defaults to None.
+        profile (bool, optional): Whether the nodes return the performance metrics of their pipeline.
+                                  Defaults to False.
+        attribute (bool, optional): Whether `on_result` requires the organisation ID of each result.
+                                    Defaults to False.
+
+    Returns:
+        tuple: The results of the subtask, the IDs of the excluded organisations,
+               and the performance metrics per organisation ID (if profiled).
+    """
+    safe_log("info", f"Waiting for results of task {task.get('id')}")
+
+    # Decode the sufficient statistics of the results, however these are collected, and separate the performance
+    # metrics from the results before these are aggregated
+    results, performance = [], {}
+
+    def handle_result(organisation_id: int, result: Any) -> None:
+        result = decode_result(result)
+        results.append(result)
+        if isinstance(result, dict) and "performance" in result:
+            performance[organisation_id] = result.pop("performance")
+            safe_log("info", f"Organisation {organisation_id} completed task {task.get('id')} in "
+                             f"{performance[organisation_id]['wall_time']:.3f} s.")
+        if on_result:
+            on_result(organisation_id, result)
+
+    if node_timeout or quorum or profile or attribute:
+        _, excluded_organisation_ids = collect_results(client, task.get("id"), node_timeout, quorum, handle_result)
+    else:
+        excluded_organisation_ids = []
+        for result in client.wait_for_results(task.get("id")):
+            handle_result(None, result)
+
+    safe_log("info", f"Results of task {task.get('id')} obtained")
+    return results, excluded_organisation_ids, performance
+
+
+def _central_single_round(client: AlgorithmClient, items_to_score: ItemsToScoreInput,
+                          variables_to_stratify: StrataDetails,
+                          organisation_ids: List[int], scoring_backend: str = "default",
+                          chunk_size: int = None, concurrent_pages: int = None,
+                          node_timeout: float = None, quorum: int = None,
+                          profile: bool = False, use_result_store: bool = False, epsilon: float = DEFAULT_EPSILON,
+                          privacy_mechanism: str = "input", workers: int = None,
+                          result_encoding: str = "json", incremental: bool = False) -> Dict[str, Any]:
+    """
+    Aggregate HADS scoring results from multiple organisations using a single round of mergeable sufficient statistics.
+
+    If the result store is used, the stored sufficient statistics of organisations whose dataset did not change are
+    merged with those that are computed anew for the other organisations, so that the aggregate covers all of them.
+
+    Args:
+        client (AlgorithmClient): The client to communicate with the vantage6 server.
+        items_to_score (ItemsToScoreInput): Dictionary of scales and information specifying where the necessary responses
+                               can be found in the data.
+        variables_to_stratify (StratificationDetails|list): Dictionary of variables to stratify, or a list thereof.
+        organisation_ids (list[int]): List of organisation IDs to include.
+        scoring_backend (str, optional): The scoring engine the nodes should use. Defaults to 'default'.
+        chunk_size (int, optional): The number of rows per batch if the nodes should read their data in batches.
+                                    Defaults to None.
+        concurrent_pages (int, optional): The number of SPARQL pages to fetch concurrently. Defaults to None.
+        node_timeout (float, optional): The number of seconds each organisation is given to report, counted from when
+                                        its node picked up its run. Defaults to None.
+        quorum (int, optional): The minimal number of organisations that should report. Defaults to None.
+        profile (bool, optional): Whether the nodes should profile their pipeline. Defaults to False.
+        use_result_store (bool, optional): Whether to reuse stored results of unchanged datasets. Defaults to False.
+        epsilon (float, optional): The privacy budget that each node spends on its dataset. Defaults to 1.
+        privacy_mechanism (str, optional): 'input' or 'output' perturbation. Defaults to 'input'.
+        workers (int, optional): The number of processes with which the nodes score their data. Defaults to None.
+        result_encoding (str, optional): 'json' or 'arrow' encoding of the nodes' sufficient statistics.
+                                         Defaults to 'json'.
+        incremental (bool, optional): Whether the nodes should only score the rows appended since their previous
+                                      incremental analysis. Defaults to False.
+
+    Returns:
+        dict: A dictionary containing the aggregated HADS scoring results.
+    """
+
+    input_ = {"method": "partial_hads_sufficient_statistics",
+              "kwargs": {
+                  "items_to_score": items_to_score,
+                  "variables_to_stratify": variables_to_stratify,
+                  "scoring_backend": scoring_backend,
+                  "profile": profile,
+                  "epsilon": epsilon,
+                  "privacy_mechanism": privacy_mechanism}
+              }
+
+    # Let the nodes score their data in parallel if requested; the number of workers does not affect the statistics
+    if workers and not (chunk_size or incremental):
+        input_["kwargs"]["workers"] = workers
+
+    # Let the nodes encode their sufficient statistics compactly if requested; the central decodes them transparently
+    if result_encoding != "json":
+        input_["kwargs"]["result_encoding"] = result_encoding
+
+    # Let the nodes read their data in batches if requested, as they do to only score the rows of an incremental
+    # analysis that were appended since its previous run
+    if chunk_size or incremental:
+        input_["method"] = "partial_hads_chunked_sufficient_statistics"
+        if chunk_size:
+            input_["kwargs"]["chunk_size"] = chunk_size
+        if concurrent_pages:
+            input_["kwargs"]["concurrent_pages"] = concurrent_pages
+        if incremental:
+            input_["kwargs"]["incremental"] = incremental
+
+    # Collect the sufficient statistics of each organisation, to be merged once all have reported
+    partial_results = []
+    organisations_to_compute = organisation_ids
+    result_store_directory = collect_result_store_directory() if use_result_store else None
+    if result_store_directory:
+        # Stored results only apply to the same method and arguments; profiling, parallel scoring, the result
+        # encoding and incremental analyses do not affect the statistics
+        input_hash = compose_input_hash({"method": input_["method"],
+                                         "kwargs": {key: value for key, value in input_["kwargs"].items()
+                                                    if key not in ("profile", "workers", "result_encoding",
+                                                                   "incremental")}})
+        dataset_versions = _collect_dataset_versions(client, organisation_ids, node_timeout)
+
+        # Collect the stored results of the organisations whose dataset did not change
+        organisations_to_compute = []
+        for organisation_id in organisation_ids:
+            stored_result = load_stored_result(result_store_directory, organisation_id,
+                                               dataset_versions.get(organisation_id), input_hash)
+            if stored_result is None:
+                organisations_to_compute.append(organisation_id)
+            else:
+                partial_results.append(stored_result)
+
+        safe_log("info", f"Reusing the stored results of {len(organisation_ids) - len(organisations_to_compute)} "
+                         f"organisation(s); computing those of {len(organisations_to_compute)} organisation(s) anew.")
+
+    def collect_result(organisation_id: int, result: Dict[str, Any]) -> None:
+        partial_results.append(result)
+        if result_store_directory:
+            store_result(result_store_directory, organisation_id, dataset_versions.get(organisation_id), input_hash,
+                         result)
+
+    excluded_organisation_ids, performance = [], {}
+    if organisations_to_compute:
+        # Create the subtask for sufficient statistics
+        safe_log("info", "Creating subtask to calculate HADS scores and their sufficient statistics.")
+
+        task_sufficient_statistics = client.task.create(input_, organisations_to_compute,
+                                                        "HADS Scoring - Sufficient Statistics",
+                                                        "This subtask determines the sufficient statistics of "
+                                                        "HADS scores.")
+
+        _, excluded_organisation_ids, performance = _wait_for_subtask(client, task_sufficient_statistics,
+                                                                      node_timeout, quorum, collect_result, profile,
+                                                                      attribute=bool(result_store_directory))
+
+    # Merge the sufficient statistics of all organisations and derive the general statistics thereof
+    results = finalise_aggregate_sufficient_statistics(merge_partial_results(partial_results))
+
+    # Report which organisations contributed if organisations could be excluded
+    if node_timeout or quorum:
+        results["organisations"] = summarise_collection(organisation_ids, excluded_organisation_ids)
+
+    # Report which organisations' results were reused from the result store
+    if result_store_directory:
+        results["result_store"] = {
+            "reused_organisation_ids": [organisation_id for organisation_id in organisation_ids
+                                        if organisation_id not in organisations_to_compute],
+            "recomputed_organisation_ids": [organisation_id for organisation_id in organisations_to_compute
+                                            if organisation_id not in excluded_organisation_ids]}
+
+    # Report the performance of each organisation if requested
+    if profile:
+        results["performance"] = {"sufficient_statistics": performance}
+
+    # Return the final results of the algorithm
+    return results
+
+
+def _collect_dataset_versions(client: AlgorithmClient, organisation_ids: List[int],
+                              node_timeout: float = None) -> Dict[int, Any]:
+    """
+    Collect the version of the dataset of each organisation, so that stale stored results can be recognised.
+
+    Args:
+        client (AlgorithmClient): The client to communicate with the vantage6 server.
+        organisation_ids (list[int]): List of organisation IDs to include.
+        node_timeout (float, optional): The number of seconds each organisation is given to report, counted from when
+                                        its node picked up its run. Defaults to None.
+
+    Returns:
+        dict: The version of the dataset per organisation ID; None if it is unknown.
+    """
+    safe_log("info", "Creating subtask to determine the versions of the datasets.")
+
+    task_dataset_version = client.task.create({"method": "partial_hads_dataset_version", "kwargs": {}},
+                                              organisation_ids, "HADS Scoring - Dataset Version",
+                                              "This subtask determines the versions of the datasets.")
+
+    # Organisations that do not report their version are computed anew, and excluded there if they fail again
+    dataset_versions = {}
+
+    def collect_version(organisation_id: int, result: Dict[str, Any]) -> None:
+        dataset_versions[organisation_id] = (result or {}).get("dataset_version")
+
+    collect_results(client, task_dataset_version.get("id"), node_timeout, on_result=collect_version)
+    return dataset_versions
@@ -0,0 +1,115 @@
+import time
+
+from typing import Any, Callable, Dict, List, Tuple
+from vantage6.algorithm.client import AlgorithmClient
+from vantage6.algorithm.tools.exceptions import AlgorithmError
+
+# General federated algorithm functions
+from vantage6_strongaya_general.miscellaneous import safe_log
+
+COMPLETED_STATUS = "completed"
+PENDING_STATUS = "pending"
+RUNNING_STATUSES = (PENDING_STATUS, "initializing", "active")
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+def collect_results(client: AlgorithmClient, task_id: int, node_timeout: float = None, quorum: int = None,
+                    on_result: Callable[[int, Any], None] = None,
+                    interval: float = DEFAULT_POLL_INTERVAL) -> Tuple[List[Any], List[int]]:
+    """
+    Collect the results of a subtask as the organisations report them, rather than waiting for all of them.
+
+    The status of the runs of all organisations is polled at once, and the result of each run that completed is
+    retrieved through the result client, which deserialises it, and handed to `on_result` with the ID of its
+    organisation. Organisations that fail are excluded, as are organisations that did not finish within `node_timeout`
+    seconds of picking up their run; the time a node takes to process its run is thereby bounded regardless of when
+    other nodes picked up theirs. Nodes that did not pick up their run within `node_timeout` seconds of the start of
+    the collection, such as nodes that are offline, are excluded as well.
+
+    Args:
+        client (AlgorithmClient): The client to communicate with the vantage6 server.
+        task_id (int): The ID of the subtask.
+        node_timeout (float, optional): The number of seconds each organisation is given to report its result,
+                                        counted from when its node picked up its run.
+                                        Defaults to None - therewith waiting until every organisation has finished.
+        quorum (int, optional): The minimal number of organisations that should report a result.
+                                Defaults to None - therewith requiring at least one.
+        on_result (callable, optional): Function that is called with the organisation ID and result of each
+                                        organisation that reports. Defaults to None.
+        interval (float, optional): The number of seconds between polls. Defaults to 1.
+
+    Returns:
+        tuple: The results in order of reporting, and the IDs of the excluded organisations.
+
+    Raises:
+        AlgorithmError: If fewer organisations than the quorum reported a result.
+    """
+    quorum = quorum or 1
+
+    # The deadline of each run is counted from when it was observed to be picked up, or from the start of the
+    # collection whilst it is pending
+    start = time.monotonic()
+    picked_up = {}
+
+    results, reported, failed = [], set(), set()
+    while True:
+        runs = client.run.from_task(task_id)
+        running = []
+        for run in runs:
+            organisation_id = run["organization"]["id"]
+            if organisation_id in reported or organisation_id in failed:
+                continue
+
+            if run["status"] == COMPLETED_STATUS:
+                result = client.result.get(run["id"])
+                results.append(result)
+                reported.add(organisation_id)
+                if on_result:
+                    on_result(organisation_id, result)
+                safe_log("info", f"Organisation {organisation_id} reported its result of task {task_id}.")
+            elif run["status"] in RUNNING_STATUSES:
+                running.append(organisation_id)
+                if run["status"] != PENDING_STATUS:
+                    picked_up.setdefault(organisation_id, time.monotonic())
+            else:
+                failed.add(organisation_id)
+                safe_log("warning", f"Organisation {organisation_id} did not complete task {task_id}; "
+                                    f"it is excluded.")
+
+        # Exclude the organisations of which the run exceeded its deadline
+        if node_timeout:
+            now = time.monotonic()
+            expired = [organisation_id for organisation_id in running
+                       if now - picked_up.get(organisation_id, start) >= node_timeout]
+            if expired:
+                safe_log("warning", f"{len(expired)} organisation(s) did not report within {node_timeout} seconds; "
+                                    f"they are excluded.")
+                failed.update(expired)
+                running = [organisation_id for organisation_id in running if organisation_id not in expired]
+
+        if not running:
+            break
+
+        time.sleep(interval)
+
+    if len(reported) < quorum:
+        raise AlgorithmError(f"Only {len(reported)} organisation(s) reported a result of task {task_id}, "
+                             f"whereas a quorum of {quorum} is required.")
+
+    return results, sorted(failed)
+
+
+def summarise_collection(organisation_ids: List[int], excluded_organisation_ids: List[int]) -> Dict[str, List[int]]:
+    """
+    Summarise which organisations contributed to the results.
+
+    Args:
+        organisation_ids (list[int]): The IDs of the organisations that were requested.
+        excluded_organisation_ids (list[int]): The IDs of the organisations that were excluded.
+
+    Returns:
+        dict: The IDs of the included and of the excluded organisations.
+    """
+    return {"included_organisation_ids": [organisation_id for organisation_id in organisation_ids
+                                          if organisation_id not in excluded_organisation_ids],
+            "excluded_organisation_ids": sorted(excluded_organisation_ids)}
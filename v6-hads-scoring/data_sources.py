@@ -0,0 +1,484 @@
+import io
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Iterator, List, Optional, Tuple
+from vantage6.algorithm.tools.decorators import data
+from vantage6.algorithm.tools.exceptions import DataReadError, UserInputError
+
+# HADS scoring algorithm instruments, scoring plans and stratification
+from .instruments import collect_instrument_variables
+from .scoring import compile_scoring_plan
+from .stratification import collect_strata, collect_stratification_variables, StrataDetails
+
+# PyArrow and SPARQLWrapper are only imported once a database is read that requires them,
+# so that they do not add to the start-up time of the methods that do not read such databases
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+DEFAULT_CHUNK_SIZE = 100_000
+DEFAULT_CONCURRENT_PAGES = 4
+CHUNKABLE_DATABASE_TYPES = ("csv", "parquet", "sparql")
+PROJECTABLE_DATABASE_TYPES = ("csv", "parquet")
+
+# The column in which the position of each row of a parquet database is attached whilst its row groups are filtered
+POSITION_COLUMN = "__position__"
+
+# Variables that are read in addition to the variables to analyse; the endpoint column indicates RDF data
+ADDITIONAL_VARIABLES = ("endpoint",)
+
+
+def collect_database_details() -> Tuple[str, str, Optional[str]]:
+    """
+    Collect the location, type and query of the database that the user requested, as provided by the vantage6 node.
+
+    Returns:
+        tuple: The URI, the (lower case) type and the query (if any) of the first requested database.
+    """
+    label = os.environ["USER_REQUESTED_DATABASE_LABELS"].split(",")[0]
+    database_uri = os.environ[f"{label.upper()}_DATABASE_URI"]
+    database_type = os.environ.get(f"{label.upper()}_DATABASE_TYPE", "csv").lower()
+    query = os.environ.get(f"{label.upper()}_QUERY")
+    return database_uri, database_type, query
+
+
+def collect_database_preprocessing() -> Optional[str]:
+    """
+    Collect the preprocessing that the node configured for the database that the user requested,
+    which `@data(1)` applies to the data after loading it.
+
+    Returns:
+        str|None: The (JSON-serialised) preprocessing of the first requested database, or None if none is configured.
+    """
+    label = os.environ["USER_REQUESTED_DATABASE_LABELS"].split(",")[0]
+    return os.environ.get(f"{label.upper()}_PREPROCESSING")
+
+
+def resolve_rdf_database(database_uri: str, database_type: str,
+                         query: Optional[str] = None) -> Tuple[str, str, Optional[str]]:
+    """
+    Resolve a csv database that refers to RDF data to the SPARQL endpoint it refers to, so that it can be paged.
+
+    By convention, RDF data is indicated by a csv database with an 'endpoint' column, of which the first value is the
+    SPARQL endpoint; its query is composed by the RDF client, which retrieves all results at once.
+    To be paged, the SELECT query of the database is therefore to be provided along with it.
+
+    Args:
+        database_uri (str): The URI of the database.
+        database_type (str): The type of the database.
+        query (str, optional): The query of the database. Defaults to None.
+
+    Returns:
+        tuple: The SPARQL endpoint, 'sparql' and the query if the database refers to RDF data;
+               the database details as they are otherwise.
+    """
+    if database_type != "csv":
+        return database_uri, database_type, query
+
+    head = pd.read_csv(database_uri, nrows=1)
+    if "endpoint" not in head.columns or head.empty:
+        return database_uri, database_type, query
+
+    endpoint = str(head["endpoint"].iloc[0])
+    if not query:
+        raise UserInputError(f"The database refers to the SPARQL endpoint '{endpoint}' by its 'endpoint' column, "
+                             f"which can only be retrieved in batches if the SELECT query of the database is provided "
+                             f"along with it; provide the query or use the non-chunked partial functions instead.")
+    return endpoint, "sparql", query
+
+
+def fetch_sparql_page(endpoint: str, query: str, page_size: int, offset: int) -> pd.DataFrame:
+    """
+    Fetch a single page of the results of a SPARQL SELECT query.
+
+    Args:
+        endpoint (str): The SPARQL endpoint.
+        query (str): The SELECT query, without LIMIT or OFFSET clause.
+        page_size (int): The maximum number of results of the page.
+        offset (int): The number of results preceding the page.
+
+    Returns:
+        pd.DataFrame: The page of results, with a column per selected variable.
+    """
+    from SPARQLWrapper import SPARQLWrapper, JSON
+
+    sparql = SPARQLWrapper(endpoint)
+    sparql.setQuery(f"{query.rstrip()}\nLIMIT {page_size}\nOFFSET {offset}")
+    sparql.setReturnFormat(JSON)
+    results = sparql.queryAndConvert()
+
+    variables = results["head"]["vars"]
+    return pd.DataFrame([{variable: binding[variable]["value"] for variable in variables if variable in binding}
+                         for binding in results["results"]["bindings"]], columns=variables)
+
+
+def iterate_sparql_pages(endpoint: str, query: str, page_size: int,
+                         concurrent_pages: int = DEFAULT_CONCURRENT_PAGES, offset: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Retrieve the results of a SPARQL SELECT query page by page, using LIMIT/OFFSET pagination.
+
+    Up to `concurrent_pages` pages are fetched concurrently; pages are yielded in order
+    and at most `concurrent_pages` pages are held in memory at the same time.
+    The query should contain an ORDER BY clause for the pagination to be deterministic.
+
+    Args:
+        endpoint (str): The SPARQL endpoint.
+        query (str): The SELECT query, without LIMIT or OFFSET clause.
+        page_size (int): The maximum number of results per page.
+        concurrent_pages (int, optional): The number of pages to fetch concurrently. Defaults to 4.
+        offset (int, optional): The number of results preceding the first page. Defaults to 0.
+
+    Yields:
+        pd.DataFrame: A page of at most `page_size` results, indexed by the position of each result.
+    """
+    if re.search(r"\b(LIMIT|OFFSET)\b", query, re.IGNORECASE):
+        raise DataReadError("The SPARQL query of the database can not be paginated as it contains a LIMIT or OFFSET "
+                            "clause.")
+
+    with ThreadPoolExecutor(max_workers=concurrent_pages) as executor:
+        while True:
+            pages = [executor.submit(fetch_sparql_page, endpoint, query, page_size, offset + page * page_size)
+                     for page in range(concurrent_pages)]
+
+            for number, page in enumerate(pages):
+                page = page.result()
+                page.index += offset + number * page_size
+                if not page.empty:
+                    yield page
+
+                # A page that is not full marks the end of the results
+                if len(page) < page_size:
+                    for remaining_page in pages:
+                        remaining_page.cancel()
+                    return
+            offset += concurrent_pages * page_size
+
+
+def iterate_data_chunks(database_uri: str, database_type: str, chunk_size: int, variables_to_analyse: List[str],
+                        query: str = None, concurrent_pages: int = DEFAULT_CONCURRENT_PAGES,
+                        variables_to_stratify: StrataDetails = None, start_row: int = 0,
+                        byte_range: Tuple[int, int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Read a csv, parquet or SPARQL database in fixed-size batches, only reading the variables to analyse.
+
+    For parquet databases, the stratification is pushed down to the reader,
+    so that row groups that can not belong to any of the strata are skipped.
+    Rows that precede the start row are not scored; parquet row groups that lie entirely before it are not read at all,
+    and csv files are only read within the byte range that holds the rows from the start row onwards, if given.
+    Each batch is indexed by the position of its rows in the database, which identifies them to the input perturbation.
+
+    Args:
+        database_uri (str): The URI of the database.
+        database_type (str): The type of the database; either 'csv', 'parquet' or 'sparql'.
+        chunk_size (int): The maximum number of rows per batch; the page size for SPARQL databases.
+        variables_to_analyse (list): The variables to read; other variables are not parsed.
+        query (str, optional): The SELECT query of a SPARQL database. Defaults to None.
+        concurrent_pages (int, optional): The number of SPARQL pages to fetch concurrently. Defaults to 4.
+        variables_to_stratify (StratificationDetails|list, optional): Dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
+        start_row (int, optional): The number of rows of the database to skip. Defaults to 0.
+        byte_range (tuple, optional): The offsets of the first and after the last byte of the lines of a csv file to
+                                      read, which start at the start row. Defaults to None - therewith reading all
+                                      of its lines.
+
+    Yields:
+        pd.DataFrame: A batch of at most `chunk_size` rows.
+    """
+    if database_type not in CHUNKABLE_DATABASE_TYPES:
+        raise UserInputError(f"Chunked execution is only supported for {', '.join(CHUNKABLE_DATABASE_TYPES)} "
+                             f"databases, not for '{database_type}' databases.")
+
+    if database_type == "sparql":
+        for page in iterate_sparql_pages(database_uri, query, chunk_size, concurrent_pages, start_row):
+            yield page[[column for column in page.columns if column in variables_to_analyse]]
+        return
+
+    if database_type == "csv":
+        if byte_range is None:
+            chunks = pd.read_csv(database_uri, chunksize=chunk_size,
+                                 usecols=lambda column: column in variables_to_analyse)
+        else:
+            chunks = _iterate_csv_range(database_uri, chunk_size, variables_to_analyse, *byte_range)
+        for chunk in chunks:
+            chunk.index += start_row
+            yield chunk
+        return
+
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(database_uri, format="parquet")
+    columns = [column for column in dataset.schema.names if column in variables_to_analyse]
+    expression = compose_stratification_filter(variables_to_stratify, dataset.schema)
+    for positions, table in iterate_row_group_tables(dataset, columns, expression, start_row):
+        for start in range(0, table.num_rows, chunk_size):
+            batch = table.slice(start, chunk_size).to_pandas()
+            batch.index = positions[start:start + chunk_size]
+            yield batch
+
+
+class _FileRange(io.RawIOBase):
+    """A readable stream of the bytes of a file from its current position up to an end offset."""
+
+    def __init__(self, file: BinaryIO, end: int):
+        super().__init__()
+        self.file, self.remaining = file, max(end - file.tell(), 0)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        data = self.file.read(min(len(buffer), self.remaining))
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+
+def _iterate_csv_range(database_uri: str, chunk_size: int, variables_to_analyse: List[str], start: int,
+                       end: int) -> Iterator[pd.DataFrame]:
+    """
+    Read the lines of a csv file within a byte range in fixed-size batches, seeking past the preceding lines
+    rather than parsing them.
+
+    Args:
+        database_uri (str): The path of the csv file.
+        chunk_size (int): The maximum number of rows per batch.
+        variables_to_analyse (list): The variables to read; other variables are not parsed.
+        start (int): The offset of the first line to read; the header is read regardless.
+        end (int): The offset after the last line to read.
+
+    Yields:
+        pd.DataFrame: A batch of at most `chunk_size` rows.
+    """
+    with open(database_uri, "rb") as file:
+        columns = pd.read_csv(io.BytesIO(file.readline()), nrows=0).columns
+        file.seek(max(start, file.tell()))
+        if file.tell() >= end:
+            return
+
+        yield from pd.read_csv(io.BufferedReader(_FileRange(file, end)), header=None, names=list(columns),
+                               chunksize=chunk_size, usecols=lambda column: column in variables_to_analyse)
+
+
+def iterate_row_group_tables(dataset: "ds.Dataset", columns: List[str], expression: Optional["pc.Expression"],
+                             start_row: int = 0) -> Iterator[Tuple[np.ndarray, "pa.Table"]]:
+    """
+    Read the row groups of a parquet dataset that may satisfy a filter, along with the position of each of their rows
+    in the dataset.
+
+    The positions of the rows are taken from the metadata, so that they identify the rows regardless of the filter,
+    and row groups that precede the start row or of which the statistics do not satisfy the filter are skipped
+    without reading them.
+
+    Args:
+        dataset (ds.Dataset): The dataset.
+        columns (list): The columns to read, which include the columns of the filter.
+        expression (pc.Expression|None): The filter of the rows that may belong to any of the strata.
+        start_row (int, optional): The number of rows of the dataset to skip. Defaults to 0.
+
+    Yields:
+        tuple: The positions of the rows that satisfy the filter, and the table of these rows.
+    """
+    import pyarrow as pa
+
+    offset = 0
+    for fragment in dataset.get_fragments():
+        metadata = fragment.metadata
+        row_group_rows = [metadata.row_group(index).num_rows for index in range(metadata.num_row_groups)]
+        row_group_offsets = offset + np.concatenate([[0], np.cumsum(row_group_rows)[:-1]]).astype(np.int64)
+        offset += sum(row_group_rows)
+
+        for piece in fragment.split_by_row_group(filter=expression, schema=dataset.schema):
+            row_group = piece.row_groups[0].id
+            first_row = int(row_group_offsets[row_group])
+            rows = row_group_rows[row_group]
+            if first_row + rows <= start_row:
+                continue
+
+            # Attach the positions before the rows are filtered, and skip the rows that precede the start row
+            table = piece.to_table(schema=dataset.schema, columns=columns)
+            table = table.append_column(POSITION_COLUMN, pa.array(np.arange(first_row, first_row + rows)))
+            table = table.slice(max(start_row - first_row, 0))
+            if expression is not None:
+                table = table.filter(expression)
+            if table.num_rows:
+                yield table.column(POSITION_COLUMN).to_numpy(), table.drop_columns([POSITION_COLUMN])
+
+
+def count_database_rows(database_uri: str, database_type: str) -> Optional[int]:
+    """
+    Count the rows of a parquet database from its metadata, without reading the data.
+
+    Args:
+        database_uri (str): The URI of the database.
+        database_type (str): The type of the database.
+
+    Returns:
+        int|None: The number of rows, or None if they can not be counted without reading the database,
+                  such as for csv and SPARQL databases.
+    """
+    if database_type != "parquet":
+        return None
+
+    import pyarrow.dataset as ds
+
+    return ds.dataset(database_uri, format="parquet").count_rows()
+
+
+def compose_stratification_filter(variables_to_stratify: StrataDetails,
+                                  schema: "pa.Schema") -> Optional["pc.Expression"]:
+    """
+    Compose a predicate that selects the rows that may belong to any of the requested strata,
+    so that the selection can be pushed down to the row groups of a columnar database.
+
+    Only the 'start' and 'end' bounds of numerical variables are translated; the predicate therefore selects a superset
+    of the strata, which are subsequently determined exactly by the data stratification.
+
+    Args:
+        variables_to_stratify (StratificationDetails|list): Dictionary of variables to stratify, or a list thereof.
+        schema (pa.Schema): The schema of the database.
+
+    Returns:
+        pc.Expression|None: The predicate, or None if (any of) the strata can not be translated to a predicate.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    strata_predicates = []
+    for stratum in collect_strata(variables_to_stratify):
+        predicates = []
+        for variable, details in (stratum or {}).items():
+            if variable not in schema.names or not isinstance(details, dict):
+                continue
+
+            field_type = schema.field(variable).type
+            if not (pa.types.is_integer(field_type) or pa.types.is_floating(field_type)):
+                continue
+
+            if isinstance(details.get("start"), (int, float)):
+                predicates.append(pc.field(variable) >= details["start"])
+            if isinstance(details.get("end"), (int, float)):
+                predicates.append(pc.field(variable) <= details["end"])
+
+        # A stratum without any predicate may contain any row
+        if not predicates:
+            return None
+
+        stratum_predicate = predicates[0]
+        for predicate in predicates[1:]:
+            stratum_predicate = stratum_predicate & predicate
+        strata_predicates.append(stratum_predicate)
+
+    strata_predicate = strata_predicates[0]
+    for predicate in strata_predicates[1:]:
+        strata_predicate = strata_predicate | predicate
+    return strata_predicate
+
+
+def read_projected_data(database_uri: str, database_type: str, variables_to_read: List[str],
+                        variables_to_stratify: StrataDetails = None) -> pd.DataFrame:
+    """
+    Read only the necessary variables of a csv or parquet database.
+
+    Parquet databases are read with the stratification pushed down to their row groups;
+    the rows are indexed by their position in the database nonetheless.
+
+    Args:
+        database_uri (str): The URI of the database.
+        database_type (str): The type of the database; either 'csv' or 'parquet'.
+        variables_to_read (list): The variables to read; other variables are not parsed.
+        variables_to_stratify (StratificationDetails|list, optional): Dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
+
+    Returns:
+        pd.DataFrame: The necessary variables of the rows that may belong to any of the strata.
+    """
+    if database_type not in PROJECTABLE_DATABASE_TYPES:
+        raise UserInputError(f"Projected reading is only supported for {', '.join(PROJECTABLE_DATABASE_TYPES)} "
+                             f"databases, not for '{database_type}' databases.")
+
+    if database_type == "csv":
+        return pd.read_csv(database_uri, usecols=lambda column: column in variables_to_read)
+
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(database_uri, format="parquet")
+    columns = [column for column in dataset.schema.names if column in variables_to_read]
+    expression = compose_stratification_filter(variables_to_stratify, dataset.schema)
+
+    # Keep the position of each row in the database as its index, so that it identifies the row despite the filter
+    tables = list(iterate_row_group_tables(dataset, columns, expression))
+    if not tables:
+        return dataset.schema.empty_table().select(columns).to_pandas()
+
+    import pyarrow as pa
+
+    df = pa.concat_tables([table for _, table in tables]).to_pandas()
+    df.index = np.concatenate([positions for positions, _ in tables])
+    return df
+
+
+def iterate_preprocessed_data_chunks(chunk_size: int, variables_to_analyse: List[str]) -> Iterator[pd.DataFrame]:
+    """
+    Load the first requested database as a whole by `@data(1)`, which applies the preprocessing that the node
+    configured for it, and yield the preprocessed data in fixed-size batches.
+
+    Args:
+        chunk_size (int): The maximum number of rows per batch.
+        variables_to_analyse (list): The variables to yield; other variables are dropped.
+
+    Yields:
+        pd.DataFrame: A batch of at most `chunk_size` rows.
+    """
+    df = data(1)(lambda df: df)()
+    df = df[[column for column in df.columns if column in variables_to_analyse]]
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def projected_data(func: Callable) -> Callable:
+    """
+    Decorator that provides the partial function with the data of the first requested database, akin to `@data(1)`,
+    whilst only reading the variables that are associated with the requested scores and stratification.
+
+    Databases of a type that can not be read selectively or for which the node configured preprocessing,
+    as well as the mock data of the mock client, are loaded by `@data(1)` instead, so that it applies the preprocessing.
+
+    Args:
+        func (callable): The partial function, which takes the DataFrame after its positional arguments
+                         and 'items_to_score' (or 'instruments') and 'variables_to_stratify' as keyword arguments.
+
+    Returns:
+        callable: The decorated function.
+    """
+    loaded_func = data(1)(func)
+
+    @wraps(func)
+    def wrapper(*args: Any, mock_data: List[pd.DataFrame] = None, **kwargs: Any) -> Any:
+        if mock_data is not None:
+            return loaded_func(*args, mock_data=mock_data, **kwargs)
+
+        database_uri, database_type, _ = collect_database_details()
+        if database_type not in PROJECTABLE_DATABASE_TYPES or collect_database_preprocessing() is not None:
+            return loaded_func(*args, **kwargs)
+
+        variables_to_stratify = kwargs.get("variables_to_stratify")
+        if "instruments" in kwargs:
+            variables_to_score = collect_instrument_variables(kwargs["instruments"])
+        else:
+            variables_to_score = compile_scoring_plan(kwargs["items_to_score"]).item_variables
+        variables_to_read = variables_to_score + collect_stratification_variables(variables_to_stratify) + \
+            list(ADDITIONAL_VARIABLES)
+
+        df = read_projected_data(database_uri, database_type, variables_to_read, variables_to_stratify)
+        return func(*args, df, **kwargs)
+
+    # Let the mock client recognise that the function requires data
+    wrapper.wrapped_in_data_decorator = True
+    return wrapper
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from typing import Dict, List, Sequence
+
+# Item responses and subscale scores are small non-negative integers; the nullable unsigned 8-bit integer type stores
+# each as a single byte with a separate missing-value mask, rather than as an 8-byte integer or float
+SMALL_INTEGER_DTYPE = "UInt8"
+SMALL_INTEGER_RANGE = (0, np.iinfo(np.uint8).max)
+CATEGORICAL_DTYPE = "category"
+
+
+def _collect_small_integer_variables(df: pd.DataFrame, variables: Sequence[str]) -> List[str]:
+    """
+    Collect the numerical variables of which all values are integers that fit a single byte.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the variables.
+        variables (sequence): The candidate variables.
+
+    Returns:
+        list: The variables that can be represented as small integers without loss.
+    """
+    variables = [variable for variable in dict.fromkeys(variables)
+                 if variable in df.columns and pd.api.types.is_numeric_dtype(df[variable])
+                 and not pd.api.types.is_bool_dtype(df[variable]) and df[variable].dtype != SMALL_INTEGER_DTYPE]
+    if not variables:
+        return []
+
+    values = df[variables].to_numpy(dtype=float, na_value=np.nan)
+    with np.errstate(invalid="ignore"):
+        fits = np.isnan(values) | ((values == np.rint(values)) &
+                                   (values >= SMALL_INTEGER_RANGE[0]) & (values <= SMALL_INTEGER_RANGE[1]))
+    return [variable for variable, fit in zip(variables, fits.all(axis=0)) if fit]
+
+
+def compose_compact_datatypes(df: pd.DataFrame, item_variables: Sequence[str] = (),
+                              score_variables: Sequence[str] = (),
+                              stratification_variables: Sequence[str] = ()) -> Dict[str, str]:
+    """
+    Compose the compact datatype of each variable that can be represented more compactly without loss.
+
+    Item responses and subscale scores become small integers with a missing-value mask,
+    and non-numerical stratification variables become categorical.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the variables.
+        item_variables (sequence, optional): The variables of the item responses. Defaults to none.
+        score_variables (sequence, optional): The variables of the scores. Defaults to none.
+        stratification_variables (sequence, optional): The variables to stratify. Defaults to none.
+
+    Returns:
+        dict: The compact datatype per variable.
+    """
+    dtypes = dict.fromkeys(_collect_small_integer_variables(df, list(item_variables) + list(score_variables)),
+                           SMALL_INTEGER_DTYPE)
+
+    for variable in stratification_variables:
+        if variable in df.columns and not pd.api.types.is_numeric_dtype(df[variable]) and \
+                not isinstance(df[variable].dtype, pd.CategoricalDtype):
+            dtypes[variable] = CATEGORICAL_DTYPE
+
+    return dtypes
+
+
+def compact_datatypes(df: pd.DataFrame, item_variables: Sequence[str] = (), score_variables: Sequence[str] = (),
+                      stratification_variables: Sequence[str] = ()) -> pd.DataFrame:
+    """
+    Convert the item, score and stratification variables to their compact datatypes in a single cast,
+    which reduces the memory footprint of the data and speeds up the subsequent reductions.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the variables.
+        item_variables (sequence, optional): The variables of the item responses. Defaults to none.
+        score_variables (sequence, optional): The variables of the scores. Defaults to none.
+        stratification_variables (sequence, optional): The variables to stratify. Defaults to none.
+
+    Returns:
+        pd.DataFrame: The DataFrame with compactly represented variables; other variables are left as they are.
+    """
+    dtypes = compose_compact_datatypes(df, item_variables, score_variables, stratification_variables)
+    return df.astype(dtypes) if dtypes else df
@@ -0,0 +1,394 @@
+import fcntl
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from typing import Any, Dict, List, Optional, Tuple
+from vantage6.algorithm.tools.exceptions import PrivacyThresholdViolation, UserInputError
+
+# General federated algorithm functions
+from vantage6_strongaya_general.miscellaneous import safe_log
+
+# HADS scoring algorithm data sources, node cache and result store
+from .cache import fingerprint_data
+from .data_sources import collect_database_details
+from .result_store import compose_dataset_version
+
+DEFAULT_EPSILON = 1.0
+PRIVACY_MECHANISMS = ("input", "output")
+LEDGER_FILE_NAME = "v6-hads-scoring-privacy-ledger.json"
+
+# The secret salt of the noise is stored alongside the ledger, in a file with this suffix
+SALT_FILE_SUFFIX = ".salt"
+SALT_BYTES = 32
+
+# The number of 64-bit outputs of each counter of the Philox generator, and the number of records of which the noise is
+# drawn at once, which bounds the memory of drawing the noise of records that lie far apart
+PHILOX_OUTPUTS_PER_COUNTER = 4
+NOISE_WINDOW = 65536
+
+# The statistics that are perturbed in output perturbation, and their sensitivity as a power of the score bound;
+# the moment sketches are perturbed through the sums from which they derive, as these have a bounded sensitivity
+PERTURBED_STATISTICS = {"count": 0, "missing": 0, "sum": 1, "sum_of_squares": 2}
+
+
+def check_privacy_input(epsilon: float, privacy_mechanism: str = "input") -> None:
+    """
+    Check whether the requested privacy budget and mechanism are valid.
+
+    Args:
+        epsilon (float): The privacy budget to spend.
+        privacy_mechanism (str, optional): The differential privacy mechanism; 'input' or 'output'.
+                                           Defaults to 'input'.
+
+    Raises:
+        UserInputError: If the budget is not positive or the mechanism is not supported.
+    """
+    if not isinstance(epsilon, (int, float)) or epsilon <= 0:
+        raise UserInputError("Epsilon should be a positive number.")
+
+    if privacy_mechanism not in PRIVACY_MECHANISMS:
+        raise UserInputError(f"Privacy mechanism '{privacy_mechanism}' is not supported, "
+                             f"please use one of {', '.join(PRIVACY_MECHANISMS)}.")
+
+
+def compose_dataset_keys(df: Optional[pd.DataFrame] = None) -> Tuple[str, str]:
+    """
+    Compose the keys that identify the node's dataset and its current version.
+
+    The identity of a database is derived from its location, type and query, so that its budget is accounted for
+    across versions; data that is not provided through a database, such as the mock data of the mock client,
+    is identified by its content.
+
+    Args:
+        df (pd.DataFrame, optional): The data as provided to the partial function. Defaults to None.
+
+    Returns:
+        tuple: The key of the dataset and the key of its current version.
+    """
+    try:
+        database_details = collect_database_details()
+    except KeyError:
+        fingerprint = fingerprint_data(df) if df is not None else "unknown"
+        return fingerprint, fingerprint
+
+    dataset_key = hashlib.sha256(json.dumps(database_details).encode()).hexdigest()
+    return dataset_key, compose_dataset_version() or dataset_key
+
+
+def compose_noise_seed(*components: Any) -> int:
+    """
+    Compose the seed of the noise from the components that determine the release, such as the dataset version,
+    the variables and the privacy budget; identical releases on a node are therewith perturbed with identical noise.
+
+    The components are public, hence they are keyed with the secret salt of the node,
+    so that the noise can not be regenerated, and subtracted, from the components alone.
+
+    Args:
+        *components: The components that determine the release.
+
+    Returns:
+        int: The 128-bit seed of the random number generator.
+    """
+    digest = hmac.new(collect_noise_salt(), json.dumps(components, sort_keys=True, default=str).encode(),
+                      hashlib.sha256).hexdigest()
+    return int(digest[:32], 16)
+
+
+def _collect_ledger_path() -> str:
+    """
+    Collect the path of the privacy ledger of the node.
+
+    The ledger should persist across tasks; it is therefore to be mounted in the node and specified through the
+    'HADS_PRIVACY_LEDGER' environment variable. Otherwise, the temporary folder of the task is used,
+    which only accounts for the budget that is spent within a single job.
+
+    Returns:
+        str: The path of the privacy ledger.
+    """
+    path = os.environ.get("HADS_PRIVACY_LEDGER")
+    if path:
+        return path
+
+    safe_log("warning", "No privacy ledger is configured; the privacy budget is only accounted for within this job.")
+    return os.path.join(os.environ.get("TEMPORARY_FOLDER", tempfile.gettempdir()), LEDGER_FILE_NAME)
+
+
+def collect_noise_salt() -> bytes:
+    """
+    Collect the secret salt of the noise of the node, generating it once.
+
+    The salt is stored alongside the privacy ledger, so that it persists as long as the ledger does,
+    and is never released.
+
+    Returns:
+        bytes: The salt.
+    """
+    path = _collect_ledger_path() + SALT_FILE_SUFFIX
+    if not os.path.exists(path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Link a complete salt file in place, so that concurrent tasks settle on the salt that was linked first
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as file:
+            file.write(secrets.token_bytes(SALT_BYTES))
+        try:
+            os.link(temporary_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temporary_path)
+
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def spend_privacy_budget(dataset_key: str, release_key: str, epsilon: float) -> None:
+    """
+    Record the privacy budget that a release spends on a dataset in the node's ledger.
+
+    Since the noise of a release is determined by its seed, repeating the same release, such as in the second round
+    of the algorithm, reproduces the same noisy data and spends no additional budget.
+    The total budget per dataset can be limited through the 'HADS_PRIVACY_BUDGET' environment variable.
+
+    Args:
+        dataset_key (str): The key of the dataset.
+        release_key (str): The key of the release, i.e. of its noise.
+        epsilon (float): The privacy budget that the release spends.
+
+    Raises:
+        PrivacyThresholdViolation: If the release would exceed the privacy budget of the dataset.
+    """
+    path = _collect_ledger_path()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Lock the ledger so that concurrent tasks can not both spend the remaining budget
+    with open(path, "a+") as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        file.seek(0)
+        content = file.read()
+        ledger = json.loads(content) if content else {}
+
+        entry = ledger.setdefault(dataset_key, {"spent": 0.0, "releases": {}})
+        if release_key in entry["releases"]:
+            safe_log("info", "The noise of this release was drawn before; no additional privacy budget is spent.")
+            return
+
+        budget = os.environ.get("HADS_PRIVACY_BUDGET")
+        if budget is not None and entry["spent"] + epsilon > float(budget):
+            raise PrivacyThresholdViolation("The privacy budget of the dataset is exhausted; no statistics are shared.")
+
+        entry["spent"] += epsilon
+        entry["releases"][release_key] = epsilon
+
+        file.seek(0)
+        file.truncate()
+        json.dump(ledger, file)
+
+    safe_log("info", f"Spent a privacy budget of {epsilon} on the dataset; {entry['spent']} in total.")
+
+
+def draw_record_noise(seed: int, records: np.ndarray, number_of_variables: int) -> np.ndarray:
+    """
+    Draw standard Laplace noise for each variable of the given records from a counter-based (Philox) generator,
+    keyed by the seed and indexed by the identity of each record.
+
+    The noise of a record therefore only depends on the seed and the record, not on which other records are drawn
+    for; it is drawn per window of records, so that the time is proportional to the number of records and the span
+    between them, and the memory bounded by the window.
+
+    Args:
+        seed (int): The seed, i.e. the key of the generator.
+        records (np.ndarray): The non-negative integer identity of each record.
+        number_of_variables (int): The number of variables per record.
+
+    Returns:
+        np.ndarray: The noise, of records by variables.
+    """
+    noise = np.empty((len(records), number_of_variables))
+    order = np.argsort(records, kind="stable")
+    sorted_records = records[order].astype(np.int64)
+
+    start = 0
+    while start < len(sorted_records):
+        first = int(sorted_records[start])
+        end = int(np.searchsorted(sorted_records, first + NOISE_WINDOW))
+        span = int(sorted_records[end - 1]) - first + 1
+
+        # Position the counter at the first output of the first record of the window
+        counter, skip = divmod(first * number_of_variables, PHILOX_OUTPUTS_PER_COUNTER)
+        raw = np.random.Philox(key=seed, counter=counter).random_raw(skip + span * number_of_variables)[skip:]
+
+        # Map each output to a uniform in the open unit interval and transform it to a standard Laplace variate
+        uniform = ((raw >> np.uint64(11)).astype(np.float64) + 0.5) * 2.0 ** -53
+        window = -np.sign(uniform - 0.5) * np.log1p(-2.0 * np.abs(uniform - 0.5))
+
+        noise[order[start:end]] = window.reshape(span, number_of_variables)[sorted_records[start:end] - first]
+        start = end
+    return noise
+
+
+def apply_vectorised_differential_privacy(df: pd.DataFrame, bounds: Dict[str, Tuple[float, float]], epsilon: float,
+                                          seed: int) -> pd.DataFrame:
+    """
+    Apply differential privacy to the numerical variables using the Laplace mechanism,
+    drawing the noise of all variables in a single call.
+
+    The noise is keyed by the (integer) index of the rows, which the readers set to the position of each row in the
+    database, so that a record receives the same noise regardless of which other rows are retained, such as by
+    another stratification or batch size. The sensitivity of each variable is the width of its public bounds, rather
+    than of its observed range, which would itself reveal the data; the budget is divided evenly over the variables,
+    so that a row as a whole is released with the requested budget. Noisy values are clipped to the public bounds,
+    and integer variables are rounded.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the data to be privatised.
+        bounds (dict): The public lower and upper bound of each variable to privatise;
+                       absent and non-numerical variables are left as they are.
+        epsilon (float): The privacy budget.
+        seed (int): The seed of the noise.
+
+    Returns:
+        pd.DataFrame: The privatised DataFrame.
+    """
+    variables = [variable for variable in bounds
+                 if variable in df.columns and pd.api.types.is_numeric_dtype(df[variable])
+                 and not pd.api.types.is_bool_dtype(df[variable])]
+    if not variables or df.empty:
+        return df
+
+    values = df[variables].to_numpy(dtype=float, na_value=np.nan)
+    lower_bounds = np.array([bounds[variable][0] for variable in variables], dtype=float)
+    upper_bounds = np.array([bounds[variable][1] for variable in variables], dtype=float)
+    scales = (upper_bounds - lower_bounds) * len(variables) / epsilon
+
+    # Identify the records by their index, or by their position if the index does not identify them
+    records = df.index.to_numpy()
+    if not (pd.api.types.is_integer_dtype(records) and records.min() >= 0 and df.index.is_unique):
+        records = np.arange(len(df))
+    noise = draw_record_noise(seed, records, len(variables))
+
+    values = np.clip(values + noise * scales, lower_bounds, upper_bounds)
+
+    df = df.copy()
+    for position, variable in enumerate(variables):
+        if pd.api.types.is_integer_dtype(df[variable]):
+            df[variable] = pd.array(np.rint(values[:, position]), dtype="Float64").astype(df[variable].dtype)
+        else:
+            df[variable] = values[:, position]
+    return df
+
+
+def privatise_data(df: pd.DataFrame, bounds: Dict[str, Tuple[float, float]], epsilon: float,
+                   dataset_keys: Tuple[str, str] = None) -> pd.DataFrame:
+    """
+    Spend the privacy budget on the data and apply differential privacy to it.
+
+    As the noise of each record is keyed by its identity, the release does not depend on the strata or batches that
+    the record is read in; repeating it with another stratification reproduces the noise of each record rather than
+    drawing fresh noise that could be averaged out, and spends no additional budget.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the data to be privatised, indexed by the position of each row
+                           in the database.
+        bounds (dict): The public lower and upper bound of each variable to privatise.
+        epsilon (float): The privacy budget, which is divided over the variables.
+        dataset_keys (tuple, optional): The keys of the dataset and its version, as composed by
+                                        `compose_dataset_keys`. Defaults to None - therewith composing them.
+
+    Returns:
+        pd.DataFrame: The privatised DataFrame.
+
+    Raises:
+        PrivacyThresholdViolation: If the release would exceed the privacy budget of the dataset.
+    """
+    dataset_key, version_key = dataset_keys or compose_dataset_keys(df)
+    release_key = hashlib.sha256(json.dumps(["input", version_key, sorted(bounds.items()), epsilon]
+                                            ).encode()).hexdigest()
+
+    # Batches are disjoint sets of records, hence they spend the budget of their release only once
+    spend_privacy_budget(dataset_key, release_key, epsilon)
+    return apply_vectorised_differential_privacy(df, bounds, epsilon, compose_noise_seed(release_key))
+
+
+def perturb_sufficient_statistics(statistics: Dict[str, Dict[str, Dict[str, float]]], epsilon: float,
+                                  score_bound: float, release: Any = None,
+                                  dataset_keys: Tuple[str, str] = None) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Apply differential privacy to the sufficient statistics rather than to the data (output perturbation),
+    drawing the noise of all strata, score variables and statistics in a single call.
+
+    The mean and M2 of each moment sketch are converted to the sum and sum of squares, which are perturbed and
+    converted back. The budget is divided evenly over the perturbed statistics of all strata and score variables;
+    the sensitivity of the counts is 1, that of the sums the score bound and that of the sums of squares its square.
+    Histograms of the scores, if present, are perturbed bin by bin as a single statistic with a sensitivity of 1.
+    The minimum and maximum can not be released privately and are therefore withheld.
+
+    Args:
+        statistics (dict): The sufficient statistics per stratum label and score variable.
+        epsilon (float): The privacy budget.
+        score_bound (float): The largest absolute value that a score can take.
+        release (Any, optional): The input that determines the release, so that repeating it reproduces the noise.
+                                 Defaults to None.
+        dataset_keys (tuple, optional): The keys of the dataset and its version. Defaults to None - therewith
+                                        composing them from the database.
+
+    Returns:
+        dict: The perturbed sufficient statistics per stratum label and score variable.
+
+    Raises:
+        PrivacyThresholdViolation: If the release would exceed the privacy budget of the dataset.
+    """
+    dataset_key, version_key = dataset_keys or compose_dataset_keys()
+    release_key = hashlib.sha256(json.dumps(["output", version_key, release, epsilon], sort_keys=True,
+                                            default=str).encode()).hexdigest()
+    spend_privacy_budget(dataset_key, release_key, epsilon)
+
+    cells = [(stratum, variable) for stratum, variables in statistics.items() for variable in variables]
+    if not cells:
+        return statistics
+
+    sketches = [statistics[stratum][variable] for stratum, variable in cells]
+    counts = np.array([sketch["count"] for sketch in sketches], dtype=float)
+    means = np.array([sketch["mean"] if sketch["count"] else 0.0 for sketch in sketches], dtype=float)
+    values = np.column_stack([counts, [sketch["missing"] for sketch in sketches], counts * means,
+                              np.array([sketch["m2"] for sketch in sketches], dtype=float) + counts * means ** 2])
+    sensitivities = np.float64(score_bound) ** np.array(list(PERTURBED_STATISTICS.values()))
+    number_of_statistics = values.size
+
+    # A response falls in a single bin of a histogram, which is therefore perturbed as a single statistic
+    # with a sensitivity of 1
+    histograms = all("histogram" in sketch for sketch in sketches)
+    if histograms:
+        values = np.column_stack([values, [sketch["histogram"] for sketch in sketches]])
+        sensitivities = np.concatenate([sensitivities, np.ones(values.shape[1] - len(PERTURBED_STATISTICS))])
+        number_of_statistics += len(cells)
+
+    scales = sensitivities * number_of_statistics / epsilon
+    values += np.random.default_rng(compose_noise_seed(release_key)).laplace(0.0, 1.0, size=values.shape) * scales
+
+    # Counts, sums of squares and histogram bins can not be negative; counts are integers
+    values[:, [0, 1, 3]] = np.maximum(values[:, [0, 1, 3]], 0.0)
+    values[:, len(PERTURBED_STATISTICS):] = np.maximum(np.rint(values[:, len(PERTURBED_STATISTICS):]), 0.0)
+    perturbed = {stratum: {} for stratum in statistics}
+    for (stratum, variable), row in zip(cells, values):
+        count = int(round(row[0]))
+        perturbed[stratum][variable] = {"count": count,
+                                        "missing": int(round(row[1])),
+                                        "mean": float(row[2] / count) if count else None,
+                                        "m2": float(max(row[3] - row[2] ** 2 / count, 0.0)) if count else 0.0,
+                                        "min": None,
+                                        "max": None}
+        if histograms:
+            perturbed[stratum][variable]["histogram"] = row[len(PERTURBED_STATISTICS):].astype(int).tolist()
+    return perturbed
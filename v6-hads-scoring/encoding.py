@@ -0,0 +1,129 @@
+import base64
+
+from typing import Any, Dict
+from vantage6.algorithm.tools.exceptions import UserInputError
+
+RESULT_ENCODINGS = ("json", "arrow")
+ENCODED_STATISTICS_KEY = "encoded_sufficient_statistics"
+
+# The columns of the sufficient statistics in the compact encoding, one row per stratum and score variable;
+# counts are unsigned 32-bit integers and moments double-precision floats
+COUNT_COLUMNS = ("count", "missing")
+MOMENT_COLUMNS = ("mean", "m2", "min", "max")
+COMPRESSION = "zstd"
+
+
+def check_result_encoding(result_encoding: str) -> None:
+    """
+    Check whether the requested encoding of the partial results is supported.
+
+    Args:
+        result_encoding (str): The encoding of the partial results; 'json' or 'arrow'.
+
+    Raises:
+        UserInputError: If the encoding is not supported.
+    """
+    if result_encoding not in RESULT_ENCODINGS:
+        raise UserInputError(f"Result encoding '{result_encoding}' is not supported, "
+                             f"please use one of {', '.join(RESULT_ENCODINGS)}.")
+
+
+def encode_sufficient_statistics(statistics: Dict[str, Dict[str, Dict[str, Any]]]) -> str:
+    """
+    Encode sufficient statistics as a base64-wrapped Arrow IPC stream of a single table with fixed numeric types,
+    rather than as nested JSON in which every number and key is repeated as text.
+    The stream carries a fixed overhead for its schema, hence the encoding pays off for results of many strata.
+
+    Args:
+        statistics (dict): The sufficient statistics per stratum label and score variable.
+
+    Returns:
+        str: The base64 encoding of the Arrow IPC stream.
+    """
+    import pyarrow as pa
+
+    cells = [(stratum, variable, sketch) for stratum, variables in statistics.items()
+             for variable, sketch in variables.items()]
+
+    columns = {"stratum": pa.array([stratum for stratum, _, _ in cells], pa.string()).dictionary_encode(),
+               "variable": pa.array([variable for _, variable, _ in cells], pa.string()).dictionary_encode()}
+    columns |= {column: pa.array([sketch[column] for _, _, sketch in cells], pa.uint32()) for column in COUNT_COLUMNS}
+    columns |= {column: pa.array([sketch[column] for _, _, sketch in cells], pa.float64()) for column in MOMENT_COLUMNS}
+    columns["histogram"] = pa.array([sketch.get("histogram") for _, _, sketch in cells], pa.list_(pa.uint32()))
+    table = pa.table(columns)
+
+    # Compress the buffers if the codec is available; the reader detects the compression by itself
+    options = pa.ipc.IpcWriteOptions(compression=COMPRESSION if pa.Codec.is_available(COMPRESSION) else None)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return base64.b64encode(sink.getvalue().to_pybytes()).decode("ascii")
+
+
+def decode_sufficient_statistics(payload: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Decode sufficient statistics that were encoded with `encode_sufficient_statistics`.
+
+    Args:
+        payload (str): The base64 encoding of the Arrow IPC stream.
+
+    Returns:
+        dict: The sufficient statistics per stratum label and score variable.
+    """
+    import pyarrow as pa
+
+    table = pa.ipc.open_stream(base64.b64decode(payload)).read_all()
+
+    statistics = {}
+    for row in table.to_pylist():
+        sketch = {column: row[column] for column in COUNT_COLUMNS + MOMENT_COLUMNS}
+        if row["histogram"] is not None:
+            sketch["histogram"] = row["histogram"]
+        statistics.setdefault(row["stratum"], {})[row["variable"]] = sketch
+    return statistics
+
+
+def encode_result(result: Dict[str, Any], result_encoding: str = "json") -> Dict[str, Any]:
+    """
+    Encode the sufficient statistics of a partial result, including those of each instrument, if requested.
+
+    Args:
+        result (dict): The partial result, containing the 'sufficient_statistics' or the 'instruments'.
+        result_encoding (str, optional): The encoding of the result; 'json' or 'arrow'. Defaults to 'json'.
+
+    Returns:
+        dict: The result with the sufficient statistics under 'encoded_sufficient_statistics' if they are encoded.
+    """
+    if result_encoding == "json":
+        return result
+
+    result = dict(result)
+    if "sufficient_statistics" in result:
+        result[ENCODED_STATISTICS_KEY] = encode_sufficient_statistics(result.pop("sufficient_statistics"))
+    if "instruments" in result:
+        result["instruments"] = {instrument: encode_result(instrument_result, result_encoding)
+                                 for instrument, instrument_result in result["instruments"].items()}
+    return result
+
+
+def decode_result(result: Any) -> Any:
+    """
+    Decode the sufficient statistics of a partial result if they are encoded, so that the central handles encoded
+    and plain results alike.
+
+    Args:
+        result (Any): The partial result.
+
+    Returns:
+        Any: The result with the sufficient statistics under 'sufficient_statistics'.
+    """
+    if not isinstance(result, dict) or (ENCODED_STATISTICS_KEY not in result and "instruments" not in result):
+        return result
+
+    result = dict(result)
+    if ENCODED_STATISTICS_KEY in result:
+        result["sufficient_statistics"] = decode_sufficient_statistics(result.pop(ENCODED_STATISTICS_KEY))
+    if isinstance(result.get("instruments"), dict):
+        result["instruments"] = {instrument: decode_result(instrument_result)
+                                 for instrument, instrument_result in result["instruments"].items()}
+    return result
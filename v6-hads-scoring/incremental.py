@@ -0,0 +1,286 @@
+import hashlib
+import json
+import os
+
+from typing import Any, Dict, List, Optional, Tuple
+
+# General federated algorithm functions
+from vantage6_strongaya_general.miscellaneous import safe_log
+
+# HADS scoring algorithm result store
+from .result_store import compose_input_hash
+
+INCREMENTAL_STATE_FILE_EXTENSION = ".json"
+
+# The number of bytes of a database file, at its start and preceding its watermark, whose digest is compared to tell an
+# appended file from a replaced one
+HEAD_BYTES = 65536
+
+# The number of bytes at the end of a parquet file: the length of its footer and the magic number
+PARQUET_TRAILER_BYTES = 8
+
+
+def collect_incremental_store_directory() -> Optional[str]:
+    """
+    Collect the directory in which the node stores the sufficient statistics of incremental analyses.
+
+    The directory should persist across tasks; it is therefore to be mounted in the node and specified through the
+    'HADS_INCREMENTAL_STORE' environment variable.
+
+    Returns:
+        str|None: The path of the incremental store, or None if no incremental store is configured.
+    """
+    directory = os.environ.get("HADS_INCREMENTAL_STORE")
+    if not directory:
+        safe_log("warning", "No incremental store is configured; all rows of the dataset will be scored.")
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _digest_range(database_uri: str, start: int, end: int) -> str:
+    """
+    Compute the digest of a range of bytes of a database file.
+
+    Args:
+        database_uri (str): The path of the database file.
+        start (int): The offset of the first byte to digest.
+        end (int): The offset after the last byte to digest.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest of the bytes.
+    """
+    with open(database_uri, "rb") as file:
+        file.seek(start)
+        return hashlib.sha256(file.read(max(end - start, 0))).hexdigest()
+
+
+def _find_line_end(database_uri: str, size: int) -> int:
+    """
+    Find the offset after the last line break within the leading bytes of a csv file, so that a line that is still
+    being appended is not considered to be part of it.
+
+    Args:
+        database_uri (str): The path of the database file.
+        size (int): The number of leading bytes to consider.
+
+    Returns:
+        int: The offset after the last line break, or 0 if there is none.
+    """
+    with open(database_uri, "rb") as file:
+        end = size
+        while end > 0:
+            start = max(end - HEAD_BYTES, 0)
+            file.seek(start)
+            line_break = file.read(end - start).rfind(b"\n")
+            if line_break >= 0:
+                return start + line_break + 1
+            end = start
+    return 0
+
+
+def _digest_row_groups(database_uri: str) -> List[str]:
+    """
+    Compute a digest of the metadata of each row group of a parquet database, in the order in which it is read:
+    its number of rows and the statistics and size of each of its column chunks.
+
+    Args:
+        database_uri (str): The URI of the database.
+
+    Returns:
+        list: The hexadecimal SHA-256 digest of each row group.
+    """
+    import pyarrow.dataset as ds
+
+    digests = []
+    for fragment in ds.dataset(database_uri, format="parquet").get_fragments():
+        metadata = fragment.metadata
+        for index in range(metadata.num_row_groups):
+            row_group = metadata.row_group(index)
+            columns = []
+            for column_index in range(row_group.num_columns):
+                column = row_group.column(column_index)
+                statistics = column.statistics
+                columns.append([column.path_in_schema, column.total_compressed_size,
+                                statistics.to_dict() if statistics is not None else None])
+            digests.append(hashlib.sha256(json.dumps([row_group.num_rows, columns], default=str).encode()
+                                          ).hexdigest())
+    return digests
+
+
+def _find_data_end(database_uri: str, size: int) -> int:
+    """
+    Find the offset after the row groups of a parquet file, at which its footer starts.
+
+    Args:
+        database_uri (str): The path of the database file.
+        size (int): The size of the file.
+
+    Returns:
+        int: The offset of the footer.
+    """
+    with open(database_uri, "rb") as file:
+        file.seek(size - PARQUET_TRAILER_BYTES)
+        return size - PARQUET_TRAILER_BYTES - int.from_bytes(file.read(4), "little")
+
+
+def _digest_bytes(database_uri: str, offset: int) -> Dict[str, str]:
+    """
+    Compute the digests of the leading bytes of a database file and of the bytes that precede an offset.
+
+    Args:
+        database_uri (str): The path of the database file.
+        offset (int): The offset after the bytes to digest.
+
+    Returns:
+        dict: The 'head' and 'tail' digests.
+    """
+    return {"head": _digest_range(database_uri, 0, min(offset, HEAD_BYTES)),
+            "tail": _digest_range(database_uri, max(offset - HEAD_BYTES, 0), offset)}
+
+
+def compose_watermark(database_uri: str, database_type: str) -> Dict[str, Any]:
+    """
+    Compose the watermark of a database, to which the number of rows that were scored is added once read.
+
+    The watermark is composed before the database is read, so that rows that are appended while it is read are
+    considered to be appended after it. For csv files, it records the offset after the last complete line, from
+    which a subsequent analysis continues; for parquet databases, the digest of the metadata of each of their row
+    groups and, for single files, the offset after their row groups. For either, it records the digests of the
+    leading bytes and of the bytes that precede the offset.
+
+    Args:
+        database_uri (str): The URI of the database.
+        database_type (str): The type of the database.
+
+    Returns:
+        dict: The size of the database file and the digests of its contents; None for other databases.
+    """
+    watermark = {"size": None}
+    if database_type == "parquet":
+        watermark["row_groups"] = _digest_row_groups(database_uri)
+    if database_type not in ("csv", "parquet") or not os.path.isfile(database_uri):
+        return watermark
+
+    size = os.stat(database_uri).st_size
+    offset = _find_line_end(database_uri, size) if database_type == "csv" else _find_data_end(database_uri, size)
+    return watermark | {"size": size, "offset": offset} | _digest_bytes(database_uri, offset)
+
+
+def is_appended(database_uri: str, database_type: str, watermark: Dict[str, Any]) -> bool:
+    """
+    Check whether the database only had rows appended since its watermark, so that the rows up to it are unchanged.
+
+    A csv file that shrank, or whose leading bytes or bytes preceding the watermark changed, was replaced rather than
+    appended to. Parquet files are rewritten rather than appended to, hence the metadata of their row groups up to
+    the watermark is compared, as are the bytes of these row groups, which an append rewrites as they were.
+    The rows of SPARQL endpoints are assumed to be appended to, in the order of the query.
+
+    Args:
+        database_uri (str): The URI of the database.
+        database_type (str): The type of the database.
+        watermark (dict): The watermark of the database and its number of 'rows' that were scored.
+
+    Returns:
+        bool: Whether the rows up to the watermark are unchanged.
+    """
+    try:
+        if database_type == "parquet" and \
+                _digest_row_groups(database_uri)[:len(watermark["row_groups"])] != watermark["row_groups"]:
+            return False
+
+        if watermark["size"] is None:
+            return True
+
+        return os.stat(database_uri).st_size >= watermark["offset"] and \
+            _digest_bytes(database_uri, watermark["offset"]) == {"head": watermark["head"], "tail": watermark["tail"]}
+    except (OSError, KeyError, ValueError):
+        return False
+
+
+def is_unchanged(database_uri: str, database_type: str, watermark: Dict[str, Any]) -> bool:
+    """
+    Check whether a database file is unchanged since its watermark, so that it need not be read at all.
+
+    Args:
+        database_uri (str): The URI of the database.
+        database_type (str): The type of the database.
+        watermark (dict): The watermark of the database and its number of 'rows' that were scored.
+
+    Returns:
+        bool: Whether the database is a file of which the size and the contents that the watermark records did not
+              change since.
+    """
+    try:
+        if watermark["size"] is None or os.stat(database_uri).st_size != watermark["size"]:
+            return False
+        if database_type == "parquet":
+            return _digest_row_groups(database_uri) == watermark["row_groups"] and \
+                is_appended(database_uri, database_type, watermark)
+        return watermark["offset"] == watermark["size"] and is_appended(database_uri, database_type, watermark)
+    except (OSError, KeyError, ValueError):
+        return False
+
+
+def compose_incremental_key(database_details: Tuple[str, str, Optional[str]], **arguments: Any) -> str:
+    """
+    Compose the key of the stored state of an incremental analysis, so that it is only continued for the same
+    database and the arguments that affect its sufficient statistics.
+
+    Args:
+        database_details (tuple): The URI, type and query of the database.
+        **arguments: The arguments that affect the sufficient statistics, such as the items to score.
+
+    Returns:
+        str: The key of the stored state.
+    """
+    return compose_input_hash({"database": list(database_details), "kwargs": arguments})
+
+
+def load_incremental_state(directory: str, key: str) -> Optional[Dict[str, Any]]:
+    """
+    Load the stored state of an incremental analysis.
+
+    Args:
+        directory (str): The path of the incremental store.
+        key (str): The key of the stored state.
+
+    Returns:
+        dict|None: The 'watermark' and the 'sufficient_statistics' up to the watermark, or None if no state is stored.
+    """
+    path = os.path.join(directory, key + INCREMENTAL_STATE_FILE_EXTENSION)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        safe_log("warning", "The stored state of the incremental analysis could not be read; "
+                            "all rows of the dataset will be scored.")
+        return None
+
+
+def store_incremental_state(directory: str, key: str, watermark: Dict[str, Any],
+                            statistics: Dict[str, Dict[str, Dict[str, Any]]]) -> None:
+    """
+    Store the state of an incremental analysis, replacing the state of its previous run.
+
+    The sufficient statistics are stored before the sample size threshold and output perturbation are applied,
+    as these are to be applied to the statistics of all rows; the store is therefore to remain on the node.
+
+    Args:
+        directory (str): The path of the incremental store.
+        key (str): The key of the stored state.
+        watermark (dict): The watermark of the database and its number of 'rows' of which the statistics were
+                          computed.
+        statistics (dict): The sufficient statistics per stratum label and score variable.
+    """
+    path = os.path.join(directory, key + INCREMENTAL_STATE_FILE_EXTENSION)
+
+    # Write to a temporary file first so that a concurrent reader never encounters a partial entry
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "w") as file:
+        json.dump({"watermark": watermark, "sufficient_statistics": statistics}, file)
+    os.replace(temporary_path, path)
@@ -0,0 +1,161 @@
+import re
+
+from importlib import import_module
+from types import ModuleType
+from typing import Any, Dict, List, Tuple
+
+from vantage6.algorithm.tools.exceptions import UserInputError
+
+# HADS scoring algorithm scoring plans
+from .scoring import compile_scoring_plan, MAXIMUM_SCALE_SCORE
+
+# Module of each licensed instrument's scoring tables, e.g. 'hads' for HADS or 'eortc_qlq_c30' for the EORTC QLQ-C30;
+# each provides check_input_structure, collect_variable_info, compose_variable_details and orchestrate_scoring
+INSTRUMENT_MODULE_TEMPLATE = "vantage6_strongaya_instruments_licenced.proms.{instrument}_scoring"
+INSTRUMENT_NAME_PATTERN = re.compile(r"^[a-z0-9_]+$")
+
+# Specifications of several instruments, by instrument name; each in the structure of its own 'items_to_score'
+InstrumentsInput = Dict[str, Dict[str, Any]]
+
+
+def load_instrument(instrument: str) -> ModuleType:
+    """
+    Load the scoring module of a licensed instrument.
+
+    Args:
+        instrument (str): The name of the instrument, e.g. 'hads'.
+
+    Returns:
+        module: The scoring module of the instrument.
+
+    Raises:
+        UserInputError: If no scoring module is available for the instrument.
+    """
+    if not INSTRUMENT_NAME_PATTERN.match(instrument):
+        raise UserInputError(f"Instrument '{instrument}' is not a valid instrument name.")
+
+    try:
+        return import_module(INSTRUMENT_MODULE_TEMPLATE.format(instrument=instrument))
+    except ModuleNotFoundError:
+        raise UserInputError(f"Instrument '{instrument}' is not supported by the installed scoring tables.")
+
+
+def collect_instruments(instruments: InstrumentsInput) -> Dict[str, ModuleType]:
+    """
+    Load the scoring module of each requested instrument and check the structure of its specification.
+
+    Args:
+        instruments (InstrumentsInput): The specification of each instrument to score, by instrument name.
+
+    Returns:
+        dict: The scoring module of each instrument, by instrument name.
+
+    Raises:
+        UserInputError: If no instruments are requested, or if an instrument or its specification is invalid.
+    """
+    if not isinstance(instruments, dict) or not instruments:
+        raise UserInputError("Instruments should be specified as a non-empty dictionary of specifications "
+                             "by instrument name.")
+
+    modules = {}
+    for instrument, items_to_score in instruments.items():
+        modules[instrument] = load_instrument(instrument)
+        if not modules[instrument].check_input_structure(items_to_score):
+            raise UserInputError(f"Algorithm input of instrument '{instrument}' is incorrect. "
+                                 f"Please check the algorithm input.")
+    return modules
+
+
+def collect_instrument_variables(instruments: InstrumentsInput) -> List[str]:
+    """
+    Collect the union of the variables that are associated with the requested scores of all instruments.
+
+    Args:
+        instruments (InstrumentsInput): The specification of each instrument to score, by instrument name.
+
+    Returns:
+        list: The variables of all instruments, in order of first occurrence.
+    """
+    variables = []
+    for instrument, items_to_score in instruments.items():
+        variables += load_instrument(instrument).collect_variable_info(items_to_score)
+    return list(dict.fromkeys(variables))
+
+
+def compose_instrument_details(instruments: InstrumentsInput, scores: bool = False) -> Dict[str, Any]:
+    """
+    Compose the union of the variable details of the items, or of the scores, of all instruments.
+
+    Args:
+        instruments (InstrumentsInput): The specification of each instrument to score, by instrument name.
+        scores (bool, optional): Whether to compose the details of the scores rather than of the items.
+                                 Defaults to False.
+
+    Returns:
+        dict: The variable details of all instruments.
+    """
+    details = {}
+    for instrument, items_to_score in instruments.items():
+        details |= load_instrument(instrument).compose_variable_details(items_to_score, scores)
+    return details
+
+
+def compose_instrument_bounds(instruments: InstrumentsInput) -> Dict[str, Tuple[float, float]]:
+    """
+    Compose the public range of the items of all instruments, as used by the differential privacy.
+
+    The items of HADS are bounded by its response options; the items of other instruments by the range that their
+    scoring tables declare through the 'start' and 'end' of their variable details.
+
+    Args:
+        instruments (InstrumentsInput): The specification of each instrument to score, by instrument name.
+
+    Returns:
+        dict: The lower and upper bound of each item variable of all instruments.
+
+    Raises:
+        UserInputError: If the scoring tables of an instrument do not declare the range of any of its items.
+    """
+    bounds = {}
+    for instrument, items_to_score in instruments.items():
+        if instrument == "hads":
+            bounds |= compile_scoring_plan(items_to_score).item_bounds
+            continue
+
+        for variable, details in load_instrument(instrument).compose_variable_details(items_to_score, False).items():
+            start, end = (details.get("start"), details.get("end")) if isinstance(details, dict) else (None, None)
+            if not (isinstance(start, (int, float)) and isinstance(end, (int, float))):
+                raise UserInputError(f"The scoring tables of instrument '{instrument}' do not declare the range of "
+                                     f"its items, hence these can not be made differentially private.")
+            bounds[variable] = (start, end)
+    return bounds
+
+
+def compose_instrument_score_bound(instrument: str, items_to_score: Dict[str, Any]) -> float:
+    """
+    Compose the largest absolute value that a score of an instrument can take, as used by output perturbation.
+
+    The scores of HADS are bounded by its scales; the scores of other instruments by the range that their scoring
+    tables declare through the 'start' and 'end' of their variable details.
+
+    Args:
+        instrument (str): The name of the instrument.
+        items_to_score (dict): The specification of the instrument, in the structure of its own 'items_to_score'.
+
+    Returns:
+        float: The largest absolute value of the scores of the instrument.
+
+    Raises:
+        UserInputError: If the scoring tables of the instrument do not declare the range of any of its scores.
+    """
+    if instrument == "hads":
+        return MAXIMUM_SCALE_SCORE
+
+    bound = 0.0
+    for details in load_instrument(instrument).compose_variable_details(items_to_score, True).values():
+        start, end = (details.get("start"), details.get("end")) if isinstance(details, dict) else (None, None)
+        if not (isinstance(start, (int, float)) and isinstance(end, (int, float))):
+            raise UserInputError(f"The scoring tables of instrument '{instrument}' do not declare the range of "
+                                 f"its scores, hence these can not be perturbed.")
+        bound = max(bound, abs(start), abs(end))
+    return bound
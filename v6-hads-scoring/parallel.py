@@ -0,0 +1,206 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple, Union
+from vantage6.algorithm.tools.exceptions import UserInputError
+
+# General federated algorithm functions
+from vantage6_strongaya_general.miscellaneous import set_datatypes, safe_log
+
+# HADS scoring algorithm datatypes, scoring backends and sufficient statistics
+from .datatypes import SMALL_INTEGER_DTYPE
+from .scoring import compile_scoring_plan, score_hads_vectorised, ScoringPlan, MAXIMUM_SCALE_SCORE
+from .sufficient_statistics import compute_stratified_sufficient_statistics, merge_pairwise, \
+    merge_stratified_sufficient_statistics
+
+# HADS scoring algorithm functions
+from vantage6_strongaya_instruments_licenced.proms.hads_scoring import orchestrate_scoring, ItemsToScoreInput
+
+# The description of an array in shared memory: the name of the block, its shape and its datatype
+SharedArray = Tuple[str, Tuple[int, ...], str]
+
+
+def collect_worker_count(workers: Optional[int] = None) -> int:
+    """
+    Collect the number of processes that score the data in parallel.
+
+    Args:
+        workers (int, optional): The number of processes as requested in the algorithm input.
+                                 Defaults to None - therewith using the 'HADS_WORKERS' environment variable of the
+                                 node, or a single process if it is not set.
+
+    Returns:
+        int: The number of processes; 1 for serial execution.
+
+    Raises:
+        UserInputError: If the number of processes is not a positive integer.
+    """
+    if workers is None:
+        workers = os.environ.get("HADS_WORKERS", 1)
+
+    try:
+        workers = int(workers)
+    except (TypeError, ValueError):
+        raise UserInputError("The number of workers should be a positive integer.")
+
+    if workers < 1:
+        raise UserInputError("The number of workers should be a positive integer.")
+
+    # Do not start more processes than there are processors available to this node
+    return min(workers, os.cpu_count() or 1)
+
+
+def _share_array(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, SharedArray]:
+    """
+    Copy an array into a new block of shared memory, so that other processes can read it without pickling.
+
+    Args:
+        array (np.ndarray): The array to share.
+
+    Returns:
+        tuple: The block of shared memory, which the caller is to close and unlink, and the description of the array.
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _share_items(df: pd.DataFrame, item_variables: List[str]) -> Tuple[List[shared_memory.SharedMemory],
+                                                                         SharedArray, Optional[SharedArray]]:
+    """
+    Copy the item responses into shared memory, as single-byte codes with a separate missing-value mask if all of them
+    are represented as small integers, or as single-precision floats with missing responses as NaN otherwise.
+
+    Args:
+        df (pd.DataFrame): The prepared DataFrame.
+        item_variables (list): The variables of the item responses.
+
+    Returns:
+        tuple: The blocks of shared memory, which the caller is to close and unlink, the description of the shared
+               item responses and that of their missing-value mask, if any.
+    """
+    if not all(df[variable].dtype == SMALL_INTEGER_DTYPE for variable in item_variables):
+        block, items = _share_array(df[item_variables].to_numpy(dtype=np.float32, na_value=np.nan))
+        return [block], items, None
+
+    missing = df[item_variables].isna().to_numpy()
+    item_block, items = _share_array(df[item_variables].to_numpy(dtype=np.uint8, na_value=0))
+    missing_block, shared_missing = _share_array(missing)
+    return [item_block, missing_block], items, shared_missing
+
+
+def _read_shared_rows(shared_arrays: List[SharedArray], start: int, stop: int) -> List[np.ndarray]:
+    """
+    Copy a range of rows out of shared arrays, so that no view on their blocks outlives the closure of the blocks.
+
+    Args:
+        shared_arrays (list): The descriptions of the shared arrays.
+        start (int): The first row of the range.
+        stop (int): The row after the last row of the range.
+
+    Returns:
+        list: The rows of each array.
+    """
+    blocks = [shared_memory.SharedMemory(name=name) for name, _, _ in shared_arrays]
+    try:
+        return [np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)[start:stop].copy()
+                for block, (_, shape, dtype) in zip(blocks, shared_arrays)]
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def _score_shard(items: SharedArray, missing: Optional[SharedArray], memberships: SharedArray, start: int, stop: int,
+                 item_variables: List[str], strata: List[str], items_to_score: Union[ItemsToScoreInput, ScoringPlan],
+                 scoring_backend: str = "default") -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Score a range of rows of the shared data and compute their sufficient statistics; executed by a worker process.
+
+    Args:
+        items (SharedArray): The description of the shared item responses.
+        missing (SharedArray|None): The description of the shared missing-value mask of the item responses if these
+                                    are shared as single-byte codes, or None if they are shared as floats.
+        memberships (SharedArray): The description of the shared stratum memberships.
+        start (int): The first row of the shard.
+        stop (int): The row after the last row of the shard.
+        item_variables (list): The variables of the columns of the item responses.
+        strata (list): The stratum labels of the columns of the stratum memberships.
+        items_to_score (ItemsToScoreInput|ScoringPlan): Dictionary of scales and information specifying where the
+                                                       necessary responses can be found in the data, or its compiled
+                                                       scoring plan.
+        scoring_backend (str, optional): The scoring engine to use; 'default' or 'numpy'. Defaults to 'default'.
+
+    Returns:
+        dict: The sufficient statistics of the shard per stratum label and score variable.
+    """
+    # Copy the rows of this shard out of the shared blocks, and restore the codes as small integers with their mask
+    item_values, member = _read_shared_rows([items, memberships], start, stop)
+    if missing is None:
+        df = pd.DataFrame(item_values, columns=item_variables)
+    else:
+        item_missing = _read_shared_rows([missing], start, stop)[0]
+        df = pd.DataFrame({variable: pd.arrays.IntegerArray(item_values[:, position], item_missing[:, position])
+                           for position, variable in enumerate(item_variables)})
+    shard_memberships = pd.DataFrame(member, columns=strata)
+
+    # The plan arrives pickled, or is compiled once per worker process if the specification itself was passed
+    plan = compile_scoring_plan(items_to_score)
+    if scoring_backend == "numpy":
+        df = score_hads_vectorised(df, plan)
+    else:
+        df = orchestrate_scoring(df, plan.items_to_score)
+
+    df = set_datatypes(df, plan.score_details)
+
+    return compute_stratified_sufficient_statistics(df, plan.score_details, shard_memberships, MAXIMUM_SCALE_SCORE)
+
+
+def compute_sharded_sufficient_statistics(df: pd.DataFrame, memberships: pd.DataFrame,
+                                          items_to_score: Union[ItemsToScoreInput, ScoringPlan], workers: int,
+                                          scoring_backend: str = "default") -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Score the prepared data and compute its sufficient statistics in parallel, in shards of consecutive rows.
+
+    The item responses and stratum memberships are placed in shared memory once, from which each worker process reads
+    its own range of rows; only the (small) sufficient statistics of each shard are returned and merged.
+    Item responses that are represented as small integers take two bytes each: their code and their missing-value mask.
+
+    Args:
+        df (pd.DataFrame): The prepared, privatised DataFrame.
+        memberships (pd.DataFrame): Boolean DataFrame, aligned with `df`, with a column per stratum label.
+        items_to_score (ItemsToScoreInput|ScoringPlan): Dictionary of scales and information specifying where the
+                                                       necessary responses can be found in the data, or its compiled
+                                                       scoring plan.
+        workers (int): The number of worker processes.
+        scoring_backend (str, optional): The scoring engine to use; 'default' or 'numpy'. Defaults to 'default'.
+
+    Returns:
+        dict: The sufficient statistics per stratum label and score variable.
+    """
+    plan = compile_scoring_plan(items_to_score)
+    item_variables = [variable for variable in dict.fromkeys(plan.item_variables) if variable in df.columns]
+    boundaries = np.linspace(0, len(df), min(workers, max(len(df), 1)) + 1, dtype=int)
+    safe_log("info", f"Scoring {len(df)} rows in {len(boundaries) - 1} shard(s) across {workers} process(es).")
+
+    blocks, items, missing = _share_items(df, item_variables)
+    membership_block, shared_memberships = _share_array(memberships.to_numpy(dtype=bool))
+    blocks.append(membership_block)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            shards = [executor.submit(_score_shard, items, missing, shared_memberships, start, stop, item_variables,
+                                      list(memberships.columns), plan, scoring_backend)
+                      for start, stop in zip(boundaries[:-1], boundaries[1:])]
+
+            # Reduce the sufficient statistics of the shards in a tree of pairwise merges
+            statistics = merge_pairwise([shard.result() for shard in shards], merge_stratified_sufficient_statistics,
+                                        {})
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return statistics
@@ -1,26 +1,238 @@
 import pandas as pd
 
-from typing import Dict
-from vantage6.algorithm.tools.decorators import algorithm_client, data
+from typing import Any, Dict, List, Tuple, Union
+from vantage6.algorithm.tools.decorators import algorithm_client
+from vantage6.algorithm.tools.exceptions import PrivacyThresholdViolation
 from vantage6.algorithm.client import AlgorithmClient
 
 # General federated algorithm functions
 from vantage6_strongaya_general.general_statistics import compute_local_general_statistics, \
     compute_local_adjusted_deviation
-from vantage6_strongaya_general.miscellaneous import apply_data_stratification, set_datatypes, safe_log, StratificationDetails
-from vantage6_strongaya_general.privacy_measures import apply_sample_size_threshold, mask_unnecessary_variables, \
-    apply_differential_privacy
-from vantage6_strongaya_rdf.collect_sparql_data import collect_sparql_data
+from vantage6_strongaya_general.miscellaneous import set_datatypes, safe_log
+from vantage6_strongaya_general.privacy_measures import apply_sample_size_threshold, mask_unnecessary_variables
+
+# HADS scoring algorithm node cache, data sources, datatypes, differential privacy, result encoding, incremental
+# analyses, instruments, parallel scoring, profiling, stratification and statistics
+from .cache import compose_cache_key, load_cached_data, store_cached_data
+from .data_sources import collect_database_details, collect_database_preprocessing, count_database_rows, \
+    iterate_data_chunks, iterate_preprocessed_data_chunks, projected_data, resolve_rdf_database, DEFAULT_CHUNK_SIZE, \
+    DEFAULT_CONCURRENT_PAGES
+from .datatypes import compact_datatypes
+from .differential_privacy import compose_dataset_keys, perturb_sufficient_statistics, privatise_data, \
+    DEFAULT_EPSILON
+from .encoding import encode_result
+from .incremental import collect_incremental_store_directory, compose_incremental_key, compose_watermark, \
+    is_appended, is_unchanged, load_incremental_state, store_incremental_state
+from .instruments import collect_instrument_variables, collect_instruments, compose_instrument_bounds, \
+    compose_instrument_details, compose_instrument_score_bound, InstrumentsInput
+from .parallel import collect_worker_count, compute_sharded_sufficient_statistics
+from .profiling import PipelineProfiler
+from .scoring import compile_scoring_plan, score_hads_vectorised, ScoringPlan, MAXIMUM_SCALE_SCORE
+from .stratification import collect_stratification_variables, compose_stratification_bounds, \
+    compose_stratification_details, compose_stratum_memberships, StrataDetails
+from .sufficient_statistics import compute_stratified_sufficient_statistics, count_stratified_rows, \
+    merge_stratified_sufficient_statistics, select_strata_meeting_threshold
 
 # HADS scoring algorithm functions
-from vantage6_strongaya_instruments_licenced.proms.hads_scoring import collect_variable_info, compose_variable_details, \
-    orchestrate_scoring, ItemsToScoreInput
+from vantage6_strongaya_instruments_licenced.proms.hads_scoring import orchestrate_scoring, ItemsToScoreInput
 
 
-@data(1)
+def _retrieve_rdf_data(df: pd.DataFrame, variables_to_analyse: List[str],
+                       profiler: PipelineProfiler = None) -> pd.DataFrame:
+    """
+    Retrieve RDF/SPARQL data if its use is indicated in the data - suboptimal solution, to be improved in the future.
+
+    Args:
+        df (pd.DataFrame): The DataFrame as provided to the partial function.
+        variables_to_analyse (list): The variables to retrieve.
+        profiler (PipelineProfiler, optional): The profiler that records the performance of each stage.
+                                               Defaults to None - therewith not profiling.
+
+    Returns:
+        pd.DataFrame: The retrieved data if the DataFrame refers to a SPARQL endpoint; the DataFrame as it is otherwise.
+    """
+    if "endpoint" not in df.columns:
+        return df
+
+    from vantage6_strongaya_rdf.collect_sparql_data import collect_sparql_data
+
+    profiler = profiler or PipelineProfiler()
+    return profiler.run("collect_sparql_data", collect_sparql_data, variables_to_analyse,
+                        endpoint=df["endpoint"].iloc[0])
+
+
+def _prepare_privatised_data(client: AlgorithmClient, df: pd.DataFrame,
+                             items_to_score: Union[ItemsToScoreInput, ScoringPlan],
+                             variables_to_stratify: StrataDetails = None, profiler: PipelineProfiler = None,
+                             epsilon: float = DEFAULT_EPSILON,
+                             privacy_mechanism: str = "input") -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Prepare and privatise the data, up to the point of scoring.
+
+    Args:
+        client (AlgorithmClient): The client to communicate with the vantage6 server.
+        df (pd.DataFrame): The DataFrame containing the data to be processed.
+        items_to_score (ItemsToScoreInput|ScoringPlan): Dictionary of modules to score and their respective domains
+                                                       and information specifying where the necessary responses can
+                                                       be found in the data, or its compiled scoring plan.
+        variables_to_stratify (StratificationDetails|list, optional): Dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
+        profiler (PipelineProfiler, optional): The profiler that records the performance of each stage.
+                                               Defaults to None - therewith not profiling.
+        epsilon (float, optional): The privacy budget of the differential privacy. Defaults to 1.
+        privacy_mechanism (str, optional): 'input' to apply differential privacy to the data, or 'output' if the
+                                           statistics are perturbed instead. Defaults to 'input'.
+
+    Returns:
+        tuple: The privatised DataFrame and the (aligned) stratum memberships.
+    """
+    profiler = profiler or PipelineProfiler()
+    plan = compile_scoring_plan(items_to_score)
+
+    # Collect the variables that are associated with requested scores and add the variables to stratify
+    variables_to_analyse = plan.item_variables + collect_stratification_variables(variables_to_stratify)
+
+    # Retrieve RDF/SPARQL data if its use is indicated in the data
+    df = _retrieve_rdf_data(df, variables_to_analyse, profiler)
+
+    # Mask unnecessary variables by removal - relevant, for example, with csv data
+    df = profiler.run("mask_unnecessary_variables", mask_unnecessary_variables, df, variables_to_analyse)
+
+    # Collect variable details from the scoring plan and add the variables to stratify details
+    variable_details = plan.item_details | compose_stratification_details(variables_to_stratify)
+
+    # Set datatypes for each variable
+    df = profiler.run("set_datatypes", set_datatypes, df, variable_details)
+
+    # Represent the items as single-byte integers and the variables to stratify as categories
+    df = profiler.run("compact_datatypes", compact_datatypes, df, plan.item_variables,
+                      stratification_variables=collect_stratification_variables(variables_to_stratify))
+
+    # Determine the strata of each row and retain only the rows that belong to any of them
+    memberships = profiler.run("compose_stratum_memberships", compose_stratum_memberships, df, variables_to_stratify)
+    in_any_stratum = memberships.any(axis=1).to_numpy()
+    df, memberships = df[in_any_stratum], memberships[in_any_stratum]
+
+    # Ensure that the sample size threshold is met
+    df = profiler.run("apply_sample_size_threshold", apply_sample_size_threshold, client, df, variables_to_analyse)
+
+    # Apply differential privacy (Laplace mechanism) within the public bounds of the variables unless the statistics
+    # are perturbed instead
+    if privacy_mechanism == "input":
+        df = profiler.run("apply_differential_privacy", privatise_data, df,
+                          plan.item_bounds | compose_stratification_bounds(variables_to_stratify), epsilon)
+
+    return df, memberships
+
+
+def _prepare_scored_data(client: AlgorithmClient, df: pd.DataFrame,
+                         items_to_score: Union[ItemsToScoreInput, ScoringPlan],
+                         variables_to_stratify: StrataDetails = None,
+                         use_cache: bool = False, scoring_backend: str = "default",
+                         profiler: PipelineProfiler = None, epsilon: float = DEFAULT_EPSILON,
+                         privacy_mechanism: str = "input") -> Tuple[pd.DataFrame, Dict[str, Any], pd.DataFrame]:
+    """
+    Prepare, privatise and score the data; the pipeline that is shared by all partial functions.
+
+    The data is loaded, privatised and scored once, regardless of the number of requested strata;
+    the stratum memberships of each row are determined before differential privacy is applied.
+
+    When the cache is used, the prepared data is stored on the node after the first round and loaded in the second.
+    The second round therewith reuses the same differentially private data rather than drawing fresh noise.
+
+    Args:
+        client (AlgorithmClient): The client to communicate with the vantage6 server.
+        df (pd.DataFrame): The DataFrame containing the data to be processed.
+        items_to_score (ItemsToScoreInput|ScoringPlan): Dictionary of modules to score and their respective domains
+                                                       and information specifying where the necessary responses can
+                                                       be found in the data, or its compiled scoring plan.
+        variables_to_stratify (StratificationDetails|list, optional): Dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
+        use_cache (bool, optional): Whether to use the node cache of prepared data. Defaults to False.
+        scoring_backend (str, optional): The scoring engine to use; 'default' for the scoring tables of the instrument
+                                         or 'numpy' for the vectorised engine. Defaults to 'default'.
+        profiler (PipelineProfiler, optional): The profiler that records the performance of each stage.
+                                               Defaults to None - therewith not profiling.
+        epsilon (float, optional): The privacy budget of the differential privacy. Defaults to 1.
+        privacy_mechanism (str, optional): 'input' to apply differential privacy to the data, or 'output' if the
+                                           statistics are perturbed instead. Defaults to 'input'.
+
+    Returns:
+        tuple: The scored DataFrame, the variable details of the scores and the (aligned) stratum memberships.
+    """
+    profiler = profiler or PipelineProfiler()
+
+    # Load the prepared data from the node cache if it is available; data that refers to a SPARQL endpoint is
+    # retrieved first, so that the cache is keyed on the data rather than on the endpoint
+    cache_key = None
+    plan = compile_scoring_plan(items_to_score)
+    if use_cache:
+        df = _retrieve_rdf_data(df, plan.item_variables + collect_stratification_variables(variables_to_stratify),
+                                profiler)
+        cache_key = compose_cache_key(df, plan.items_to_score, variables_to_stratify, scoring_backend=scoring_backend,
+                                      epsilon=epsilon, privacy_mechanism=privacy_mechanism)
+        cached_data = profiler.run("load_cached_data", load_cached_data, cache_key)
+        if cached_data is not None:
+            return cached_data
+
+    # Prepare and privatise the data
+    df, memberships = _prepare_privatised_data(client, df, plan, variables_to_stratify, profiler, epsilon,
+                                               privacy_mechanism)
+
+    # Perform scoring
+    if scoring_backend == "numpy":
+        df = profiler.run("score_hads_vectorised", score_hads_vectorised, df, plan)
+    else:
+        df = profiler.run("orchestrate_scoring", orchestrate_scoring, df, plan.items_to_score)
+
+    # Collect variable details for scores
+    variable_details = plan.score_details
+
+    # Set datatypes for each variable and represent the scores as single-byte integers
+    df = profiler.run("set_score_datatypes", set_datatypes, df, variable_details)
+    df = profiler.run("compact_score_datatypes", compact_datatypes, df, score_variables=list(variable_details))
+
+    # Store the prepared data so that subsequent rounds do not have to prepare it anew
+    if use_cache:
+        profiler.run("store_cached_data", store_cached_data, cache_key, df, variable_details, memberships)
+
+    return df, variable_details, memberships
+
+
+def _split_strata(df: pd.DataFrame, memberships: pd.DataFrame,
+                  items_to_score: Union[ItemsToScoreInput, ScoringPlan]) -> Dict[str, pd.DataFrame]:
+    """
+    Split the scored data into the requested strata, omitting strata that do not meet the sample size threshold.
+
+    The threshold is applied to the counts of the scores of each stratum, alike to the sufficient statistics of the
+    single round, so that both omit the same strata.
+
+    Args:
+        df (pd.DataFrame): The scored DataFrame.
+        memberships (pd.DataFrame): Boolean DataFrame, aligned with `df`, with a column per stratum label.
+        items_to_score (ItemsToScoreInput|ScoringPlan): Dictionary of modules to score and their respective domains
+                                                       and information specifying where the necessary responses can
+                                                       be found in the data, or its compiled scoring plan.
+
+    Returns:
+        dict: The scored DataFrame of each stratum that meets the threshold, by stratum label.
+
+    Raises:
+        PrivacyThresholdViolation: If none of the strata meets the threshold.
+    """
+    plan = compile_scoring_plan(items_to_score)
+
+    # Ensure that the sample size threshold is met after scoring
+    counts = count_stratified_rows(df, plan.score_details, memberships)
+    return {stratum: df[memberships[stratum].to_numpy()] for stratum in select_strata_meeting_threshold(counts)}
+
+
+@projected_data
 @algorithm_client
 def partial_hads_general_statistics(client: AlgorithmClient, df: pd.DataFrame, items_to_score: ItemsToScoreInput,
-                                    variables_to_stratify: StratificationDetails = None) -> Dict[str, str]:
+                                    variables_to_stratify: StrataDetails = None,
+                                    use_cache: bool = False, scoring_backend: str = "default",
+                                    profile: bool = False, epsilon: float = DEFAULT_EPSILON) -> Dict[str, str]:
     """
     Execute the partial algorithm for HADS scoring and general statistics computation.
 
@@ -51,7 +263,9 @@ def partial_hads_general_statistics(client: AlgorithmClient, df: pd.DataFrame, i
                                                                }
 
                                             }
-        variables_to_stratify (dict, optional): Dictionary of variables to stratify. Defaults to None.
+        variables_to_stratify (dict|list, optional): Dictionary of variables to stratify,
+                                                     or a list thereof to compute the statistics of several strata.
+                                                     Defaults to None.
                                                 Example:
                                                     {'Age':
                                                             {
@@ -59,71 +273,55 @@ def partial_hads_general_statistics(client: AlgorithmClient, df: pd.DataFrame, i
                                                             'datatype': 'int'
                                                             }
                                                     }
+        use_cache (bool, optional): Whether to store the prepared data in the node cache for the second round.
+                                    Defaults to False.
+        scoring_backend (str, optional): The scoring engine to use; 'default' or 'numpy'. Defaults to 'default'.
+        profile (bool, optional): Whether to record the wall time, CPU time and peak memory of each stage
+                                  and return these under 'performance'. Defaults to False.
+        epsilon (float, optional): The privacy budget of the differential privacy. Defaults to 1.
 
     Returns:
-        dict: A dictionary containing the computed general statistics.
+        dict: A dictionary containing the computed general statistics;
+              keyed by stratum label under 'strata' if a list of strata was requested.
     """
     safe_log("info",
              "Executing partial algorithm for HADS scoring and general statistics computation thereof.")
+    profiler = PipelineProfiler(profile)
 
-    # Collect the variables that are associated with requested scores
-    variables_to_analyse = collect_variable_info(items_to_score)
-
-    # Add the variables to stratify to the variables to analyse
-    if isinstance(variables_to_stratify, dict):
-        variables_to_analyse = variables_to_analyse + [variable_to_stratify for variable_to_stratify
-                                                       in variables_to_stratify.keys()]
-
-    # Retrieve RDF/SPARQL data if its use is indicated in the data - suboptimal solution, to be improved in the future
-    if "endpoint" in df.columns:
-        df = collect_sparql_data(variables_to_analyse, endpoint=df["endpoint"].iloc[0])
-
-    # Mask unnecessary variables by removal - relevant, for example, with csv data
-    df = mask_unnecessary_variables(df, variables_to_analyse)
-
-    # Collect variable details from scoring tables
-    variable_details = compose_variable_details(items_to_score, False)
+    # Compile the scoring plan once, so that every stage consumes the resolved specification
+    plan = profiler.run("compile_scoring_plan", compile_scoring_plan, items_to_score)
 
-    # Add the variables to stratify details to the variables to analyse details
-    if isinstance(variables_to_stratify, dict):
-        variable_details = variable_details | variables_to_stratify if variables_to_stratify else variable_details
-
-    # Set datatypes for each variable
-    df = set_datatypes(df, variable_details)
-
-    # Apply stratification if necessary
-    df = apply_data_stratification(df, variables_to_stratify)
-
-    # Ensure that the sample size threshold is met
-    df = apply_sample_size_threshold(client, df, variables_to_analyse)
-
-    # Apply differential privacy (Laplace mechanism as per default)
-    df = apply_differential_privacy(df, variables_to_analyse, epsilon=1.0, return_type='dataframe')
-
-    # Perform scoring
-    df = orchestrate_scoring(df, items_to_score)
-
-    # Collect variable details for scores
-    variable_details = compose_variable_details(items_to_score, True)
-
-    # Ensure that the sample size threshold is met after scoring
-    df = apply_sample_size_threshold(client, df, variables_to_analyse)
-
-    # Set datatypes for each variable
-    df = set_datatypes(df, variable_details)
+    # Prepare, privatise and score the data
+    df, variable_details, memberships = _prepare_scored_data(client, df, plan, variables_to_stratify,
+                                                             use_cache, scoring_backend, profiler, epsilon)
+    strata = profiler.run("split_strata", _split_strata, df, memberships, plan)
 
     # Compute general statistics
-    result = compute_local_general_statistics(df, variable_details)
+    if not isinstance(variables_to_stratify, list):
+        result = profiler.run("compute_local_general_statistics", compute_local_general_statistics,
+                              next(iter(strata.values())), variable_details)
+    else:
+        result = {"strata": {stratum: profiler.run("compute_local_general_statistics",
+                                                   compute_local_general_statistics, stratum_df, variable_details)
+                             for stratum, stratum_df in strata.items()}}
+
+    # Return the performance metrics of the stages alongside the result if requested
+    if profile:
+        result["performance"] = profiler.summarise()
 
     return result
 
 
-@data(1)
+@projected_data
 @algorithm_client
 def partial_hads_aggregate_adjusted_deviation(client: AlgorithmClient, df: pd.DataFrame,
                                               items_to_score: ItemsToScoreInput,
                                               numerical_aggregated_results: Dict[str, str],
-                                              variables_to_stratify: StratificationDetails = None) -> dict[str, str]:
+                                              variables_to_stratify: StrataDetails = None,
+                                              use_cache: bool = False,
+                                              scoring_backend: str = "default",
+                                              profile: bool = False,
+                                              epsilon: float = DEFAULT_EPSILON) -> dict[str, str]:
     """
     Execute the partial algorithm for HADS scoring and aggregate-adjusted deviation computation.
 
@@ -153,8 +351,10 @@ def partial_hads_aggregate_adjusted_deviation(client: AlgorithmClient, df: pd.Da
                                                                }
 
                                             }
-        numerical_aggregated_results (dict): Dictionary of numerical aggregated results.
-        variables_to_stratify (StratificationDetails, optional): Dictionary of variables to stratify. Defaults to None.
+        numerical_aggregated_results (dict): Dictionary of numerical aggregated results;
+                                             keyed by stratum label if a list of strata was requested.
+        variables_to_stratify (StratificationDetails|list, optional): Dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
                                                                 Example:
                                                                     {'Age':
                                                                             {
@@ -162,58 +362,504 @@ def partial_hads_aggregate_adjusted_deviation(client: AlgorithmClient, df: pd.Da
                                                                             'datatype': 'int'
                                                                             }
                                                                     }
+        use_cache (bool, optional): Whether to load the prepared data from the node cache of the first round.
+                                    Defaults to False.
+        scoring_backend (str, optional): The scoring engine to use; 'default' or 'numpy'. Defaults to 'default'.
+        profile (bool, optional): Whether to record the wall time, CPU time and peak memory of each stage
+                                  and return these under 'performance'. Defaults to False.
+        epsilon (float, optional): The privacy budget of the differential privacy. Defaults to 1.
 
     Returns:
-        dict: A dictionary containing the computed aggregate adjusted deviation.
+        dict: A dictionary containing the computed aggregate adjusted deviation;
+              keyed by stratum label under 'strata' if a list of strata was requested.
     """
     safe_log("info",
              "Executing partial algorithm to compute HADS scoring and aggregate adjusted deviation.")
+    profiler = PipelineProfiler(profile)
+
+    # Compile the scoring plan once, so that every stage consumes the resolved specification
+    plan = profiler.run("compile_scoring_plan", compile_scoring_plan, items_to_score)
 
-    # Collect the variables that are associated with requested scores
-    variables_to_analyse = collect_variable_info(items_to_score)
+    # Prepare, privatise and score the data
+    df, variable_details, memberships = _prepare_scored_data(client, df, plan, variables_to_stratify,
+                                                             use_cache, scoring_backend, profiler, epsilon)
+    strata = profiler.run("split_strata", _split_strata, df, memberships, plan)
 
-    # Add the variables to stratify to the variables to analyse
-    variables_to_analyse = variables_to_analyse + [variable_to_stratify for variable_to_stratify
-                                                   in variables_to_stratify.keys()]
+    # Compute aggregate-adjusted deviation
+    if not isinstance(variables_to_stratify, list):
+        result = profiler.run("compute_local_adjusted_deviation", compute_local_adjusted_deviation,
+                              next(iter(strata.values())), numerical_aggregated_results)
+    else:
+        result = {"strata": {stratum: profiler.run("compute_local_adjusted_deviation",
+                                                   compute_local_adjusted_deviation, stratum_df,
+                                                   numerical_aggregated_results[stratum])
+                             for stratum, stratum_df in strata.items() if stratum in numerical_aggregated_results}}
+
+    # Return the performance metrics of the stages alongside the result if requested
+    if profile:
+        result["performance"] = profiler.summarise()
 
-    # Retrieve RDF/SPARQL data if its use is indicated in the data - suboptimal solution, to be improved in the future
-    if "endpoint" in df.columns:
-        df = collect_sparql_data(variables_to_analyse, endpoint=df["endpoint"].iloc[0])
+    return result
+
+
+@projected_data
+@algorithm_client
+def partial_hads_sufficient_statistics(client: AlgorithmClient, df: pd.DataFrame, items_to_score: ItemsToScoreInput,
+                                       variables_to_stratify: StrataDetails = None,
+                                       scoring_backend: str = "default", profile: bool = False,
+                                       epsilon: float = DEFAULT_EPSILON,
+                                       privacy_mechanism: str = "input", workers: int = None,
+                                       result_encoding: str = "json") -> Dict[str, Any]:
+    """
+    Execute the partial algorithm for HADS scoring and sufficient statistics computation in a single round.
+
+    The returned moment sketches and score histograms are mergeable across organisations,
+    so that the central can derive the mean and (aggregate-adjusted) deviation without a second round.
+    Being mergeable, they can also be computed in parallel over shards of the rows, by several worker processes.
+
+    Args:
+        client (AlgorithmClient): The client to communicate with the vantage6 server.
+        df (pd.DataFrame): The DataFrame containing the data to be processed.
+        items_to_score (ItemsToScoreInput): Dictionary of modules to score and their respective domains and information
+                                           specifying where the necessary responses can be found in the data.
+                                           See `partial_hads_general_statistics` for an example.
+        variables_to_stratify (StratificationDetails|list, optional): Dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
+                                                                Example:
+                                                                    [{'Age': {'end': 39, 'datatype': 'int'}},
+                                                                     {'Age': {'start': 40, 'datatype': 'int'}}]
+        scoring_backend (str, optional): The scoring engine to use; 'default' or 'numpy'. Defaults to 'default'.
+        profile (bool, optional): Whether to record the wall time, CPU time and peak memory of each stage
+                                  and return these under 'performance'. Defaults to False.
+        epsilon (float, optional): The privacy budget of the differential privacy. Defaults to 1.
+        privacy_mechanism (str, optional): 'input' to apply differential privacy to the data, or 'output' to perturb
+                                           the sufficient statistics instead. Defaults to 'input'.
+        workers (int, optional): The number of processes that score the data in parallel.
+                                 Defaults to None - therewith using the 'HADS_WORKERS' environment variable,
+                                 or a single process if it is not set.
+        result_encoding (str, optional): 'json' to return the sufficient statistics as they are, or 'arrow' to
+                                         return them as a compact Arrow IPC stream. Defaults to 'json'.
+
+    Returns:
+        dict: A dictionary containing the sufficient statistics per stratum and score variable.
+    """
+    safe_log("info",
+             "Executing partial algorithm for HADS scoring and sufficient statistics computation thereof.")
+    profiler = PipelineProfiler(profile)
+    workers = collect_worker_count(workers)
+
+    # Compile the scoring plan once, so that every stage consumes the resolved specification
+    plan = profiler.run("compile_scoring_plan", compile_scoring_plan, items_to_score)
+
+    if workers > 1:
+        # Prepare and privatise the data, then score it and compute its sufficient statistics per shard of rows
+        df, memberships = _prepare_privatised_data(client, df, plan, variables_to_stratify, profiler,
+                                                   epsilon, privacy_mechanism)
+        statistics = profiler.run("compute_sharded_sufficient_statistics", compute_sharded_sufficient_statistics,
+                                  df, memberships, plan, workers, scoring_backend)
+    else:
+        # Prepare, privatise and score the data
+        df, variable_details, memberships = _prepare_scored_data(client, df, plan, variables_to_stratify,
+                                                                 scoring_backend=scoring_backend, profiler=profiler,
+                                                                 epsilon=epsilon,
+                                                                 privacy_mechanism=privacy_mechanism)
+
+        # Compute the mergeable sufficient statistics and score histograms of all strata at once
+        statistics = profiler.run("compute_stratified_sufficient_statistics",
+                                  compute_stratified_sufficient_statistics, df, variable_details, memberships,
+                                  MAXIMUM_SCALE_SCORE)
+
+    # Ensure that the sample size threshold is met by each stratum that is shared
+    statistics = select_strata_meeting_threshold(statistics)
+
+    # Perturb the sufficient statistics rather than the data if requested
+    if privacy_mechanism == "output":
+        statistics = profiler.run("perturb_sufficient_statistics", perturb_sufficient_statistics, statistics,
+                                  epsilon, MAXIMUM_SCALE_SCORE,
+                                  release=[items_to_score, variables_to_stratify, scoring_backend],
+                                  dataset_keys=compose_dataset_keys(df))
+    result = profiler.run("encode_result", encode_result, {"sufficient_statistics": statistics}, result_encoding)
+
+    # Return the performance metrics of the stages alongside the result if requested
+    if profile:
+        result["performance"] = profiler.summarise()
+
+    return result
 
-    # Mask unnecessary variables by removal - relevant, for example, with csv data
-    df = mask_unnecessary_variables(df, variables_to_analyse)
 
-    # Collect variable details from scoring tables
-    variable_details = compose_variable_details(items_to_score, False)
+def _score_data_chunk(df: pd.DataFrame, items_to_score: Union[ItemsToScoreInput, ScoringPlan],
+                      variable_details: Dict[str, Any], score_details: Dict[str, Any],
+                      variables_to_stratify: StrataDetails = None, scoring_backend: str = "default",
+                      profiler: PipelineProfiler = None, epsilon: float = DEFAULT_EPSILON,
+                      privacy_mechanism: str = "input",
+                      dataset_keys: Tuple[str, str] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Prepare, privatise and score a single batch of data.
+
+    The sample size threshold is not applied to a batch, but to the statistics accumulated over all batches.
+
+    Args:
+        df (pd.DataFrame): The batch of data, containing only the variables to analyse.
+        items_to_score (ItemsToScoreInput|ScoringPlan): Dictionary of modules to score and their respective domains
+                                                       and information specifying where the necessary responses can
+                                                       be found in the data, or its compiled scoring plan.
+        variable_details (dict): The variable details of the items and the variables to stratify.
+        score_details (dict): The variable details of the scores.
+        variables_to_stratify (StratificationDetails|list, optional): Dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
+        scoring_backend (str, optional): The scoring engine to use; 'default' or 'numpy'. Defaults to 'default'.
+        profiler (PipelineProfiler, optional): The profiler that records the performance of each stage.
+                                               Defaults to None - therewith not profiling.
+        epsilon (float, optional): The privacy budget of the differential privacy. Defaults to 1.
+        privacy_mechanism (str, optional): 'input' to apply differential privacy to the batch, or 'output' if the
+                                           statistics are perturbed instead. Defaults to 'input'.
+        dataset_keys (tuple, optional): The keys of the dataset and its version. Defaults to None.
 
-    # Add the variables to stratify details to the variables to analyse details
-    variable_details = variable_details | variables_to_stratify
+    Returns:
+        tuple: The scored batch and the (aligned) stratum memberships of its rows.
+    """
+    profiler = profiler or PipelineProfiler()
+    plan = compile_scoring_plan(items_to_score)
 
     # Set datatypes for each variable
-    df = set_datatypes(df, variable_details)
+    df = profiler.run("set_datatypes", set_datatypes, df, variable_details)
 
-    # Apply stratification if necessary
-    df = apply_data_stratification(df, variables_to_stratify)
+    # Represent the items as single-byte integers and the variables to stratify as categories
+    df = profiler.run("compact_datatypes", compact_datatypes, df, plan.item_variables,
+                      stratification_variables=collect_stratification_variables(variables_to_stratify))
 
-    # Ensure that the sample size threshold is met
-    df = apply_sample_size_threshold(client, df, variables_to_analyse)
+    # Determine the strata of each row and retain only the rows that belong to any of them
+    memberships = profiler.run("compose_stratum_memberships", compose_stratum_memberships, df, variables_to_stratify)
+    in_any_stratum = memberships.any(axis=1).to_numpy()
+    df, memberships = df[in_any_stratum], memberships[in_any_stratum]
 
-    # Apply differential privacy (Laplace mechanism as per default)
-    df = apply_differential_privacy(df, variables_to_analyse, epsilon=1.0, return_type='dataframe')
+    # Apply differential privacy (Laplace mechanism) within the public bounds of the variables unless the statistics
+    # are perturbed instead
+    if privacy_mechanism == "input":
+        df = profiler.run("apply_differential_privacy", privatise_data, df,
+                          plan.item_bounds | compose_stratification_bounds(variables_to_stratify), epsilon,
+                          dataset_keys)
 
     # Perform scoring
-    df = orchestrate_scoring(df, items_to_score)
+    if scoring_backend == "numpy":
+        df = profiler.run("score_hads_vectorised", score_hads_vectorised, df, plan)
+    else:
+        df = profiler.run("orchestrate_scoring", orchestrate_scoring, df, plan.items_to_score)
+
+    # Set datatypes for each score and represent the scores as single-byte integers
+    df = profiler.run("set_score_datatypes", set_datatypes, df, score_details)
+    return profiler.run("compact_score_datatypes", compact_datatypes, df, score_variables=list(score_details)), \
+        memberships
+
+
+@algorithm_client
+def partial_hads_chunked_sufficient_statistics(client: AlgorithmClient, items_to_score: ItemsToScoreInput,
+                                               variables_to_stratify: StrataDetails = None,
+                                               chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                               scoring_backend: str = "default",
+                                               concurrent_pages: int = DEFAULT_CONCURRENT_PAGES,
+                                               profile: bool = False, epsilon: float = DEFAULT_EPSILON,
+                                               privacy_mechanism: str = "input",
+                                               result_encoding: str = "json",
+                                               incremental: bool = False) -> Dict[str, Any]:
+    """
+    Execute the partial algorithm for HADS scoring and sufficient statistics computation in fixed-size batches.
+
+    Contrary to the other partial functions, the database is not loaded as a whole;
+    csv and parquet databases are read in batches,
+    and the query of SPARQL databases is retrieved in pages.
+    Databases for which the node configured preprocessing are the exception, as the preprocessing applies to the
+    data as a whole; these are loaded by `@data(1)` and scored in batches thereafter, always anew.
+    These are scored and accumulated one at a time,
+    so that the memory usage is bounded by the batch size rather than by the size of the database.
+
+    In an incremental analysis, the sufficient statistics of the scored rows are stored on the node along with a
+    watermark of the database, so that a subsequent analysis only scores the rows that were appended since and merges
+    their statistics with the stored ones; the sample size threshold and output perturbation are applied to the
+    statistics of all rows.
+
+    Args:
+        client (AlgorithmClient): The client to communicate with the vantage6 server.
+        items_to_score (ItemsToScoreInput): Dictionary of modules to score and their respective domains and information
+                                           specifying where the necessary responses can be found in the data.
+                                           See `partial_hads_general_statistics` for an example.
+        variables_to_stratify (StratificationDetails|list, optional): Dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
+        chunk_size (int, optional): The maximum number of rows per batch or page. Defaults to 100000.
+        scoring_backend (str, optional): The scoring engine to use; 'default' or 'numpy'. Defaults to 'default'.
+        concurrent_pages (int, optional): The number of SPARQL pages to fetch concurrently. Defaults to 4.
+        profile (bool, optional): Whether to record the wall time, CPU time and peak memory of each stage,
+                                  summed over the batches, and return these under 'performance'. Defaults to False.
+        epsilon (float, optional): The privacy budget of the differential privacy. Defaults to 1.
+        privacy_mechanism (str, optional): 'input' to apply differential privacy to the data, or 'output' to perturb
+                                           the sufficient statistics instead. Defaults to 'input'.
+        result_encoding (str, optional): 'json' to return the sufficient statistics as they are, or 'arrow' to
+                                         return them as a compact Arrow IPC stream. Defaults to 'json'.
+        incremental (bool, optional): Whether to only score the rows that were appended to the database since the
+                                      previous incremental analysis with the same arguments, for which the
+                                      'HADS_INCREMENTAL_STORE' environment variable of the node is to point to a
+                                      persistent directory. Defaults to False.
+
+    Returns:
+        dict: A dictionary containing the sufficient statistics per stratum and score variable.
+    """
+    safe_log("info",
+             "Executing partial algorithm for chunked HADS scoring and sufficient statistics computation thereof.")
+    profiler = PipelineProfiler(profile)
+
+    # Compile the scoring plan once, so that every batch consumes the resolved specification
+    plan = profiler.run("compile_scoring_plan", compile_scoring_plan, items_to_score)
+
+    # Collect the variables that are associated with requested scores and add the variables to stratify
+    variables_to_analyse = plan.item_variables + collect_stratification_variables(variables_to_stratify)
+
+    # Collect variable details from the scoring plan and add the variables to stratify details
+    variable_details = plan.item_details | compose_stratification_details(variables_to_stratify)
 
     # Collect variable details for scores
-    variable_details = compose_variable_details(items_to_score, True)
+    score_details = plan.score_details
+
+    # Page the SPARQL endpoint that the database refers to if it indicates RDF data, unless the node configured
+    # preprocessing, which may alter or reorder any of the rows and thus requires the data to be loaded as a whole
+    preprocessed = collect_database_preprocessing() is not None
+    database_uri, database_type, query = collect_database_details()
+    if not preprocessed:
+        database_uri, database_type, query = resolve_rdf_database(database_uri, database_type, query)
+    dataset_keys = compose_dataset_keys()
+    statistics, start_row = {}, 0
+    database_rows = count_database_rows(database_uri, database_type)
+
+    if preprocessed and incremental:
+        safe_log("warning", "The node configured preprocessing of the database; all rows of the dataset will be "
+                            "scored.")
+
+    # Continue from the stored state of the previous incremental analysis if rows were only appended since
+    incremental_directory = collect_incremental_store_directory() if incremental and not preprocessed else None
+    if incremental_directory:
+        incremental_key = compose_incremental_key((database_uri, database_type, query), items_to_score=items_to_score,
+                                                  variables_to_stratify=variables_to_stratify,
+                                                  scoring_backend=scoring_backend, epsilon=epsilon,
+                                                  privacy_mechanism=privacy_mechanism)
+        watermark = compose_watermark(database_uri, database_type)
+        state = profiler.run("load_incremental_state", load_incremental_state, incremental_directory, incremental_key)
+        if state is not None and is_appended(database_uri, database_type, state["watermark"]):
+            statistics, start_row = state["sufficient_statistics"], state["watermark"]["rows"]
+            safe_log("info", f"Continuing the incremental analysis from row {start_row}.")
+        elif state is not None:
+            safe_log("warning", "The database was altered other than by appending rows since the previous incremental "
+                                "analysis; all rows will be scored.")
+
+    # Score each batch and accumulate its sufficient statistics; unnecessary variables are never read,
+    # nor is a database file that did not change since the previous incremental analysis
+    if incremental_directory and start_row and is_unchanged(database_uri, database_type, state["watermark"]):
+        chunks = iter(())
+    elif preprocessed:
+        chunks = iterate_preprocessed_data_chunks(chunk_size, variables_to_analyse)
+    else:
+        # Seek past the lines of a csv file up to the stored watermark, and read those up to the new one
+        byte_range = None
+        if incremental_directory and watermark.get("offset") is not None:
+            byte_range = (state["watermark"]["offset"] if start_row else 0, watermark["offset"])
+        chunks = iterate_data_chunks(database_uri, database_type, chunk_size, variables_to_analyse, query,
+                                     concurrent_pages, variables_to_stratify, start_row, byte_range)
+    read_rows = 0
+    while (chunk := profiler.run("read_data_chunk", next, chunks, None)) is not None:
+        read_rows += len(chunk)
+        chunk, memberships = _score_data_chunk(chunk, plan, variable_details, score_details, variables_to_stratify,
+                                               scoring_backend, profiler, epsilon, privacy_mechanism, dataset_keys)
+        chunk_statistics = profiler.run("compute_stratified_sufficient_statistics",
+                                        compute_stratified_sufficient_statistics, chunk, score_details, memberships,
+                                        MAXIMUM_SCALE_SCORE)
+        statistics = merge_stratified_sufficient_statistics(statistics, chunk_statistics)
+
+    # Store the statistics of all rows up to the new watermark; the batches of databases of which the rows can be
+    # counted from their metadata may be stratified by the reader, hence the read rows are only counted otherwise
+    if incremental_directory:
+        rows = database_rows if database_rows is not None else start_row + read_rows
+        profiler.run("store_incremental_state", store_incremental_state, incremental_directory, incremental_key,
+                     watermark | {"rows": rows}, statistics)
+
+    # Ensure that the sample size threshold is met by the accumulated statistics of each stratum that is shared
+    statistics = select_strata_meeting_threshold(statistics)
+
+    # Perturb the accumulated sufficient statistics rather than the batches if requested
+    if privacy_mechanism == "output":
+        statistics = profiler.run("perturb_sufficient_statistics", perturb_sufficient_statistics, statistics,
+                                  epsilon, MAXIMUM_SCALE_SCORE,
+                                  release=[items_to_score, variables_to_stratify, scoring_backend],
+                                  dataset_keys=dataset_keys)
+    result = profiler.run("encode_result", encode_result, {"sufficient_statistics": statistics}, result_encoding)
+
+    # Return the performance metrics of the stages alongside the result if requested
+    if profile:
+        result["performance"] = profiler.summarise()
 
-    # Ensure that the sample size threshold is met after scoring
-    df = apply_sample_size_threshold(client, df, variables_to_analyse)
+    return result
+
+
+def _prepare_instrument_data(client: AlgorithmClient, df: pd.DataFrame, instruments: InstrumentsInput,
+                             variables_to_stratify: StrataDetails = None, profiler: PipelineProfiler = None,
+                             epsilon: float = DEFAULT_EPSILON,
+                             privacy_mechanism: str = "input") -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Prepare and privatise the union of the variables of several instruments, so that each can be scored from it.
+
+    Args:
+        client (AlgorithmClient): The client to communicate with the vantage6 server.
+        df (pd.DataFrame): The DataFrame containing the data to be processed.
+        instruments (InstrumentsInput): The specification of each instrument to score, by instrument name.
+        variables_to_stratify (StratificationDetails|list, optional): Dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
+        profiler (PipelineProfiler, optional): The profiler that records the performance of each stage.
+                                               Defaults to None - therewith not profiling.
+        epsilon (float, optional): The privacy budget of the differential privacy. Defaults to 1.
+        privacy_mechanism (str, optional): 'input' to apply differential privacy to the data, or 'output' if the
+                                           statistics are perturbed instead. Defaults to 'input'.
+
+    Returns:
+        tuple: The privatised DataFrame and the (aligned) stratum memberships.
+    """
+    profiler = profiler or PipelineProfiler()
+
+    # Collect the variables that are associated with the requested scores of all instruments and add the variables
+    # to stratify
+    variables_to_analyse = collect_instrument_variables(instruments) + \
+        collect_stratification_variables(variables_to_stratify)
+
+    # Retrieve RDF/SPARQL data if its use is indicated in the data
+    df = _retrieve_rdf_data(df, variables_to_analyse, profiler)
+
+    # Mask unnecessary variables by removal - relevant, for example, with csv data
+    df = profiler.run("mask_unnecessary_variables", mask_unnecessary_variables, df, variables_to_analyse)
+
+    # Collect variable details from the scoring tables of all instruments and add the variables to stratify details
+    variable_details = compose_instrument_details(instruments) | compose_stratification_details(variables_to_stratify)
 
     # Set datatypes for each variable
-    df = set_datatypes(df, variable_details)
+    df = profiler.run("set_datatypes", set_datatypes, df, variable_details)
 
-    # Compute aggregate-adjusted deviation
-    result = compute_local_adjusted_deviation(df, numerical_aggregated_results)
+    # Represent the items as single-byte integers and the variables to stratify as categories
+    df = profiler.run("compact_datatypes", compact_datatypes, df, collect_instrument_variables(instruments),
+                      stratification_variables=collect_stratification_variables(variables_to_stratify))
+
+    # Determine the strata of each row and retain only the rows that belong to any of them
+    memberships = profiler.run("compose_stratum_memberships", compose_stratum_memberships, df, variables_to_stratify)
+    in_any_stratum = memberships.any(axis=1).to_numpy()
+    df, memberships = df[in_any_stratum], memberships[in_any_stratum]
+
+    # Ensure that the sample size threshold is met
+    df = profiler.run("apply_sample_size_threshold", apply_sample_size_threshold, client, df, variables_to_analyse)
+
+    # Apply differential privacy (Laplace mechanism) once to the variables of all instruments, within their public
+    # bounds, unless the statistics are perturbed instead
+    if privacy_mechanism == "input":
+        df = profiler.run("apply_differential_privacy", privatise_data, df,
+                          compose_instrument_bounds(instruments) | compose_stratification_bounds(variables_to_stratify),
+                          epsilon)
+
+    return df, memberships
+
+
+@projected_data
+@algorithm_client
+def partial_multi_instrument_sufficient_statistics(client: AlgorithmClient, df: pd.DataFrame,
+                                                   instruments: InstrumentsInput,
+                                                   variables_to_stratify: StrataDetails = None,
+                                                   scoring_backend: str = "default",
+                                                   profile: bool = False,
+                                                   epsilon: float = DEFAULT_EPSILON,
+                                                   privacy_mechanism: str = "input",
+                                                   result_encoding: str = "json") -> Dict[str, Any]:
+    """
+    Execute the partial algorithm for the scoring of several instruments and their sufficient statistics computation.
+
+    The data is loaded and privatised once for the union of the variables of all instruments,
+    after which the scoring tables of each instrument are applied to the shared DataFrame.
+    If the sufficient statistics are perturbed rather than the data, the privacy budget is divided evenly over the
+    instruments.
+
+    Args:
+        client (AlgorithmClient): The client to communicate with the vantage6 server.
+        df (pd.DataFrame): The DataFrame containing the data to be processed.
+        instruments (InstrumentsInput): The specification of each instrument to score, by instrument name;
+                                        each in the structure of its own 'items_to_score'.
+                                        Example:
+                                            {'hads': {"items_to_score": {"scale_to_score": ["anxiety"],
+                                                                         "variable_info": {...}}},
+                                             'eortc_qlq_c30': {"items_to_score": {...}}}
+        variables_to_stratify (StratificationDetails|list, optional): Dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
+        scoring_backend (str, optional): The scoring engine to use for HADS; 'default' or 'numpy'.
+                                         Defaults to 'default'.
+        profile (bool, optional): Whether to record the wall time, CPU time and peak memory of each stage
+                                  and return these under 'performance'. Defaults to False.
+        epsilon (float, optional): The privacy budget of the differential privacy. Defaults to 1.
+        privacy_mechanism (str, optional): 'input' to apply differential privacy to the data, or 'output' to perturb
+                                           the sufficient statistics of each instrument instead, which withholds their
+                                           minimum and maximum. Defaults to 'input'.
+        result_encoding (str, optional): 'json' to return the sufficient statistics as they are, or 'arrow' to
+                                         return them as a compact Arrow IPC stream. Defaults to 'json'.
+
+    Returns:
+        dict: A dictionary containing the sufficient statistics per stratum and score variable, by instrument name.
+
+    Raises:
+        PrivacyThresholdViolation: If none of the instruments meets the sample size threshold in any stratum.
+    """
+    safe_log("info",
+             "Executing partial algorithm for the scoring of several instruments and sufficient statistics "
+             "computation thereof.")
+    profiler = PipelineProfiler(profile)
+    modules = collect_instruments(instruments)
+
+    # Prepare and privatise the data of all instruments at once
+    df, memberships = _prepare_instrument_data(client, df, instruments, variables_to_stratify, profiler, epsilon,
+                                               privacy_mechanism)
+    dataset_keys = compose_dataset_keys(df) if privacy_mechanism == "output" else None
+
+    result = {"instruments": {}}
+    for instrument, items_to_score in instruments.items():
+        # Score the instrument on a shallow copy, so that its score columns do not accumulate in the shared DataFrame
+        if instrument == "hads" and scoring_backend == "numpy":
+            scored = profiler.run("score_hads_vectorised", score_hads_vectorised, df.copy(deep=False), items_to_score)
+        else:
+            scored = profiler.run(f"score_{instrument}", modules[instrument].orchestrate_scoring, df.copy(deep=False),
+                                  items_to_score)
+
+        # Collect variable details for scores, set their datatypes and represent them compactly
+        score_details = modules[instrument].compose_variable_details(items_to_score, True)
+        scored = profiler.run("set_score_datatypes", set_datatypes, scored, score_details)
+        scored = profiler.run("compact_score_datatypes", compact_datatypes, scored, score_variables=list(score_details))
+
+        # Compute the mergeable sufficient statistics of all strata at once
+        statistics = profiler.run("compute_stratified_sufficient_statistics",
+                                  compute_stratified_sufficient_statistics, scored, score_details, memberships)
+
+        # Ensure that the sample size threshold is met by each stratum that is shared
+        try:
+            statistics = select_strata_meeting_threshold(statistics)
+        except PrivacyThresholdViolation:
+            safe_log("warning", f"Instrument '{instrument}' did not meet the sample size threshold; it is omitted.")
+            continue
+
+        # Perturb the sufficient statistics rather than the data if requested, spending an equal share of the budget
+        # on each instrument
+        if privacy_mechanism == "output":
+            statistics = profiler.run("perturb_sufficient_statistics", perturb_sufficient_statistics, statistics,
+                                      epsilon / len(instruments),
+                                      compose_instrument_score_bound(instrument, items_to_score),
+                                      release=[instrument, items_to_score, variables_to_stratify, scoring_backend],
+                                      dataset_keys=dataset_keys)
+        result["instruments"][instrument] = {"sufficient_statistics": statistics}
+
+    if not result["instruments"]:
+        raise PrivacyThresholdViolation("The sample size threshold was not met; no statistics are shared.")
+
+    # Encode the sufficient statistics of each instrument compactly if requested
+    result = profiler.run("encode_result", encode_result, result, result_encoding)
+
+    # Return the performance metrics of the stages alongside the result if requested
+    if profile:
+        result["performance"] = profiler.summarise()
 
     return result
@@ -0,0 +1,103 @@
+import time
+import tracemalloc
+
+import pandas as pd
+
+from typing import Any, Callable, Dict
+
+# General federated algorithm functions
+from vantage6_strongaya_general.miscellaneous import safe_log
+
+
+def _count_rows(output: Any) -> Any:
+    """
+    Count the rows of the output of a pipeline stage, if it holds a DataFrame.
+
+    Args:
+        output (Any): The output of the stage; a DataFrame or a tuple of which the first element is a DataFrame.
+
+    Returns:
+        int|None: The number of rows, or None if the output does not hold a DataFrame.
+    """
+    if isinstance(output, tuple) and output:
+        output = output[0]
+    return len(output) if isinstance(output, pd.DataFrame) else None
+
+
+class PipelineProfiler:
+    """
+    Opt-in profiler of the stages of the partial pipeline.
+
+    For each stage, the wall time, CPU time and peak memory (as traced by tracemalloc) are logged and accumulated;
+    stages that are executed repeatedly, such as those of chunked execution, are summed.
+    The number of output rows of each stage describes the dataset exactly, and therewith circumvents the differential
+    privacy that the partial functions apply; it is therefore only recorded if explicitly requested, such as when
+    the pipeline is benchmarked on synthetic data.
+    When the profiler is disabled, the stages are executed without any overhead.
+    """
+
+    def __init__(self, enabled: bool = False, count_rows: bool = False):
+        """
+        Args:
+            enabled (bool, optional): Whether to profile the stages. Defaults to False.
+            count_rows (bool, optional): Whether to also record the number of output rows of each stage;
+                                         never to be shared when differential privacy applies. Defaults to False.
+        """
+        self.enabled = enabled
+        self.count_rows = count_rows
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._start = time.perf_counter()
+        self._started_tracing = enabled and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def run(self, stage: str, function: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Execute a stage of the pipeline and record its performance metrics.
+
+        Args:
+            stage (str): The name of the stage.
+            function (callable): The function that performs the stage.
+            *args: The positional arguments of the function.
+            **kwargs: The keyword arguments of the function.
+
+        Returns:
+            Any: The output of the function.
+        """
+        if not self.enabled:
+            return function(*args, **kwargs)
+
+        tracemalloc.reset_peak()
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+
+        output = function(*args, **kwargs)
+
+        wall_time, cpu_time = time.perf_counter() - start_wall, time.process_time() - start_cpu
+        _, peak_memory = tracemalloc.get_traced_memory()
+        rows = _count_rows(output) if self.count_rows else None
+
+        metrics = self.stages.setdefault(stage, {"calls": 0, "wall_time": 0.0, "cpu_time": 0.0, "peak_memory": 0})
+        metrics["calls"] += 1
+        metrics["wall_time"] += wall_time
+        metrics["cpu_time"] += cpu_time
+        metrics["peak_memory"] = max(metrics["peak_memory"], peak_memory)
+        if rows is not None:
+            metrics["rows"] = metrics.get("rows", 0) + rows
+
+        safe_log("info", f"Stage '{stage}' took {wall_time:.3f} s wall time and {cpu_time:.3f} s CPU time, "
+                         f"with a peak memory of {peak_memory / 2 ** 20:.1f} MiB"
+                         f"{f' and {rows} rows' if rows is not None else ''}.")
+        return output
+
+    def summarise(self) -> Dict[str, Any]:
+        """
+        Summarise the recorded performance metrics and stop tracing memory allocations.
+
+        Returns:
+            dict: The total wall time and the performance metrics of each stage.
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+        return {"wall_time": time.perf_counter() - self._start, "stages": self.stages}
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+
+from typing import Any, Dict, Optional
+
+# General federated algorithm functions
+from vantage6_strongaya_general.miscellaneous import safe_log
+
+# HADS scoring algorithm data sources
+from .data_sources import collect_database_details, collect_database_preprocessing
+
+RESULT_STORE_FILE_EXTENSION = ".json"
+
+# The version of the format of the stored results; results of a previous format are not reused
+RESULT_FORMAT_VERSION = 2
+
+
+def collect_result_store_directory() -> Optional[str]:
+    """
+    Collect the directory in which the central stores the results of the organisations.
+
+    The directory should persist across tasks; it is therefore to be mounted in the node that executes the central
+    and specified through the 'HADS_RESULT_STORE' environment variable.
+
+    Returns:
+        str|None: The path of the result store, or None if no result store is configured.
+    """
+    directory = os.environ.get("HADS_RESULT_STORE")
+    if not directory:
+        safe_log("warning", "No result store is configured; the results of all organisations will be computed anew.")
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def compose_input_hash(input_: Dict[str, Any]) -> str:
+    """
+    Compute the hash of the input of a subtask, so that results are only reused for the same method and arguments.
+
+    Args:
+        input_ (dict): The input of the subtask, containing the method and its keyword arguments.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest of the input.
+    """
+    return hashlib.sha256(json.dumps([RESULT_FORMAT_VERSION, input_], sort_keys=True,
+                                     default=str).encode()).hexdigest()
+
+
+def _compose_result_path(directory: str, organisation_id: int, input_hash: str) -> str:
+    """
+    Compose the path of the stored result of an organisation.
+
+    Args:
+        directory (str): The path of the result store.
+        organisation_id (int): The ID of the organisation.
+        input_hash (str): The hash of the input of the subtask.
+
+    Returns:
+        str: The path of the stored result.
+    """
+    return os.path.join(directory, f"{organisation_id}-{input_hash}{RESULT_STORE_FILE_EXTENSION}")
+
+
+def load_stored_result(directory: str, organisation_id: int, dataset_version: Optional[str],
+                       input_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Load the stored result of an organisation, provided that it was computed on the current version of its dataset.
+
+    Args:
+        directory (str): The path of the result store.
+        organisation_id (int): The ID of the organisation.
+        dataset_version (str|None): The current version of the organisation's dataset; None if it is unknown.
+        input_hash (str): The hash of the input of the subtask.
+
+    Returns:
+        dict|None: The stored result, or None if it is missing or stale.
+    """
+    path = _compose_result_path(directory, organisation_id, input_hash)
+    if dataset_version is None or not os.path.exists(path):
+        return None
+
+    try:
+        with open(path) as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        safe_log("warning", f"The stored result of organisation {organisation_id} could not be read; "
+                            f"it will be computed anew.")
+        return None
+
+    if entry["dataset_version"] != dataset_version:
+        return None
+
+    return entry["result"]
+
+
+def store_result(directory: str, organisation_id: int, dataset_version: Optional[str], input_hash: str,
+                 result: Dict[str, Any]) -> None:
+    """
+    Store the result of an organisation, replacing any result that was computed on a previous version of its dataset.
+
+    Args:
+        directory (str): The path of the result store.
+        organisation_id (int): The ID of the organisation.
+        dataset_version (str|None): The version of the organisation's dataset; results of unknown versions are not
+                                    stored.
+        input_hash (str): The hash of the input of the subtask.
+        result (dict): The result of the organisation.
+    """
+    if dataset_version is None or not result:
+        return
+
+    path = _compose_result_path(directory, organisation_id, input_hash)
+
+    # Write to a temporary file first so that a concurrent reader never encounters a partial entry
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "w") as file:
+        json.dump({"dataset_version": dataset_version, "result": result}, file)
+    os.replace(temporary_path, path)
+
+
+def compose_dataset_version() -> Optional[str]:
+    """
+    Determine the version of the node's dataset without reading it.
+
+    The version of a file-based database is derived from its size and modification time, and from the preprocessing
+    that the node configured for it; the version of other databases, such as SPARQL endpoints, is unknown.
+
+    Returns:
+        str|None: The version of the dataset, or None if it is unknown.
+    """
+    try:
+        database_uri, database_type, query = collect_database_details()
+        status = os.stat(database_uri)
+    except (KeyError, OSError):
+        return None
+
+    version = json.dumps([database_type, query, status.st_size, status.st_mtime_ns, collect_database_preprocessing()])
+    return hashlib.sha256(version.encode()).hexdigest()
+
+
+def partial_hads_dataset_version() -> Dict[str, Any]:
+    """
+    Execute the partial algorithm that reports the version of the dataset, without reading it,
+    so that the central can tell whether a stored result of this organisation is stale.
+
+    Returns:
+        dict: A dictionary containing the 'dataset_version'; None if it is unknown, such as for SPARQL endpoints.
+    """
+    safe_log("info", "Executing partial algorithm to determine the version of the dataset.")
+
+    return {"dataset_version": compose_dataset_version()}
@@ -0,0 +1,185 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from functools import cached_property, lru_cache
+from typing import Any, Dict, List, Tuple, Union
+
+# HADS scoring algorithm functions
+from vantage6_strongaya_instruments_licenced.proms.hads_scoring import collect_variable_info, \
+    compose_variable_details, ItemsToScoreInput
+
+SCORING_BACKENDS = ("default", "numpy")
+
+# Questions per HADS subscale, numbered as in the questionnaire
+HADS_SCALES = {"anxiety": (1, 3, 5, 7, 9, 11, 13),
+               "depression": (2, 4, 6, 8, 10, 12, 14)}
+
+# Questions of which the first response option carries the highest score
+REVERSE_SCORED_QUESTIONS = (1, 3, 5, 6, 8, 10, 11, 13)
+
+NUMBER_OF_QUESTIONS = 14
+MAXIMUM_ITEM_SCORE = 3
+MAXIMUM_MISSING_ITEMS = 1
+
+# The largest score of a subscale, i.e. of seven items that each score at most three
+MAXIMUM_SCALE_SCORE = len(HADS_SCALES["anxiety"]) * MAXIMUM_ITEM_SCORE
+
+# The clinical severity bands of a subscale score, as inclusive score ranges
+HADS_SEVERITY_BANDS = {"normal": (0, 7),
+                       "borderline": (8, 10),
+                       "abnormal": (11, MAXIMUM_SCALE_SCORE)}
+
+# The number of compiled scoring plans that are retained in memory, evicting the least recently used ones
+MAXIMUM_SCORING_PLANS = 32
+
+
+class ScoringPlan:
+    """
+    The scoring of a HADS specification, resolved once from `items_to_score`.
+
+    The plan holds the item and score variables with their details (and therewith datatypes) as provided by the
+    scoring tables, the column of each question, the reverse-scored questions and the subscale masks,
+    so that the stages of the partial functions consume these rather than re-derive them from the raw specification.
+    """
+
+    def __init__(self, items_to_score: ItemsToScoreInput):
+        """
+        Args:
+            items_to_score (ItemsToScoreInput): Dictionary of scales and information specifying where the necessary
+                                               responses can be found in the data.
+        """
+        self.items_to_score = items_to_score
+        self.item_variables: List[str] = collect_variable_info(items_to_score)
+        self.item_details: Dict[str, Any] = compose_variable_details(items_to_score, False)
+        self.score_details: Dict[str, Any] = compose_variable_details(items_to_score, True)
+
+        # The name of the score column of each requested scale, as used by the scoring tables
+        self.score_columns: Dict[str, str] = {
+            scale: next((variable for variable in self.score_details if scale in variable.lower()), scale)
+            for scale in items_to_score["items_to_score"]["scale_to_score"]}
+        self.scales = list(self.score_columns)
+
+        # The column of each question in order of the questionnaire, and the positions of the reverse-scored questions
+        variable_info = items_to_score["items_to_score"]["variable_info"]
+        self.question_columns = [variable_info.get(f"question_{question}")
+                                 for question in range(1, NUMBER_OF_QUESTIONS + 1)]
+        self.reverse_scored = np.array(REVERSE_SCORED_QUESTIONS) - 1
+
+    @cached_property
+    def item_bounds(self) -> Dict[str, Tuple[float, float]]:
+        """The public range of the response options of each item variable, as used by the differential privacy."""
+        return {variable: (0, MAXIMUM_ITEM_SCORE) for variable in self.item_variables}
+
+    @cached_property
+    def scale_masks(self) -> np.ndarray:
+        """The uint8 matrix of questions by requested subscales; only resolved if the data is scored vectorised."""
+        return compose_scale_masks(self.scales)
+
+
+def compile_scoring_plan(items_to_score: Union[ItemsToScoreInput, ScoringPlan]) -> ScoringPlan:
+    """
+    Compile the scoring plan of a HADS specification, or reuse the plan that was compiled for an identical one.
+
+    Args:
+        items_to_score (ItemsToScoreInput|ScoringPlan): Dictionary of scales and information specifying where the
+                                                       necessary responses can be found in the data; a plan is
+                                                       returned as it is.
+
+    Returns:
+        ScoringPlan: The scoring plan.
+    """
+    if isinstance(items_to_score, ScoringPlan):
+        return items_to_score
+
+    return _compile_scoring_plan(json.dumps(items_to_score, sort_keys=True, default=str))
+
+
+@lru_cache(maxsize=MAXIMUM_SCORING_PLANS)
+def _compile_scoring_plan(key: str) -> ScoringPlan:
+    """
+    Compile the scoring plan of a HADS specification, memoised by its canonical JSON representation.
+
+    Args:
+        key (str): The HADS specification as JSON, with sorted keys.
+
+    Returns:
+        ScoringPlan: The scoring plan.
+    """
+    return ScoringPlan(json.loads(key))
+
+
+def compose_item_matrix(df: pd.DataFrame, plan: ScoringPlan) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Map the HADS item columns to a compact matrix of item scores and a missing-item mask.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the responses.
+        plan (ScoringPlan): The scoring plan of the requested scores.
+
+    Returns:
+        tuple: A uint8 matrix of item scores (rows by questions) and a boolean matrix marking missing responses.
+    """
+    responses = df[plan.question_columns].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float32)
+    missing = np.isnan(responses)
+
+    # Responses may be perturbed by differential privacy, hence round and clip them to the valid range
+    items = np.clip(np.rint(np.where(missing, 0, responses)), 0, MAXIMUM_ITEM_SCORE).astype(np.uint8)
+
+    items[:, plan.reverse_scored] = MAXIMUM_ITEM_SCORE - items[:, plan.reverse_scored]
+    items[missing] = 0
+
+    return items, missing
+
+
+def compose_scale_masks(scales: List[str]) -> np.ndarray:
+    """
+    Compose a matrix that assigns each question to the requested subscales.
+
+    Args:
+        scales (list): The requested subscales.
+
+    Returns:
+        np.ndarray: A uint8 matrix of questions by subscales.
+    """
+    masks = np.zeros((NUMBER_OF_QUESTIONS, len(scales)), dtype=np.uint8)
+    for index, scale in enumerate(scales):
+        masks[np.array(HADS_SCALES[scale]) - 1, index] = 1
+    return masks
+
+
+def score_hads_vectorised(df: pd.DataFrame, items_to_score: Union[ItemsToScoreInput, ScoringPlan]) -> pd.DataFrame:
+    """
+    Compute the HADS subscale scores with a single matrix multiplication over all rows.
+
+    Subscales with at most one missing item are prorated using the mean of the answered items;
+    subscales with more missing items are considered missing.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the responses.
+        items_to_score (ItemsToScoreInput|ScoringPlan): Dictionary of scales and information specifying where the
+                                                       necessary responses can be found in the data, or its
+                                                       compiled scoring plan.
+
+    Returns:
+        pd.DataFrame: The DataFrame with a score column added for each requested subscale.
+    """
+    plan = compile_scoring_plan(items_to_score)
+
+    items, missing = compose_item_matrix(df, plan)
+    masks = plan.scale_masks
+
+    # Subscale sums and the number of answered items per subscale; uint16 prevents overflow of the products
+    sums = items.astype(np.uint16) @ masks.astype(np.uint16)
+    answered = (~missing).astype(np.uint16) @ masks.astype(np.uint16)
+    scale_sizes = masks.sum(axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.rint(sums * (scale_sizes / answered))
+    scores[answered < scale_sizes - MAXIMUM_MISSING_ITEMS] = np.nan
+
+    df = df.copy()
+    for index, scale in enumerate(plan.scales):
+        df[plan.score_columns[scale]] = scores[:, index]
+    return df
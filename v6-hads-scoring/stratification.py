@@ -0,0 +1,174 @@
+import json
+
+import pandas as pd
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+from vantage6.algorithm.tools.exceptions import UserInputError
+
+# General federated algorithm functions
+from vantage6_strongaya_general.miscellaneous import apply_data_stratification, StratificationDetails
+
+OVERALL_STRATUM = "overall"
+
+StrataDetails = Union[StratificationDetails, List[StratificationDetails], None]
+
+
+def label_stratum(variables_to_stratify: StratificationDetails = None) -> str:
+    """
+    Compose a stable label for a stratification definition, so that statistics of the same stratum can be matched
+    across organisations.
+
+    Args:
+        variables_to_stratify (StratificationDetails, optional): Dictionary of variables to stratify. Defaults to None.
+
+    Returns:
+        str: The label of the stratum; 'overall' if no stratification is applied.
+    """
+    if not variables_to_stratify:
+        return OVERALL_STRATUM
+
+    return json.dumps(variables_to_stratify, sort_keys=True)
+
+
+def collect_strata(variables_to_stratify: StrataDetails = None) -> List[Optional[StratificationDetails]]:
+    """
+    Collect the stratification definitions that were requested.
+
+    Args:
+        variables_to_stratify (StratificationDetails|list, optional): A dictionary of variables to stratify,
+                                                                      or a list of such dictionaries to compute
+                                                                      the statistics of several strata at once.
+                                                                      Defaults to None.
+
+    Returns:
+        list: The stratification definitions; a single definition if no list was provided.
+
+    Raises:
+        UserInputError: If the stratification definitions are neither a dictionary nor a list of dictionaries.
+    """
+    if not isinstance(variables_to_stratify, list):
+        strata = [variables_to_stratify]
+    else:
+        strata = variables_to_stratify
+
+    if not strata or not all(stratum is None or isinstance(stratum, dict) for stratum in strata):
+        raise UserInputError("The variables to stratify should be a dictionary or a non-empty list of dictionaries.")
+
+    return strata
+
+
+def collect_stratification_variables(variables_to_stratify: StrataDetails = None) -> List[str]:
+    """
+    Collect the variables that are used by any of the requested strata.
+
+    Args:
+        variables_to_stratify (StratificationDetails|list, optional): A dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
+
+    Returns:
+        list: The variables to stratify, in order of first appearance.
+    """
+    variables = []
+    for stratum in collect_strata(variables_to_stratify):
+        variables += [variable for variable in (stratum or {}) if variable not in variables]
+    return variables
+
+
+def compose_stratification_details(variables_to_stratify: StrataDetails = None) -> Dict[str, Any]:
+    """
+    Compose the variable details of the variables that are used by any of the requested strata,
+    so that their datatypes can be set at once.
+
+    Args:
+        variables_to_stratify (StratificationDetails|list, optional): A dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
+
+    Returns:
+        dict: The details of each variable to stratify.
+    """
+    details = {}
+    for stratum in collect_strata(variables_to_stratify):
+        details = details | (stratum or {})
+    return details
+
+
+def compose_stratification_bounds(variables_to_stratify: StrataDetails = None) -> Dict[str, Tuple[float, float]]:
+    """
+    Compose the public bounds of the numerical variables to stratify, i.e. the union of the ranges that the requested
+    strata declare for them, as rows that do not belong to any of the strata are not retained.
+
+    A variable of which any of the strata leaves the range open has no public bounds.
+
+    Args:
+        variables_to_stratify (StratificationDetails|list, optional): A dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
+
+    Returns:
+        dict: The lower and upper bound of each variable to stratify that has public bounds.
+    """
+    bounds: Dict[str, Optional[Tuple[float, float]]] = {}
+    strata = collect_strata(variables_to_stratify)
+    for variable in collect_stratification_variables(variables_to_stratify):
+        for stratum in strata:
+            details = (stratum or {}).get(variable)
+            start, end = (details.get("start"), details.get("end")) if isinstance(details, dict) else (None, None)
+            if not (isinstance(start, (int, float)) and isinstance(end, (int, float))):
+                bounds[variable] = None
+                break
+
+            lower, upper = bounds.get(variable, (start, end))
+            bounds[variable] = (min(lower, start), max(upper, end))
+
+    return {variable: variable_bounds for variable, variable_bounds in bounds.items() if variable_bounds is not None}
+
+
+def compose_stratum_memberships(df: pd.DataFrame, variables_to_stratify: StrataDetails = None) -> pd.DataFrame:
+    """
+    Determine for each row to which of the requested strata it belongs.
+
+    Strata may overlap, hence membership is described per stratum rather than by a single group label.
+
+    Args:
+        df (pd.DataFrame): The DataFrame of which the datatypes have been set.
+        variables_to_stratify (StratificationDetails|list, optional): A dictionary of variables to stratify,
+                                                                      or a list thereof. Defaults to None.
+
+    Returns:
+        pd.DataFrame: A boolean DataFrame with the index of `df` and a column per stratum label.
+    """
+    memberships = {}
+    for stratum in collect_strata(variables_to_stratify):
+        memberships[label_stratum(stratum)] = df.index.isin(apply_data_stratification(df, stratum).index)
+    return pd.DataFrame(memberships, index=df.index)
+
+
+def collect_stratum_results(results: List[Dict[str, Any]], stratum: str) -> List[Dict[str, Any]]:
+    """
+    Collect the partial results of a single stratum from partial results that are keyed by stratum label.
+
+    Organisations at which the stratum did not meet the sample size threshold do not contribute to it.
+
+    Args:
+        results (list): List of partial results, each containing the results per stratum label under 'strata'.
+        stratum (str): The label of the stratum.
+
+    Returns:
+        list: The partial results of the stratum.
+    """
+    return [result["strata"][stratum] for result in results if result and stratum in result.get("strata", {})]
+
+
+def collect_result_strata(results: List[Dict[str, Any]]) -> List[str]:
+    """
+    Collect the labels of the strata that any of the organisations returned results for.
+
+    Args:
+        results (list): List of partial results, each containing the results per stratum label under 'strata'.
+
+    Returns:
+        list: The stratum labels, in order of first appearance.
+    """
+    strata = []
+    for result in results:
+        strata += [stratum for stratum in (result or {}).get("strata", {}) if stratum not in strata]
+    return strata
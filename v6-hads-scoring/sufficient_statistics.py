@@ -0,0 +1,385 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, TypeVar
+from vantage6.algorithm.tools.exceptions import PrivacyThresholdViolation
+
+# General federated algorithm functions
+from vantage6_strongaya_general.miscellaneous import safe_log
+
+# HADS scoring algorithm severity bands
+from .scoring import HADS_SEVERITY_BANDS
+
+DEFAULT_SAMPLE_SIZE_THRESHOLD = 10
+
+Mergeable = TypeVar("Mergeable")
+
+
+def compute_stratified_sufficient_statistics(df: pd.DataFrame, variable_details: Dict[str, Any],
+                                             memberships: pd.DataFrame,
+                                             histogram_bound: int = None) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Compute mergeable moment sketches of the numerical score variables for every stratum.
+
+    Contrary to the general statistics, these sketches can be merged across organisations,
+    which allows the central to derive the mean and deviation without a second round.
+    The counts and means of all strata are obtained with one matrix product of the stratum memberships and the scores;
+    the sum of squared deviations (M2) is centred on the mean of the stratum, so that it does not suffer from the
+    cancellation of a sum of squares.
+    If a histogram bound is given, the sketch also holds the count of each integer score from zero up to the bound,
+    a fixed-size histogram from which the central derives exact quantiles.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the scores.
+        variable_details (dict): Dictionary of the score variables and their details.
+        memberships (pd.DataFrame): Boolean DataFrame, aligned with `df`, with a column per stratum label.
+        histogram_bound (int, optional): The largest score of the histograms; scores are rounded to the nearest
+                                         integer and clipped to the range. Defaults to None - therewith computing
+                                         no histograms.
+
+    Returns:
+        dict: Per stratum label and score variable the count, missing count, mean, M2, minimum and maximum,
+              and the histogram if requested.
+    """
+    variables = [variable for variable in variable_details
+                 if variable in df.columns and pd.api.types.is_numeric_dtype(df[variable])]
+
+    values = df[variables].to_numpy(dtype=float, na_value=np.nan)
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    member = memberships.to_numpy(dtype=bool)
+
+    rows = member.sum(axis=0)
+    counts = member.T.astype(float) @ present
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = (member.T.astype(float) @ filled) / counts
+
+    # Offset the bin of each score by its variable, so that a single count per stratum yields all histograms
+    if histogram_bound is not None:
+        bins = np.clip(np.rint(filled), 0, histogram_bound).astype(np.int64) + \
+            np.arange(len(variables)) * (histogram_bound + 1)
+
+    statistics = {}
+    for stratum_index, stratum in enumerate(memberships.columns):
+        stratum_values = np.where(present & member[:, [stratum_index]], values, np.nan)
+        m2s = np.nansum((stratum_values - means[stratum_index]) ** 2, axis=0)
+        statistics[stratum] = {}
+        for variable_index, variable in enumerate(variables):
+            count = int(counts[stratum_index, variable_index])
+            statistics[stratum][variable] = {
+                "count": count,
+                "missing": int(rows[stratum_index]) - count,
+                "mean": float(means[stratum_index, variable_index]) if count else None,
+                "m2": float(m2s[variable_index]) if count else 0.0,
+                "min": float(np.nanmin(stratum_values[:, variable_index])) if count else None,
+                "max": float(np.nanmax(stratum_values[:, variable_index])) if count else None
+            }
+
+        if histogram_bound is not None:
+            histograms = np.bincount(bins[present & member[:, [stratum_index]]],
+                                     minlength=len(variables) * (histogram_bound + 1)).reshape(len(variables), -1)
+            for variable_index, variable in enumerate(variables):
+                statistics[stratum][variable]["histogram"] = histograms[variable_index].tolist()
+
+    return statistics
+
+
+def count_stratified_rows(df: pd.DataFrame, variable_details: Dict[str, Any],
+                          memberships: pd.DataFrame) -> Dict[str, Dict[str, Dict[str, int]]]:
+    """
+    Count the present and missing values of the numerical score variables for every stratum,
+    to which the sample size threshold applies as it does to their sufficient statistics.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the scores.
+        variable_details (dict): Dictionary of the score variables and their details.
+        memberships (pd.DataFrame): Boolean DataFrame, aligned with `df`, with a column per stratum label.
+
+    Returns:
+        dict: Per stratum label and score variable the count and missing count.
+    """
+    variables = [variable for variable in variable_details
+                 if variable in df.columns and pd.api.types.is_numeric_dtype(df[variable])]
+
+    present = df[variables].notna().to_numpy()
+    member = memberships.to_numpy(dtype=bool)
+
+    rows = member.sum(axis=0)
+    counts = member.T.astype(np.int64) @ present.astype(np.int64)
+
+    return {stratum: {variable: {"count": int(counts[stratum_index, variable_index]),
+                                 "missing": int(rows[stratum_index] - counts[stratum_index, variable_index])}
+                      for variable_index, variable in enumerate(variables)}
+            for stratum_index, stratum in enumerate(memberships.columns)}
+
+
+def merge_sufficient_statistics(first: Dict[str, Dict[str, float]],
+                                second: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """
+    Merge two sets of moment sketches of the same stratum with the parallel algorithm of Chan et al.,
+    which combines the means and sums of squared deviations exactly, without revisiting the data.
+
+    Args:
+        first (dict): Moment sketches per score variable.
+        second (dict): Moment sketches per score variable.
+
+    Returns:
+        dict: The merged moment sketches per score variable.
+    """
+    merged = {variable: dict(statistics) for variable, statistics in first.items()}
+    for variable, statistics in second.items():
+        if variable not in merged:
+            merged[variable] = dict(statistics)
+            continue
+
+        # Shift the mean towards that of the second sketch in proportion to its count, and add the deviation between
+        # the means to the sum of squared deviations
+        first_count, second_count = merged[variable]["count"], statistics["count"]
+        count = first_count + second_count
+        if first_count and second_count:
+            delta = statistics["mean"] - merged[variable]["mean"]
+            merged[variable]["mean"] += delta * second_count / count
+            merged[variable]["m2"] += statistics["m2"] + delta ** 2 * first_count * second_count / count
+        elif second_count:
+            merged[variable]["mean"], merged[variable]["m2"] = statistics["mean"], statistics["m2"]
+        merged[variable]["count"] = count
+        merged[variable]["missing"] += statistics["missing"]
+
+        # Histograms are only mergeable as long as every sketch holds one
+        if "histogram" in merged[variable] and "histogram" in statistics:
+            merged[variable]["histogram"] = [first_bin + second_bin for first_bin, second_bin in
+                                             zip(merged[variable]["histogram"], statistics["histogram"])]
+        else:
+            merged[variable].pop("histogram", None)
+
+        extremes = [value for value in (merged[variable]["min"], statistics["min"]) if value is not None]
+        merged[variable]["min"] = min(extremes) if extremes else None
+        extremes = [value for value in (merged[variable]["max"], statistics["max"]) if value is not None]
+        merged[variable]["max"] = max(extremes) if extremes else None
+
+    return merged
+
+
+def merge_stratified_sufficient_statistics(first: Dict[str, Dict[str, Dict[str, float]]],
+                                          second: Dict[str, Dict[str, Dict[str, float]]]
+                                          ) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Merge two sets of moment sketches per stratum.
+
+    Args:
+        first (dict): Moment sketches per stratum label and score variable.
+        second (dict): Moment sketches per stratum label and score variable.
+
+    Returns:
+        dict: The merged moment sketches per stratum label and score variable.
+    """
+    merged = dict(first)
+    for stratum, statistics in second.items():
+        merged[stratum] = merge_sufficient_statistics(merged.get(stratum, {}), statistics)
+    return merged
+
+
+def merge_pairwise(items: Iterable[Mergeable], merge: Callable[[Mergeable, Mergeable], Mergeable],
+                   empty: Mergeable) -> Mergeable:
+    """
+    Merge items in a balanced tree of pairwise merges rather than one after the other,
+    so that each item takes part in a logarithmic rather than linear number of merges,
+    which limits the accumulation of rounding errors when there are many items.
+
+    Args:
+        items (iterable): The items to merge, e.g. the moment sketches of several organisations or shards.
+        merge (callable): The function that merges two items.
+        empty (Any): The result if there are no items.
+
+    Returns:
+        Any: The merged items.
+    """
+    items = list(items)
+    if not items:
+        return empty
+
+    while len(items) > 1:
+        items = [merge(*items[index:index + 2]) if index + 1 < len(items) else items[index]
+                 for index in range(0, len(items), 2)]
+    return items[0]
+
+
+def apply_sufficient_statistics_threshold(statistics: Dict[str, Dict[str, float]]) -> None:
+    """
+    Ensure that the sample size threshold is met by the sufficient statistics or counts of a stratum.
+
+    This is the single sample size threshold of the strata, which applies alike to the strata of the scored data of
+    the general statistics and to sufficient statistics that were accumulated over multiple batches, for which the
+    threshold can not be applied to any single batch.
+    The threshold is fetched from the 'SAMPLE_SIZE_THRESHOLD' environment variable and defaults to 10.
+
+    Args:
+        statistics (dict): The accumulated sufficient statistics, or counts, per score variable.
+
+    Raises:
+        PrivacyThresholdViolation: If no or any score variable describes fewer rows than the threshold.
+    """
+    threshold = int(os.environ.get("SAMPLE_SIZE_THRESHOLD", DEFAULT_SAMPLE_SIZE_THRESHOLD))
+
+    if not statistics:
+        raise PrivacyThresholdViolation("The sample size threshold was not met; no statistics are shared.")
+
+    for variable_statistics in statistics.values():
+        if variable_statistics["count"] + variable_statistics["missing"] < threshold:
+            raise PrivacyThresholdViolation("The sample size threshold was not met; no statistics are shared.")
+
+
+def select_strata_meeting_threshold(statistics: Dict[str, Dict[str, Dict[str, float]]]
+                                    ) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Select the strata of which the accumulated sufficient statistics meet the sample size threshold.
+
+    Strata that do not meet the threshold are omitted, so that a single small stratum does not prevent
+    the statistics of the other strata from being shared.
+
+    Args:
+        statistics (dict): The accumulated sufficient statistics per stratum label and score variable.
+
+    Returns:
+        dict: The sufficient statistics of the strata that meet the threshold.
+
+    Raises:
+        PrivacyThresholdViolation: If none of the strata meets the threshold.
+    """
+    selected = {}
+    for stratum, stratum_statistics in statistics.items():
+        try:
+            apply_sufficient_statistics_threshold(stratum_statistics)
+        except PrivacyThresholdViolation:
+            safe_log("warning", "A stratum did not meet the sample size threshold; it is omitted.")
+            continue
+        selected[stratum] = stratum_statistics
+
+    if not selected:
+        raise PrivacyThresholdViolation("The sample size threshold was not met; no statistics are shared.")
+
+    return selected
+
+
+def compute_histogram_quantile(histogram: Sequence[int], probability: float) -> Optional[float]:
+    """
+    Compute a quantile of integer scores from their histogram, interpolating linearly between the order statistics
+    as `numpy.quantile` does; since the histogram holds every score, the quantile is exact.
+
+    Args:
+        histogram (sequence): The count of each integer score, starting at zero.
+        probability (float): The probability of the quantile, e.g. 0.5 for the median.
+
+    Returns:
+        float|None: The quantile, or None if the histogram is empty.
+    """
+    cumulative = np.cumsum(histogram)
+    if not len(cumulative) or cumulative[-1] == 0:
+        return None
+
+    # The score of an order statistic is the first score of which the cumulative count exceeds its position
+    position = (cumulative[-1] - 1) * probability
+    lower, upper = (int(np.searchsorted(cumulative, order, side="right")) for order in
+                    (math.floor(position), math.ceil(position)))
+    return float(lower + (upper - lower) * (position - math.floor(position)))
+
+
+def summarise_histogram(histogram: Sequence[int]) -> Dict[str, Any]:
+    """
+    Derive the quartiles and the number of scores per HADS severity band from a histogram of subscale scores.
+
+    Args:
+        histogram (sequence): The count of each integer score, starting at zero.
+
+    Returns:
+        dict: The median, first and third quartile, interquartile range and the count per severity band.
+    """
+    first_quartile, median, third_quartile = (compute_histogram_quantile(histogram, probability)
+                                              for probability in (0.25, 0.5, 0.75))
+    return {"median": median,
+            "q1": first_quartile,
+            "q3": third_quartile,
+            "iqr": third_quartile - first_quartile if median is not None else None,
+            "bands": {band: int(sum(histogram[lower:upper + 1]))
+                      for band, (lower, upper) in HADS_SEVERITY_BANDS.items()}}
+
+
+def finalise_sufficient_statistics(statistics: Dict[str, float]) -> Dict[str, float]:
+    """
+    Derive the descriptive statistics of a single score variable from its moment sketch.
+
+    Args:
+        statistics (dict): The (merged) moment sketch of a score variable.
+
+    Returns:
+        dict: The count, missing count, mean, standard deviation, minimum and maximum,
+              and the quartiles and severity bands if the sketch holds a histogram.
+    """
+    count = statistics["count"]
+
+    # Sample variance; M2 is the sum of squared deviations from the pooled mean
+    std = None
+    if count > 1:
+        std = math.sqrt(max(statistics["m2"], 0.0) / (count - 1))
+
+    finalised = {"count": count,
+                 "missing": statistics["missing"],
+                 "mean": statistics["mean"] if count else None,
+                 "std": std,
+                 "min": statistics["min"],
+                 "max": statistics["max"]}
+
+    if "histogram" in statistics:
+        finalised |= summarise_histogram(statistics["histogram"])
+    return finalised
+
+
+def merge_partial_results(results: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Merge the sufficient statistics of several organisations in a balanced tree of pairwise merges.
+
+    Args:
+        results (iterable): The partial results, each containing the 'sufficient_statistics' per stratum.
+
+    Returns:
+        dict: The merged sufficient statistics per stratum and score variable.
+    """
+    statistics = []
+    for result in results:
+        if not result:
+            safe_log("warning", "An organisation did not return any sufficient statistics; it is omitted.")
+            continue
+        statistics.append(result["sufficient_statistics"])
+
+    return merge_pairwise(statistics, merge_stratified_sufficient_statistics, {})
+
+
+def finalise_aggregate_sufficient_statistics(merged: Dict[str, Dict[str, Dict[str, float]]]) -> Dict[str, Any]:
+    """
+    Derive the general statistics of each stratum from the merged sufficient statistics.
+
+    Args:
+        merged (dict): The merged sufficient statistics per stratum and score variable.
+
+    Returns:
+        dict: A dictionary containing the aggregated numerical general statistics per stratum and score variable.
+    """
+    return {"numerical_general_statistics": {stratum: {variable: finalise_sufficient_statistics(statistics)
+                                                       for variable, statistics in variables.items()}
+                                             for stratum, variables in merged.items()}}
+
+
+def compute_aggregate_sufficient_statistics(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Aggregate the sufficient statistics of multiple organisations and derive the general statistics thereof.
+
+    Args:
+        results (list): List of partial results, each containing the 'sufficient_statistics' per stratum.
+
+    Returns:
+        dict: A dictionary containing the aggregated numerical general statistics per stratum and score variable.
+    """
+    return finalise_aggregate_sufficient_statistics(merge_partial_results(results))